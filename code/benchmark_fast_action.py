@@ -0,0 +1,110 @@
+import argparse
+import time
+
+import numpy as np
+
+import benchmark_simulate
+import fast_action
+import simulate
+
+# Compare the broadcast Fast Action probability matrix against looping over
+# every batter and pitcher pair, and check a sample of pairs against an
+# exhaustive reading of the dice (card die, two dice on the card, two dice for
+# the hit type) with the rules simulate.py plays by. Without a formatted
+# roster workbook a synthetic 30-team league is generated.
+
+
+def _count(lower, upper):
+    return max(0, upper - lower + 1)
+
+
+def pair_probabilities(batters, pitchers, b, p):
+    """Outcome probabilities of one pair, counting each card's rolls directly"""
+    probabilities = dict.fromkeys(fast_action.outcomes, 0.0)
+    for cards, i in ((batters, b), (pitchers, p)):
+        bb, k, hbp, ph = int(cards["bb"][i]), int(cards["k"][i]), int(cards["hbp"][i]), int(cards["ph"][i])
+        probabilities["bb"] += bb / 72
+        probabilities["k"] += (k - bb) / 72
+        probabilities["hbp"] += (hbp - k) / 72
+        probabilities["hit"] += _count(max(ph, hbp + 1), 36) / 72
+    gopher = 2 * int(pitchers["gopher"][p])
+    home_run = min(36, max(0, int(batters["hr"][b]) + gopher))
+    triple = min(36, max(0, int(batters["triple"][b]) + gopher))
+    double = 36 - max(triple, 36 - simulate.DOUBLE_OUTCOMES)
+    probabilities["hr"] = probabilities["hit"] * home_run / 36
+    probabilities["3b"] = probabilities["hit"] * (triple - home_run) / 36
+    probabilities["2b"] = probabilities["hit"] * double / 36
+    probabilities["1b"] = probabilities["hit"] * (36 - triple - double) / 36
+    probabilities["out"] = 1 - probabilities["hit"] - probabilities["bb"] - probabilities["k"] - probabilities["hbp"]
+    return probabilities
+
+
+def looped_probabilities(batters, pitchers):
+    """The matrix built one pair at a time"""
+    n_batters, n_pitchers = len(batters["bb"]), len(pitchers["bb"])
+    matrix = np.empty((len(fast_action.outcomes), n_batters, n_pitchers), dtype=np.float32)
+    for b in range(n_batters):
+        for p in range(n_pitchers):
+            matrix[:, b, p] = list(pair_probabilities(batters, pitchers, b, p).values())
+    return matrix
+
+
+def enumerated_probabilities(batters, pitchers, b, p):
+    """Outcome probabilities of one pair from every combination of dice, as simulate.play_games reads them"""
+    counts = dict.fromkeys(fast_action.outcomes, 0)
+    gopher = 2 * int(pitchers["gopher"][p])
+    home_run = min(36, max(0, int(batters["hr"][b]) + gopher))
+    triple = min(36, max(0, int(batters["triple"][b]) + gopher))
+    for cards, i in ((batters, b), (pitchers, p)):
+        for roll in range(1, 37):
+            if roll <= cards["bb"][i]:
+                counts["bb"] += 36
+            elif roll <= cards["k"][i]:
+                counts["k"] += 36
+            elif roll <= cards["hbp"][i]:
+                counts["hbp"] += 36
+            elif roll >= cards["ph"][i]:
+                counts["hit"] += 36
+                for kind in range(1, 37):
+                    if kind <= home_run:
+                        counts["hr"] += 1
+                    elif kind <= triple:
+                        counts["3b"] += 1
+                    elif kind > 36 - simulate.DOUBLE_OUTCOMES:
+                        counts["2b"] += 1
+                    else:
+                        counts["1b"] += 1
+            else:
+                counts["out"] += 36
+    return {outcome: count / (2 * 36 * 36) for outcome, count in counts.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the Fast Action probability matrix")
+    parser.add_argument("--roster", help="formatted roster workbook (synthetic 30-team league if omitted)")
+    parser.add_argument("--check", type=int, default=500, help="pairs to check against every dice combination")
+    args = parser.parse_args()
+
+    roster = simulate.read_roster(args.roster) if args.roster else benchmark_simulate.make_league()
+    batters = simulate.parse_batters(roster["Batter Rating"], roster["BPH"])
+    pitchers = simulate.parse_pitchers(roster["Pitcher Rating"], roster["PPH"], roster["PCN"])
+    batters = {name: values[batters["rated"]] for name, values in batters.items()}
+    pitchers = {name: values[pitchers["rated"]] for name, values in pitchers.items()}
+    print(f"{len(batters['bb'])} batters x {len(pitchers['bb'])} pitchers")
+
+    start = time.perf_counter()
+    looped = looped_probabilities(batters, pitchers)
+    before = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix = fast_action.card_probabilities(batters, pitchers)
+    after = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    sample = zip(rng.integers(0, len(batters["bb"]), args.check), rng.integers(0, len(pitchers["bb"]), args.check))
+    exact = all(np.allclose(list(enumerated_probabilities(batters, pitchers, b, p).values()), matrix[:, b, p], atol=1e-6)
+                for b, p in sample)
+
+    print(f"   looped: {before:8.3f} s")
+    print(f"broadcast: {after:8.3f} s  ({before / after:.0f}x faster)")
+    print(f"same matrix: {np.allclose(looped, matrix, atol=1e-6)}, matches the dice on {args.check} pairs: {exact}")
@@ -0,0 +1,132 @@
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fetcher
+import scrape
+
+# Check the rate-limited fetcher against a local stub server, with scrape's
+# base URLs pointed at it so pages go through the same cache and fetcher as a
+# real scrape:
+#   429 with Retry-After, then 200; other threads wait out the Retry-After too
+#   503, then 200, retried with backoff
+#   no more than per_host requests in flight at once
+# Prints one line per check and exits with status 1 if any fails.
+
+html = "<html><body><table id='stub'><thead><tr><th>A</th></tr></thead><tr><td>1</td></tr></table></body></html>"
+
+
+class StubServer:
+    def __init__(self, retry_after=1, failures=1, delay=0.2):
+        """Serve stub pages on a free local port, failing each page's first requests"""
+        self.retry_after = retry_after
+        self.failures = failures
+        self.delay = delay
+        self.requests = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    times = stub.requests.setdefault(self.path, [])
+                    times.append(time.monotonic())
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    time.sleep(stub.delay)
+                    if "standings" in self.path and len(times) <= stub.failures:
+                        self.send_response(429)
+                        self.send_header("Retry-After", str(stub.retry_after))
+                        body = b""
+                    elif "batting" in self.path and len(times) <= stub.failures:
+                        self.send_response(503)
+                        body = b""
+                    else:
+                        self.send_response(200)
+                        body = html.encode()
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def check(name, passed, detail):
+    print(f"{'PASS' if passed else 'FAIL'}  {name}: {detail}")
+    return passed
+
+
+def run_checks(per_host=2, rate=50):
+    """Run the checks against a fresh stub server and return whether all passed"""
+    stub = StubServer()
+    old_urls = scrape.base_url, scrape.base_app_url
+    scrape.base_url = stub.url + "leagues/MLB/"
+    scrape.base_app_url = stub.url + "teams/"
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            scrape.configure_fetcher(rate=rate, burst=1, per_host=per_host, backoff=0.1)
+            cache = scrape.configure_cache(cache_dir=cache_dir)
+            urls = scrape.season_urls("1977")
+
+            # The standings page gets a 429; the batting page is requested while the bucket is paused
+            start = time.monotonic()
+            pages = {}
+            first = threading.Thread(target=lambda: pages.update(season=cache.get(urls["season"])))
+            first.start()
+            time.sleep(stub.delay + 0.1)
+            pages["bat"] = cache.get(urls["bat"])
+            first.join()
+            standings = stub.requests["/leagues/MLB/1977-standings.shtml"]
+            batting = stub.requests["/leagues/MLB/1977-standard-batting.shtml"]
+            results.append(check("429 then 200", len(standings) == 2 and pages["season"] == html,
+                                 f"{len(standings)} requests, retried after {standings[-1] - standings[0]:.2f}s "
+                                 f"(Retry-After {stub.retry_after}s)"))
+            resumed = batting[0] - standings[0]
+            results.append(check("Retry-After pauses other threads", resumed >= stub.retry_after,
+                                 f"next request to the host {resumed:.2f}s after the 429"))
+            results.append(check("5xx retried", len(batting) == 2 and pages["bat"] == html,
+                                 f"{len(batting)} requests for the page that got a 503"))
+
+            # Team pages fetched by fetch_pages' threads, several more than per_host
+            stub.max_in_flight = 0
+            team_urls = [scrape.base_app_url + team + "/1977.shtml"
+                         for team in ["NYY", "BOS", "CIN", "LAD", "PIT", "KCR"]]
+            fetcher.fetch_pages(team_urls, cache, workers=8)
+            results.append(check("per-host cap", stub.max_in_flight <= per_host,
+                                 f"at most {stub.max_in_flight} of {len(team_urls)} requests in flight "
+                                 f"(cap {per_host})"))
+            print(f"\n{scrape.get_fetcher().requests} requests, {scrape.get_fetcher().retried} retried "
+                  f"in {time.monotonic() - start:.1f}s")
+    finally:
+        scrape.base_url, scrape.base_app_url = old_urls
+        stub.close()
+    return all(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the fetcher's retries and limits against a local stub server")
+    parser.add_argument("--per-host", type=int, default=2, help="requests in flight per host")
+    args = parser.parse_args()
+    sys.exit(0 if run_checks(args.per_host) else 1)
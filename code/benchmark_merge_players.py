@@ -0,0 +1,127 @@
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+import ratings
+import rosters
+import scrape
+import synthetic
+
+# Compare the original merge of the scraped tables on cleaned Name/Tm/Age
+# strings against scrape.merge_players, which joins on interned
+# baseball-reference player IDs. The tables are synthetic, with the columns of
+# the real batting, pitching, fielding, catching and appearances tables, traded
+# players (a TOT row plus one per team) and markers such as * # and HOF.
+
+
+def make_tables(players=1500, teams=26, seed=1977):
+    """Return synthetic bat, pit, fld, cat and appearances tables as pullTable gives them"""
+    rng = np.random.default_rng(seed)
+    team_names = [f"T{t:02d}" for t in range(teams)]
+    ids = [f"player{i:04d}01" for i in range(players)]
+    names = [f"First{i}\xa0Last{i}" if i % 7 == 0 else f"First{i} Last{i}" for i in range(players)]
+    ages = rng.integers(20, 42, size=players)
+    pitcher = rng.random(players) < 0.45
+    traded = rng.random(players) < 0.08
+    home = rng.integers(0, teams, size=(players, 2))
+
+    def lines(stats, who, marker, summary=True):
+        rows = []
+        for i in np.flatnonzero(who):
+            stints = [team_names[home[i, 0]]]
+            if traded[i] and home[i, 0] != home[i, 1]:
+                stints = ["TOT", team_names[home[i, 0]], team_names[home[i, 1]]]
+            for team in stints:
+                values = rng.integers(0, 200, size=len(stats)).astype(float)
+                rows.append([len(rows) + 1, names[i] + marker(i), int(ages[i]), team, "ML", *values] +
+                            ["1B-OF"] * summary + [ids[i]])
+        summary_column = ["Pos\xa0Summary"] * summary
+        return pd.DataFrame(rows, columns=["Rk", "Name", "Age", "Tm", "Lg", *stats, *summary_column, "player_id"])
+
+    bat = lines(synthetic.bat_stats, rng.random(players) < 0.95, lambda i: "*#"[i % 2] if i % 3 == 0 else "")
+    pit = lines(synthetic.pit_stats, pitcher, lambda i: "*" if i % 4 == 0 else "", summary=False)
+    bat.loc[len(bat)] = [None, "LgAvg per 600 PA", None, "", "", *[1.0] * len(synthetic.bat_stats), "", None]
+    pit.loc[len(pit)] = [None, "LgAvg per 180 IP", None, "", "", *[1.0] * len(synthetic.pit_stats), None]
+
+    fld = lines(synthetic.fld_stats, np.ones(players, dtype=bool), lambda i: "")
+    fld = fld[~fld["player_id"].duplicated()]
+    fld["Pos\xa0Summary"] = np.where(pitcher[fld.index % players], "P", "1B-OF")
+    fld["Fld%"] = rng.uniform(0.95, 1, size=len(fld)).round(3)
+    cat = lines(synthetic.cat_stats, rng.random(players) < 0.08, lambda i: "", summary=False)
+    fld.loc[len(fld)] = [None, "LgAvg", None, "", "", *[1.0] * len(synthetic.fld_stats), "", None]
+    cat.loc[len(cat)] = [None, "LgAvg", None, "", "", *[1.0] * len(synthetic.cat_stats), None]
+
+    team_lines = pd.concat([bat, pit])[["Name", "Age", "Tm", "player_id"]].dropna()
+    team_lines = team_lines[team_lines["Tm"] != "TOT"].drop_duplicates(["player_id", "Tm"])
+    appearances = team_lines.assign(Name=[re.sub("[*#]", "", name) + (" HOF" if i % 50 == 0 else "")
+                                          for i, name in enumerate(team_lines["Name"])])
+    for stat in synthetic.app_stats:
+        appearances[stat] = rng.integers(0, 150, size=len(appearances))
+    return bat, pit, fld.drop(columns=["Tm"]), cat.drop(columns=["Tm"]), appearances.reset_index(drop=True)
+
+
+def legacy_merge_players(bat, pit, fld, cat, appearances):
+    """The original merge on cleaned name strings, with every column of every table"""
+    bat = bat[bat["Name"] != "LgAvg per 600 PA"].copy()
+    bat["Bats"] = bat["Name"].apply(scrape.how_bats)
+    bat["Name"] = [re.sub("[*#]", "", name) for name in bat["Name"]]
+    bat.drop(columns=["Rk"], inplace=True)
+
+    pit = pit[pit["Name"] != "LgAvg per 180 IP"].copy()
+    pit["Throws"] = pit["Name"].apply(scrape.how_throws)
+    pit["Name"] = [re.sub("[*#]", "", name) for name in pit["Name"]]
+    pit.drop(columns=["Rk"], inplace=True)
+
+    players = pd.merge(bat, pit, how="outer", on=["Name", "Tm", "Age"], suffixes=('_bat', '_pit'))
+
+    fld = fld[fld["Name"] != "LgAvg"].drop(columns=["Rk"])
+    players = pd.merge(players, fld, how="left", on=["Name", "Age"], suffixes=('', '_fld'))
+
+    cat = cat.drop_duplicates(subset=["Name"], keep='first')
+    cat = cat[cat["Name"] != "LgAvg"].drop(columns=["Rk"])
+    players = pd.merge(players, cat, how='left', on=["Name", "Age"], suffixes=('', '_cat'))
+
+    appearances = appearances.drop(columns=["", "B", "T", "Ht", "Wt", "DoB", "Yrs", "WAR", "Salary", ""],
+                                   errors='ignore')
+    players["Name"] = players["Name"].str.strip()
+    players["Name"] = [' '.join(x.split()) for x in players["Name"]]
+    appearances["Name"] = [' '.join(x.split()) for x in appearances["Name"]]
+    appearances["Name"] = appearances["Name"].str.replace(" HOF", "")
+    players = pd.merge(players, appearances, how='left', on=["Name", "Tm", "Age"], suffixes=('', '_app'))
+
+    return scrape.infer_dtypes(players)
+
+
+def rated_rosters(players):
+    """Rate a players frame and return its roster rows in a fixed order"""
+    players = ratings.rate_players(players.copy())
+    players_short = rosters.roster_frame(players)
+    return players_short.sort_values(["Tm", "Name"], ignore_index=True)
+
+
+def time_call(func, *args, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the players merge on names against the player ID joins")
+    parser.add_argument("--players", type=int, default=1500, help="players in the synthetic season")
+    args = parser.parse_args()
+
+    tables = make_tables(args.players)
+    before, old = time_call(legacy_merge_players, *[table.drop(columns=["player_id"]) for table in tables])
+    after, new = time_call(scrape.merge_players, *tables)
+
+    old_rosters, new_rosters = rated_rosters(old), rated_rosters(new)
+    print(f"names:   {before:.3f} s  {len(old):>6} rows x {old.shape[1]:>3} columns")
+    print(f"IDs:     {after:.3f} s  {len(new):>6} rows x {new.shape[1]:>3} columns")
+    print(f"{before / after:.1f}x faster, same rated rosters: {old_rosters.equals(new_rosters)}")
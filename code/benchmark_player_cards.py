@@ -0,0 +1,201 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import openpyxl
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+import create_player_cards as cards
+import rosters
+import synthetic
+
+# Compare the original card renderer, which copies the template's styles and
+# merges into every card, against create_player_cards, which prepares each
+# card once and stamps it by offset, in memory, streamed, or as per-team
+# workbooks rendered by a process pool and combined, and against the PDF
+# renderer. Without a roster workbook and template a synthetic 30-team season
+# is generated.
+#
+# The stamped and streamed cards, and the streamed roster workbook, are built
+# from openpyxl internals (cell style arrays, the sheet's cell dict and merged
+# ranges), so the script also checks that their output still matches the
+# original renderers' and exits with status 1 if not. Run it after upgrading
+# openpyxl.
+
+team_names = [
+    "Atlanta Braves", "Baltimore Orioles", "Boston Red Sox", "California Angels", "Chicago Cubs",
+    "Chicago White Sox", "Cincinnati Reds", "Cleveland Indians", "Colorado Rockies", "Detroit Tigers",
+    "Florida Marlins", "Houston Astros", "Kansas City Royals", "Los Angeles Dodgers", "Milwaukee Brewers",
+    "Minnesota Twins", "Montreal Expos", "New York Mets", "New York Yankees", "Oakland Athletics",
+    "Philadelphia Phillies", "Pittsburgh Pirates", "San Diego Padres", "San Francisco Giants",
+    "Seattle Mariners", "St. Louis Cardinals", "Texas Rangers", "Toronto Blue Jays", "Tampa Bay Devil Rays",
+    "Arizona Diamondbacks",
+]
+
+
+def make_template(path):
+    """Write a card template workbook with fonts, fills, borders and merges like the real one"""
+    wb = Workbook()
+    wb.remove(wb.active)
+    thin = Side(style='thin')
+    for title in ('Batter Card Template', 'Pitcher Card Template'):
+        ws = wb.create_sheet(title)
+        for row in range(1, 9):
+            for col in range(1, 8):
+                cell = ws.cell(row=row, column=col)
+                cell.font = Font(name='Arial', size=11 if row == 1 else 8, bold=row <= 2)
+                cell.alignment = Alignment(horizontal='center' if row == 1 else 'left', vertical='center')
+                cell.border = Border(left=thin if col == 1 else None, right=thin if col == 7 else None,
+                                     top=thin if row == 1 else None, bottom=thin if row == 8 else None)
+                if row == 1:
+                    cell.fill = PatternFill(fill_type='solid', start_color='FFD9E1F2', end_color='FFD9E1F2')
+        for coord in ('A1:G1', 'A2:E2', 'F2:G2', 'D5:G5', 'D6:G6'):
+            ws.merge_cells(coord)
+    wb.save(path)
+
+
+def make_rosters(path, teams=30, players=40, year=1995):
+    """Write a formatted-rosters-like workbook with one sheet of players per team"""
+    rng = random.Random(year)
+    wb = Workbook()
+    wb.remove(wb.active)
+    for team in team_names[:teams]:
+        ws = wb.create_sheet(team[:3].upper() + str(len(wb.sheetnames)))
+        ws['A1'] = f"{year} {team}"
+        ws.append([chr(ord('A') + i) for i in range(17)])
+        for i in range(players):
+            pitcher = i >= players // 2
+            ws.append([
+                team[:3].upper(), f"Player {team[:3]} {i}", rng.randint(20, 40), 0, 0, 0, 0,
+                "P" if pitcher else "1B-LF", "+2.1-3.2", "" if pitcher and i % 3 else "D HR(23) 3B(61)",
+                rng.randint(1, 9), rng.choice("LRS"), "C PH66 /44" if pitcher else "",
+                rng.randint(11, 66) if pitcher else "", rng.randint(1, 9) if pitcher else "",
+                rng.choice("LR"), "P" if pitcher else "1B",
+            ])
+    wb.save(path)
+
+
+def legacy_read_team(team_sheet):
+    """The original reader: one cell() call per roster cell"""
+    data = []
+    for row in range(3, team_sheet.max_row + 1):
+        row_data = {}
+        for col in range(1, team_sheet.max_column + 1):
+            row_data[get_column_letter(col)] = team_sheet.cell(row=row, column=col).value
+        data.append(row_data)
+    return pd.DataFrame(data)
+
+
+def legacy_player_cards(data_file, template_file, output_file):
+    """The original renderer: template styles and merges are rebuilt for every card"""
+    template_wb = openpyxl.load_workbook(template_file)
+    templates = {True: template_wb['Batter Card Template'], False: template_wb['Pitcher Card Template']}
+    data_wb = openpyxl.load_workbook(data_file)
+    output_wb = Workbook()
+    for sheet_name in data_wb.sheetnames:
+        year, team = cards.extract_year_and_team(data_wb[sheet_name]['A1'].value)
+        ws = cards.setup_team_sheet(output_wb, sheet_name)
+        for card_index, (is_batter, player_data) in enumerate(cards.team_cards(legacy_read_team(data_wb[sheet_name]))):
+            start_row, start_col = cards.get_card_position(card_index, is_batter)
+            cards.create_card_structure(ws, templates[is_batter], start_row, start_col, is_batter)
+            populate = cards.populate_batter_card if is_batter else cards.populate_pitcher_card
+            populate(ws, start_row, start_col, player_data, year, team)
+    output_wb.remove(output_wb['Sheet'])
+    output_wb.save(output_file)
+
+
+def _sides(border):
+    """A border's drawn sides; an empty <right/> and a missing right side look the same"""
+    sides = {}
+    for name in ('left', 'right', 'top', 'bottom', 'diagonal'):
+        side = getattr(border, name)
+        if side is not None and side.style is not None:
+            sides[name] = (side.style, repr(side.color))
+    return sides
+
+
+def _cell_look(cell):
+    return (type(cell).__name__, None if isinstance(cell, openpyxl.cell.cell.MergedCell) else cell.value,
+            repr(cell.font), repr(cell.alignment), _sides(cell.border), repr(cell.fill), cell.number_format)
+
+
+def same_cards(old_file, new_file):
+    """Whether two card workbooks have the same sheets, values, styles and merges"""
+    old_wb = openpyxl.load_workbook(old_file)
+    new_wb = openpyxl.load_workbook(new_file)
+    if old_wb.sheetnames != new_wb.sheetnames:
+        return False
+    for old, new in zip(old_wb, new_wb):
+        if {str(r) for r in old.merged_cells.ranges} != {str(r) for r in new.merged_cells.ranges}:
+            return False
+        if old.max_row != new.max_row or old.max_column != new.max_column:
+            return False
+        for old_row, new_row in zip(old.iter_rows(), new.iter_rows()):
+            if any(_cell_look(a) != _cell_look(b) for a, b in zip(old_row, new_row)):
+                return False
+    return True
+
+
+def time_render(render, data_file, template_file, output_file):
+    start = time.perf_counter()
+    render(data_file, template_file, output_file)
+    return time.perf_counter() - start, os.path.getsize(output_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the card renderers on one season")
+    parser.add_argument("--data", help="formatted rosters workbook (synthetic 30-team season if omitted)")
+    parser.add_argument("--template", help="card template workbook (synthetic if omitted)")
+    parser.add_argument("--teams", type=int, default=30, help="teams in the synthetic season")
+    parser.add_argument("--players", type=int, default=40, help="players per synthetic team")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes for the parallel run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = args.data or os.path.join(tmp, "rosters.xlsx")
+        template_file = args.template or os.path.join(tmp, "template.xlsx")
+        if not args.data:
+            make_rosters(data_file, args.teams, args.players)
+        if not args.template:
+            make_template(template_file)
+
+        results = {}
+        renderers = (
+            ("before", legacy_player_cards),
+            ("after", lambda *files: cards.create_player_cards(*files, streaming=False)),
+            ("streaming", cards.create_player_cards),
+            ("parallel", lambda *files: cards.create_player_cards(*files, team_dir=os.path.join(tmp, "teams"),
+                                                                  workers=args.workers)),
+            ("pdf", cards.create_player_cards),
+        )
+        for name, render in renderers:
+            extension = ".pdf" if name == "pdf" else ".xlsx"
+            results[name] = time_render(render, data_file, template_file, os.path.join(tmp, name + extension))
+
+        same = {name: same_cards(os.path.join(tmp, "before.xlsx"), os.path.join(tmp, name + ".xlsx"))
+                for name in results if name not in ("before", "pdf")}
+
+        # Streamed roster sheets against the ones formatted cell by cell
+        players_short = rosters.roster_frame(synthetic.season_players(0.2))
+        rosters.write_rosters(players_short, "1977", os.path.join(tmp, "formatted rosters.xlsx"), streaming=False)
+        rosters.write_rosters(players_short, "1977", os.path.join(tmp, "streamed rosters.xlsx"))
+        same_rosters = same_cards(os.path.join(tmp, "formatted rosters.xlsx"),
+                                  os.path.join(tmp, "streamed rosters.xlsx"))
+
+    print()
+    for name, (seconds, size) in results.items():
+        print(f"{name:>9}: {seconds:7.2f} s  {size / 1024:8.1f} KiB")
+    for name, identical in same.items():
+        print(f"{name}: {results['before'][0] / results[name][0]:.1f}x faster, identical output: {identical}")
+    print(f"pdf: {results['before'][0] / results['pdf'][0]:.1f}x faster, "
+          f"{args.teams * args.players / results['pdf'][0]:.0f} players per second")
+    print(f"streamed rosters: identical output: {same_rosters}")
+    if not (all(same.values()) and same_rosters):
+        print(f"\nOutput differs from the original renderers with openpyxl {openpyxl.__version__}")
+        sys.exit(1)
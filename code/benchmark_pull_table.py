@@ -0,0 +1,92 @@
+import argparse
+import glob
+import os
+import re
+import time
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+import page_cache
+from table_extract import extract_tables, find_table_ids
+
+# Compare the BeautifulSoup pullTable against table_extract.extract_tables on
+# saved pages. By default every page in the scrape cache is used.
+
+
+def soup_tables(text, tableIDs):
+    """The original pullTable, run once per table on already fetched page text"""
+    frames = {}
+    for tableID in tableIDs:
+        comm = re.compile("<!--|-->")
+        soup = BeautifulSoup(comm.sub("", text), 'lxml')
+        tables = soup.find_all('table', id = tableID)
+        data_rows = tables[0].find_all('tr')
+        data_header = tables[0].find_all('thead')
+        data_header = data_header[0].find_all("tr")
+        data_header = data_header[0].find_all("th")
+        game_data = [[td.getText() for td in data_rows[i].find_all(['th','td'])]
+            for i in range(len(data_rows))
+            ]
+        data = pd.DataFrame(game_data)
+        header = []
+        for i in range(len(data.columns)):
+            header.append(data_header[i].getText())
+        data.columns = header
+        data = data.loc[data[header[0]] != header[0]]
+        frames[tableID] = data.reset_index(drop = True)
+    return frames
+
+
+def time_call(func, *args, repeat=3):
+    """Return the best wall time of a few calls and the last result"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def same_tables(old, new):
+    """Whether the new tables hold the same text as the old ones, cell for cell"""
+    for tableID, frame in old.items():
+        text = new[tableID]
+        if list(frame.columns) != list(text.columns) or not frame.fillna('').equals(text.fillna('')):
+            return False
+    return True
+
+
+def benchmark(paths, repeat=3):
+    """Time both extractors on every saved page and print a comparison"""
+    total_old = total_new = 0
+    print(f"{'Page':<40} {'Tables':>6} {'pullTable':>10} {'lxml':>8} {'Speedup':>8}  Match")
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        tableIDs = list(dict.fromkeys(find_table_ids(text)))
+        if not tableIDs:
+            continue
+
+        old_time, old = time_call(soup_tables, text, tableIDs, repeat=repeat)
+        new_time, _ = time_call(extract_tables, text, tableIDs, repeat=repeat)
+        text_tables = extract_tables(text, tableIDs, typed=False)
+        total_old += old_time
+        total_new += new_time
+        print(f"{os.path.basename(path)[:40]:<40} {len(tableIDs):>6} {old_time:>9.3f}s {new_time:>7.3f}s "
+              f"{old_time / new_time:>7.1f}x  {same_tables(old, text_tables)}")
+
+    if total_new:
+        print(f"\nTotal: pullTable {total_old:.2f}s, lxml {total_new:.2f}s ({total_old / total_new:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark table extraction on saved pages")
+    parser.add_argument("pages", nargs="*", help="saved HTML pages (default: every page in the cache)")
+    parser.add_argument("--cache-dir", default=page_cache.default_cache_dir)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = args.pages or sorted(glob.glob(os.path.join(args.cache_dir, '*.html')))
+    benchmark(paths, args.repeat)
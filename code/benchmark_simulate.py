@@ -0,0 +1,80 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import simulate
+
+# Plate appearances per second of the season simulator, for different numbers
+# of games resolved at once and across a process pool. Without a formatted
+# roster workbook a synthetic 30-team league is generated.
+
+_letters = ["A", "B", "C", "D", "E", "F", "G"]
+
+
+def _dice(rng, low, high, size):
+    """Random two-dice numbers between the positions low and high"""
+    position = rng.integers(low, high + 1, size=size) - 1
+    return (position // 6 + 1) * 10 + position % 6 + 1
+
+
+def make_league(teams=30, players=30, seed=1995):
+    """Return a roster frame of rated batters and pitchers like the formatted roster sheets"""
+    rng = np.random.default_rng(seed)
+    n = teams * players
+    pitcher = np.tile(np.arange(players) >= players // 2, teams)
+    bb, k, hr = _dice(rng, 1, 6, n), _dice(rng, 7, 14, n), _dice(rng, 1, 3, n)
+    batter_rating = [f"{rng.choice(_letters)}{h}({h + 1 if h % 10 < 6 else h + 5}) [{b}-{s}]"
+                     for h, b, s in zip(hr, bb, k)]
+    pitcher_rating = [f"{'+' if i % 2 else ''}W{rng.integers(2, 9)} ({b}-{s})" for i, (b, s) in enumerate(zip(bb, k))]
+    return pd.DataFrame({
+        "Name": [f"Player {i}" for i in range(n)],
+        "Tm": np.repeat([f"T{t:02d}" for t in range(teams)], players),
+        "G": rng.integers(20, 162, size=n),
+        "GS": np.where(pitcher, rng.integers(0, 35, size=n), 0),
+        "GF": 0,
+        "DEF": "S94 -2",
+        "Batter Rating": batter_rating,
+        "BPH": _dice(rng, 26, 30, n),
+        "Pitcher Rating": np.where(pitcher, pitcher_rating, ""),
+        "PCN": np.where(pitcher, _dice(rng, 20, 30, n), np.nan),
+        "PPH": np.where(pitcher, _dice(rng, 26, 30, n), np.nan),
+        "Primary": np.where(pitcher, "P", "1B"),
+    })
+
+
+def pa_per_second(league, games, repeat=3):
+    """Best plate appearances per second playing a batch of games at once"""
+    rng = np.random.default_rng(0)
+    home, away = rng.integers(0, len(league.teams), size=(2, games))
+    away = np.where(away == home, (away + 1) % len(league.teams), away)
+    rounds = rng.integers(0, 162, size=games)
+    best = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, plate_appearances = simulate.play_games(league, home, away, rounds, rng)
+        best = max(best, plate_appearances / (time.perf_counter() - start))
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the season simulator in plate appearances per second")
+    parser.add_argument("--roster", help="formatted roster workbook (synthetic 30-team league if omitted)")
+    parser.add_argument("--seasons", type=int, default=100, help="seasons for the process pool run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    args = parser.parse_args()
+
+    roster = simulate.read_roster(args.roster) if args.roster else make_league()
+    league = simulate.League(roster)
+
+    print("games at once      PA/s")
+    for games in (1, 10, 100, 1_000, 10_000, 100_000):
+        print(f"{games:>13,} {pa_per_second(league, games, repeat=1 if games >= 10_000 else 3):>10,.0f}")
+
+    start = time.perf_counter()
+    _, _, plate_appearances = simulate.project_seasons(league, args.seasons, workers=args.workers, seed=0)
+    elapsed = time.perf_counter() - start
+    print(f"\n{args.seasons} seasons on {args.workers} workers: {plate_appearances:,} PA in {elapsed:.1f} s "
+          f"({plate_appearances / elapsed:,.0f} PA/s)")
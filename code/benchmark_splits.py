@@ -0,0 +1,101 @@
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+import h2h
+import retrosheet
+import split_cube
+import synthetic
+
+# Check the split cubes' home and away rollups against the event files.
+#
+# The plate appearances of every batter and pitcher at home and away are
+# counted straight from the event files, game by game: a batter is on the
+# side of the play's batting team (0 visitors, 1 home) and a pitcher on the
+# side given by the start or sub record that put them on the mound, so a
+# pitcher's split does not depend on turning the batting team around as the
+# cubes do. The batting cube's
+# batter x home and the pitching cube's pitcher x pitcher_home rollups must
+# match those counts exactly. Runs on a synthetic season unless given event
+# files; prints one line per check and exits with status 1 if any fails.
+
+
+def count_sides(paths):
+    """Count plate appearances by (batter, side) and (pitcher, side) from the event files"""
+    batting = Counter()
+    pitching = Counter()
+    for path in h2h.expand_paths(paths):
+        with open(path, encoding="latin-1") as f:
+            for line in f:
+                parts = line.rstrip("\r\n").split(",")
+                if parts[0] == "id":
+                    pitchers = {}
+                elif parts[0] in ("start", "sub") and len(parts) >= 6:
+                    # start/sub,player,"name",side,batting order,position; names may contain commas
+                    if parts[-1] == "1":
+                        pitchers[int(parts[-3])] = parts[1]
+                elif parts[0] == "play" and len(parts) >= 7 and parts[6] != "NP":
+                    if retrosheet.classify(parts[6])[0] not in retrosheet._pa_events:
+                        continue
+                    side = int(parts[2])
+                    batting[(parts[3], side)] += 1
+                    # The pitcher on the mound is the last one listed for the fielding side
+                    for pitcher_side, pitcher in pitchers.items():
+                        if pitcher_side != side:
+                            pitching[(pitcher, pitcher_side)] += 1
+    return batting, pitching
+
+
+def cube_sides(cube, player, side):
+    """Return {(player, 0 away or 1 home): pa} from a cube rolled up to player and side"""
+    cells = cube.rollup([player, side])
+    players = np.asarray(cells.labels[player])[cells.codes(player)]
+    pa = np.asarray(cells.counts)[:, cells.columns.index("pa")]
+    return {(name, int(code)): int(count) for name, code, count in zip(players, cells.codes(side), pa) if count}
+
+
+def check(name, expected, got):
+    wrong = [key for key in set(expected) | set(got) if expected.get(key) != got.get(key)]
+    passed = not wrong
+    print(f"{'PASS' if passed else 'FAIL'}  {name}: {len(expected)} player sides, "
+          f"{sum(expected.values())} plate appearances, {len(wrong)} mismatched")
+    for key in sorted(wrong)[:5]:
+        print(f"    {key}: {expected.get(key, 0)} in the event files, {got.get(key, 0)} in the cube")
+    return passed
+
+
+def run_checks(paths, work_dir):
+    """Build the cubes of the event files and check their home and away rollups"""
+    start = time.perf_counter()
+    plays = retrosheet.Plays(retrosheet.build_plays(paths, os.path.join(work_dir, "plays")))
+    cubes = split_cube.build_cubes(plays)
+    batting, pitching = count_sides(paths)
+    print(f"{len(plays)} plays in {len(plays.games)} games, cubes built in {time.perf_counter() - start:.1f}s\n")
+    results = [check("batter home/away", dict(batting), cube_sides(cubes["batting"], "batter", "home")),
+               check("pitcher home/away", dict(pitching),
+                     cube_sides(cubes["pitching"], "pitcher", "pitcher_home"))]
+    return all(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the split cubes' home and away rollups against event files")
+    parser.add_argument("events", nargs="?", help="event files, e.g. \"../data/1995eve/*.EV*\" (a synthetic season by default)")
+    parser.add_argument("--scale", type=float, default=0.2, help="size of the synthetic season")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        events = args.events
+        if events is None:
+            event_dir = os.path.join(tmp, "events")
+            synthetic.write_events(event_dir, synthetic.season_players(args.scale))
+            events = os.path.join(event_dir, "*.EV*")
+        if not glob.glob(events):
+            print(f"Error: no event files match {events}")
+            sys.exit(1)
+        sys.exit(0 if run_checks(events, tmp) else 1)
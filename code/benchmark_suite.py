@@ -0,0 +1,127 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import benchmark_player_cards
+import combine_rosters
+import create_player_cards
+import h2h
+import instrument
+import ratings
+import retrosheet
+import rosters
+import scrape
+import split_cube
+import synthetic
+
+# Benchmarks of the rating pipeline on synthetic seasons, run offline.
+#
+# Each benchmark runs once per scale (1 is one season, 10 and 100 have ten and
+# a hundred times the players and plays) as an instrument stage, so the
+# breakdown also shows the stages inside it. A run can be saved as the
+# baseline; later runs flag benchmarks slower than the baseline for their
+# rows, or than the other scales predict, and exit with status 1 when the
+# baseline was beaten by more than the threshold.
+
+default_baseline = os.path.join('..', 'data', 'benchmarks', 'baseline.json')
+
+benchmarks = ["merge", "rate", "rosters", "combine_rosters", "cards", "cards_pdf", "h2h", "h2h_events", "splits"]
+
+
+def _stage(name, wanted, rows=None):
+    return instrument.stage(name, rows) if name in wanted else contextlib.nullcontext({"rows": rows})
+
+
+def run_benchmarks(scale, work_dir, wanted=benchmarks, seed=1977):
+    """Run the wanted benchmarks on a synthetic season of the given scale and return the instrument report"""
+    tables = synthetic.season_tables(scale, seed)
+    roster_file = os.path.join(work_dir, f"{scale:g}x rosters formatted.xlsx")
+    template_file = os.path.join(work_dir, "Player Cards Template.xlsx")
+    plays_file = os.path.join(work_dir, f"{scale:g}x plays.csv")
+    benchmark_player_cards.make_template(template_file)
+    event_dir = os.path.join(work_dir, f"{scale:g}x events")
+    if "h2h" in wanted:
+        plays = synthetic.write_plays(plays_file, synthetic.season_players(scale, seed), seed=seed)
+    if {"h2h_events", "splits"} & set(wanted):
+        events = synthetic.write_events(event_dir, synthetic.season_players(scale, seed), seed=seed)
+
+    instrument.enable()
+    with _stage("merge", wanted) as record:
+        players = scrape.merge_players(*tables)
+        record["rows"] = len(players)
+    with _stage("rate", wanted, len(players)):
+        ratings.rate_players(players)
+
+    if {"rosters", "combine_rosters", "cards", "cards_pdf"} & set(wanted):
+        players_short = rosters.roster_frame(players.copy())
+        with _stage("rosters", wanted, len(players_short)):
+            rosters.write_rosters(players_short, "1977", roster_file)
+
+    # The scripts print per team, which is left out of the timings' output
+    with contextlib.redirect_stdout(io.StringIO()):
+        if "combine_rosters" in wanted:
+            with instrument.stage("combine_rosters", len(players_short)):
+                combined = combine_rosters.combine_rosters(roster_file)
+                combine_rosters.write_combined(combined, os.path.join(work_dir, f"{scale:g}x all ratings.xlsx"))
+        if "cards" in wanted:
+            with instrument.stage("cards", len(players_short)):
+                create_player_cards.create_player_cards(roster_file, template_file,
+                                                        os.path.join(work_dir, f"{scale:g}x Player Cards.xlsx"))
+        if "cards_pdf" in wanted:
+            with instrument.stage("cards_pdf", len(players_short)):
+                create_player_cards.create_player_cards(roster_file, template_file,
+                                                        os.path.join(work_dir, f"{scale:g}x Player Cards.pdf"))
+
+    if "h2h" in wanted:
+        with instrument.stage("h2h", plays):
+            h2h.aggregate_h2h(plays_file)
+    if {"h2h_events", "splits"} & set(wanted):
+        with _stage("h2h_events", wanted, events):
+            plays_dir = retrosheet.build_plays(os.path.join(event_dir, "*.EV*"),
+                                               os.path.join(work_dir, f"{scale:g}x plays"))
+            if "h2h_events" in wanted:
+                h2h.aggregate_plays(retrosheet.Plays(plays_dir))
+    if "splits" in wanted:
+        with instrument.stage("splits", events):
+            split_cube.build_cubes(retrosheet.Plays(plays_dir))
+    return instrument.report()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the rating pipeline on synthetic seasons")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1], help="season sizes, e.g. 1 10 100")
+    parser.add_argument("--only", nargs="+", choices=benchmarks, help="benchmarks to run (all by default)")
+    parser.add_argument("--baseline", default=default_baseline, help="baseline JSON to compare against")
+    parser.add_argument("--save", action="store_true", help="save this run as the baseline for its scales")
+    parser.add_argument("--threshold", type=float, default=1.5, help="flag benchmarks this many times slower")
+    parser.add_argument("--work-dir", help="folder for the generated files (a temporary folder by default)")
+    parser.add_argument("--trace", help="save the stages as a Chrome trace event file")
+    args = parser.parse_args()
+
+    baseline = instrument.read_json(args.baseline) if os.path.exists(args.baseline) else {}
+    profiles = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = args.work_dir or tmp
+        os.makedirs(work_dir, exist_ok=True)
+        for scale in args.scales:
+            label = f"{scale:g}x"
+            start = time.perf_counter()
+            profiles[label] = run_benchmarks(scale, work_dir, args.only or benchmarks)
+            print(f"{label}: {time.perf_counter() - start:.1f} s")
+
+    instrument.print_breakdown(profiles, baseline, args.threshold)
+    if args.trace:
+        instrument.write_trace(profiles, args.trace)
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        instrument.write_json({**baseline, **profiles}, args.baseline)
+        print(f"\nBaseline saved to: {args.baseline}")
+    elif baseline:
+        slower = [path for path, label, _, _ in instrument.compare(profiles, baseline, args.threshold)
+                  if label in baseline]
+        if slower:
+            sys.exit(1)
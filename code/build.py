@@ -0,0 +1,197 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import create_player_cards
+import pdf_writer
+import rate_seasons
+import ratings
+import rosters
+import season_store
+
+# Rebuild formatted rosters and player cards from the season store, redoing
+# only what changed since the last build.
+#
+# Every output is fingerprinted by its inputs: the season's stats in the store,
+# the rating engine (ratings.py, tables included), the roster and card code,
+# and the card template. A season whose fingerprints all match the manifest
+# (<output dir>/build manifest.json) and whose files exist is skipped without
+# being read. Otherwise it is re-rated, which is cheap, and each team's roster
+# rows and card values are fingerprinted again, so a changed breakpoint only
+# rewrites the seasons where some rating actually moved, and only the card
+# files of teams with a changed card. The roster workbook is written whole,
+# since a sheet cannot be replaced inside an .xlsx file; cards are written per
+# team, to <output dir>/<year> cards/<team>.xlsx (or .pdf).
+
+default_manifest = "build manifest.json"
+
+# Roster columns shown on the cards; other columns (games, appearances) never change a card
+card_columns = ["Name", "Age", "Positions", "DEF", "Batter Rating", "BPH", "B", "Pitcher Rating", "PCN", "PPH",
+                "T", "Primary"]
+
+
+def fingerprint(*parts):
+    """Return a hex digest of the repr of the given values"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def file_hash(path):
+    """Return the hex digest of a file's bytes"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_version(*modules):
+    """Fingerprint of the source files of the given modules"""
+    return fingerprint(*[file_hash(module.__file__) for module in modules])
+
+
+def versions(template_file=None):
+    """Fingerprints of everything besides the stats that the outputs depend on"""
+    return {
+        "ratings": code_version(ratings),  # The breakpoint tables live in ratings.py
+        "rosters": code_version(rosters),
+        "cards": code_version(create_player_cards, pdf_writer),
+        "template": file_hash(template_file) if template_file else None,
+    }
+
+
+def season_stats(year, store=season_store.default_store):
+    """Fingerprint of one season's files in the store"""
+    partition = os.path.join(store, "year=" + str(year))
+    return fingerprint(*[file_hash(os.path.join(partition, name)) for name in sorted(os.listdir(partition))])
+
+
+def read_manifest(output_dir):
+    path = os.path.join(output_dir, default_manifest)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(manifest, output_dir):
+    path = os.path.join(output_dir, default_manifest)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def season_roster(year, store=season_store.default_store):
+    """Read a season from the store and rate it, returning its roster frame
+
+    Seasons imported from formatted workbooks have no stats to rate and keep
+    their stored ratings.
+    """
+    players = rate_seasons.load_players(year, store, from_store=True)
+    if not season_store.roster_only(year, store):
+        ratings.rate_players(players)
+    return rosters.roster_frame(players)
+
+
+def build_season(year, output_dir, store=season_store.default_store, template_file=None, pdf=False,
+                 entry=None, current=None, force=False):
+    """Bring one season's roster workbook and team cards up to date
+
+    entry is the season's manifest entry from the last build and current the
+    versions() of this one. Returns (year, new entry, rosters written,
+    card files written).
+    """
+    entry = {} if force or entry is None else entry
+    current = current or versions(template_file)
+    inputs = dict(current, stats=season_stats(year, store), pdf=pdf)
+    roster_file = os.path.join(output_dir, year + ' rosters formatted.xlsx')
+    card_dir = os.path.join(output_dir, year + ' cards')
+    extension = ".pdf" if pdf else ".xlsx"
+    card_files = [os.path.join(card_dir, team + extension) for team in entry.get("cards", {})]
+    if entry.get("inputs") == inputs and all(map(os.path.exists, [roster_file] + card_files)):
+        return year, entry, 0, 0
+
+    players_short = season_roster(year, store)
+    teams = {team: roster for team, roster in players_short.groupby("Tm", observed=True)}
+
+    # The workbook is rewritten when any team's rows, or the code writing them, changed
+    team_rows = {team: fingerprint(list(roster.itertuples(name=None))) for team, roster in teams.items()}
+    roster_key = fingerprint(team_rows, current["rosters"])
+    rosters_written = 0
+    if roster_key != entry.get("rosters") or not os.path.exists(roster_file):
+        rosters.write_rosters(players_short, year, roster_file)
+        rosters_written = 1
+
+    card_keys = {}
+    cards_written = 0
+    prepared = None
+    if template_file:
+        os.makedirs(card_dir, exist_ok=True)
+        for team, roster in teams.items():
+            card_keys[team] = fingerprint(list(roster[card_columns].itertuples(index=False, name=None)),
+                                          rosters.team_dict.get(team, team), current["cards"], current["template"])
+            card_file = os.path.join(card_dir, team + extension)
+            if card_keys[team] == entry.get("cards", {}).get(team) and os.path.exists(card_file):
+                continue
+            if prepared is None:
+                templates = create_player_cards.load_templates(template_file)
+                prepared = create_player_cards.prepare_cards(templates)
+            create_player_cards.write_team_cards(
+                template_file, card_file,
+                [(team, year, rosters.team_dict.get(team, team), create_player_cards.roster_cards(roster))],
+                templates=templates, prepared=prepared)
+            cards_written += 1
+
+    return year, {"inputs": inputs, "rosters": roster_key, "cards": card_keys}, rosters_written, cards_written
+
+
+def build(years, output_dir, store=season_store.default_store, template_file=None, pdf=False, workers=None,
+          force=False):
+    """Bring the given seasons up to date, one season per worker process, and save the manifest"""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = read_manifest(output_dir)
+    current = versions(template_file)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(build_season, year, output_dir, store, template_file, pdf, manifest.get(year),
+                                   current, force): year for year in years}
+        for future in as_completed(futures):
+            year = futures[future]
+            try:
+                year, manifest[year], rosters_written, cards_written = future.result()
+            except Exception as e:
+                print(f"Error building {year}: {e}")
+                continue
+            results.append((year, rosters_written, cards_written))
+            if rosters_written or cards_written:
+                print(f"{year}: {'roster workbook and ' if rosters_written else ''}{cards_written} card files written")
+    write_manifest(manifest, output_dir)
+    return sorted(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild rosters and cards from the season store where inputs changed")
+    parser.add_argument("years", nargs="*", help="years or ranges, e.g. 1977 or 1950-2020 (all stored seasons by default)")
+    parser.add_argument("--store", default=season_store.default_store, help="season store folder")
+    parser.add_argument("--output-dir", default="../data", help="folder for the roster workbooks and card folders")
+    parser.add_argument("--template", default="../data/Player Cards Template.xlsx", help="card template workbook")
+    parser.add_argument("--no-cards", action="store_true", help="only build the roster workbooks")
+    parser.add_argument("--pdf", action="store_true", help="write the cards as PDF")
+    parser.add_argument("--force", action="store_true", help="rebuild everything")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    args = parser.parse_args()
+
+    template_file = None if args.no_cards else args.template
+    if template_file and not os.path.exists(template_file):
+        print(f"Error: File {template_file} not found!")
+        exit(1)
+
+    years = rate_seasons.parse_years(args.years) if args.years else [str(year) for year in season_store.seasons(args.store)]
+    start = time.perf_counter()
+    results = build(years, args.output_dir, args.store, template_file, args.pdf, args.workers, args.force)
+    skipped = sum(1 for _, rosters_written, cards_written in results if not rosters_written and not cards_written)
+    print(f"\n{len(results)} seasons checked, {skipped} up to date, "
+          f"{sum(result[1] for result in results)} roster workbooks and {sum(result[2] for result in results)} "
+          f"card files written in {time.perf_counter() - start:.1f}s")
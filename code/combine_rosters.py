@@ -1,56 +1,82 @@
-import pandas as pd
+import argparse
 import os
 
-# Load the Excel file
-excel_file = 'data/1977 rosters formatted.xlsx'
+import pandas as pd
+
+import season_store
+
+
+def combine_rosters(excel_file):
+    """Read every team sheet of a formatted roster workbook into one DataFrame"""
+    # Read every sheet in one pass, skipping row 1 and using row 2 as headers
+    sheets = pd.read_excel(excel_file, sheet_name=None, skiprows=1, header=0)
+    print(f"Found {len(sheets)} sheets: {list(sheets)}")
+
+    for sheet_name, df in sheets.items():
+        print(f"  - {sheet_name}: {len(df)} players")
+
+    # Combine all DataFrames
+    return pd.concat(sheets.values(), ignore_index=True)
+
 
-# Check if file exists
-if not os.path.exists(excel_file):
-    print(f"Error: File {excel_file} not found!")
-    exit()
+def write_combined(combined_df, output_file):
+    """Save the combined ratings to a single-sheet workbook"""
+    combined_df.to_excel(output_file, index=False, sheet_name='All Teams')
+    return output_file
 
-# Read all sheet names
-xlsx = pd.ExcelFile(excel_file)
-sheet_names = xlsx.sheet_names
 
-print(f"Found {len(sheet_names)} sheets: {sheet_names}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Combine the team sheets of a formatted roster workbook")
+    parser.add_argument("year", nargs="?", default="1977")
+    parser.add_argument("--store", default=os.path.join('data', 'season store'), help="season store folder")
+    parser.add_argument("--from-store", action="store_true",
+                        help="read the season from the season store instead of the formatted workbook")
+    parser.add_argument("--import", dest="import_store", action="store_true",
+                        help="also save the workbook's rosters to the season store")
+    args = parser.parse_args()
+    year = args.year
+    store = args.store
+    excel_file = 'data/' + year + ' rosters formatted.xlsx'
 
-# List to store all DataFrames
-all_teams = []
+    if args.from_store:
+        if int(year) not in season_store.seasons(store):
+            print(f"Error: {year} is not in the season store {store}")
+            exit()
+        if os.path.exists(excel_file) and os.path.getmtime(excel_file) > os.path.getmtime(
+                os.path.join(store, 'year=' + year)):
+            print(f"Warning: {excel_file} changed since {year} was stored")
+        print(f"Reading {year} from season store: {store}")
+        combined_df = season_store.read_rosters(store, years=[year]).drop(columns=['year'])
+    else:
+        # Check if file exists
+        if not os.path.exists(excel_file):
+            print(f"Error: File {excel_file} not found!")
+            exit()
 
-# Read each sheet, skipping row 1 and using row 2 as headers
-for sheet_name in sheet_names:
-    print(f"Processing sheet: {sheet_name}")
-    
-    # Read the sheet, skip row 0 (first row), use row 1 (second row) as headers
-    df = pd.read_excel(excel_file, sheet_name=sheet_name, skiprows=1, header=0)
-    
-    # Add to the list
-    all_teams.append(df)
-    
-    print(f"  - {sheet_name}: {len(df)} players")
+        combined_df = combine_rosters(excel_file)
 
-# Combine all DataFrames
-combined_df = pd.concat(all_teams, ignore_index=True)
+        if args.import_store:
+            season_store.write_rosters(combined_df, year, store)
+            print(f"Saved {year} to season store: {store}")
 
-print(f"\nCombined data shape: {combined_df.shape}")
-print(f"Total players across all teams: {len(combined_df)}")
+    print(f"\nCombined data shape: {combined_df.shape}")
+    print(f"Total players across all teams: {len(combined_df)}")
 
-# Show the first few rows
-print("\nFirst 5 rows of combined data:")
-print(combined_df.head())
+    # Show the first few rows
+    print("\nFirst 5 rows of combined data:")
+    print(combined_df.head())
 
-# Show column names
-print(f"\nColumns in combined data:")
-print(combined_df.columns.tolist())
+    # Show column names
+    print(f"\nColumns in combined data:")
+    print(combined_df.columns.tolist())
 
-# Save to new Excel file
-output_file = 'data/1977 all ratings.xlsx'
-combined_df.to_excel(output_file, index=False, sheet_name='All Teams')
+    # Save to new Excel file
+    output_file = 'data/' + year + ' all ratings.xlsx'
+    write_combined(combined_df, output_file)
 
-print(f"\nCombined data saved to: {output_file}")
+    print(f"\nCombined data saved to: {output_file}")
 
-# Show summary by team
-print("\nPlayers per team:")
-team_counts = combined_df['Team'].value_counts()
-print(team_counts) 
\ No newline at end of file
+    # Show summary by team
+    print("\nPlayers per team:")
+    team_counts = combined_df['Tm'].value_counts()
+    print(team_counts)
@@ -1,19 +1,27 @@
-import pandas as pd
-
-# Load the data
-df = pd.read_csv('data/1995plays.csv')
-
-# Filter to only include regular season games (exclude lcs, worldseries, allstar)
-df_regular_season = df[~df['gametype'].isin(['lcs', 'worldseries', 'allstar'])]
-
-print(f"Original DataFrame shape: {df.shape}")
-print(f"Regular season DataFrame shape: {df_regular_season.shape}")
-
-# Columns to sum
-columns_to_sum = ['pa', 'ab', 'single', 'double', 'triple', 'hr', 'sh', 'sf', 'hbp', 'walk', 'iw', 'k', 'xi']
-
-# Group by batter and pitcher, then sum the specified columns
-batter_h2h = df_regular_season.groupby(['batter', 'pitcher'])[columns_to_sum].sum().reset_index()
+import glob
+import os
+
+import h2h
+import matchup_index
+import retrosheet
+import split_cube
+
+# Sum by batter and pitcher, only including regular season games (exclude
+# lcs, worldseries, allstar). Retrosheet event files are parsed once into
+# play arrays (see retrosheet.py), which later runs read back directly.
+# Without them the exported play file(s) are streamed in chunks; a glob such
+# as 'data/199*plays.csv' aggregates several seasons at once.
+event_files = 'data/1995eve/*.EV*'
+plays_dir = 'data/1995 plays'
+plays_files = 'data/1995plays.csv'
+if os.path.isdir(plays_dir) or glob.glob(event_files):
+    if not os.path.isdir(plays_dir):
+        retrosheet.build_plays(event_files, plays_dir)
+    batter_h2h = h2h.aggregate_plays(retrosheet.Plays(plays_dir), exclude=['lcs', 'worldseries', 'allstar'])
+    print(f"Play arrays: {plays_dir}")
+else:
+    batter_h2h = h2h.aggregate_h2h(plays_files, exclude=['lcs', 'worldseries', 'allstar'])
+    print(f"Play files: {h2h.expand_paths(plays_files)}")
 
 # Display the results
 print(f"\nBatter-Pitcher head-to-head combinations: {len(batter_h2h)}")
@@ -34,4 +42,12 @@ print(f"\nHead-to-head data saved to: {output_file}")
 # Show some interesting matchups (top 10 by plate appearances)
 print("\nTop 10 matchups by plate appearances:")
 top_matchups = batter_h2h.nlargest(10, 'pa')
-print(top_matchups[['batter', 'pitcher', 'pa', 'ab', 'hr', 'k']]) 
\ No newline at end of file
+print(top_matchups[['batter', 'pitcher', 'pa', 'ab', 'hr', 'k']]) 
+# Index the matchups for instant lookups (see matchup_index.py)
+index_dir = matchup_index.build_index(batter_h2h, 'data/h2h index/1995', seasons=['1995'])
+print(f"\nMatchup index saved to: {index_dir}")
+
+# Platoon, home/away, month and game type splits, all from one pass over the plays (see split_cube.py)
+if os.path.isdir(plays_dir):
+    splits_dir = split_cube.save_cubes(split_cube.build_cubes(retrosheet.Plays(plays_dir)), 'data/1995 splits')
+    print(f"Split cubes saved to: {splits_dir}")
@@ -1,12 +1,21 @@
 import pandas as pd
 import openpyxl
 from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font, Border, Side
+from openpyxl.styles import Alignment, Font, Border, Side, PatternFill
 from openpyxl.utils import get_column_letter
-from openpyxl.cell.cell import MergedCell
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import Cell, MergedCell
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.worksheet.merge import MergedCellRange
+from copy import copy
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
 import re
 import os
 
+import instrument
+import pdf_writer
+
 def extract_year_and_team(a1_value):
     """Extract year and team name from A1 cell value"""
     if pd.isna(a1_value):
@@ -91,7 +100,6 @@ def copy_template_formatting(ws, template_ws, start_row, start_col, is_batter=Tr
             # Copy fill properties individually
             if hasattr(source_cell, 'fill') and source_cell.fill:
                 try:
-                    from openpyxl.styles import PatternFill
                     target_cell.fill = PatternFill(
                         fill_type=source_cell.fill.fill_type,
                         start_color=source_cell.fill.start_color,
@@ -327,179 +335,546 @@ def populate_pitcher_card(ws, start_row, start_col, player_data, year, team):
         cell.value = player_data['PPH']
         cell.alignment = Alignment(horizontal='left', vertical='center')
 
-def create_player_cards(data_file, template_file, output_file):
-    """Main function to create player cards"""
-    # Load template
-    try:
-        template_wb = openpyxl.load_workbook(template_file)
-        batter_template = template_wb['Batter Card Template']
-        pitcher_template = template_wb['Pitcher Card Template']
-        print(f"Successfully loaded templates: {template_file}")
-    except Exception as e:
-        print(f"Error loading template: {e}")
-        return
-    
-    # Load data file
-    data_wb = openpyxl.load_workbook(data_file)
-    
-    # Create output workbook
-    output_wb = Workbook()
-    
-    # Process each team
+# Card fields filled from each player's roster row, by roster column
+batter_fields = {'Player': 'B', 'Primary': 'Q', 'Age': 'C', 'Positions': 'H', 'B': 'L', 'T': 'P',
+                 'DEF': 'I', 'Batter Rating': 'J', 'BPH': 'K'}
+pitcher_fields = {'Player': 'B', 'Primary': 'Q', 'Age': 'C', 'Positions': 'H', 'B': 'L', 'T': 'P',
+                  'DEF': 'I', 'Pitcher Rating': 'M', 'PCN': 'N', 'PPH': 'O'}
+
+# Marks the cells a field ends up in when the prototype card is rendered
+_field_marker = '\ue000'  # Private use character, never in roster data
+
+
+def prepare_card(wb, template_ws, is_batter=True):
+    """Render one card on a scratch sheet and record its cell styles, labels, fields and merges
+
+    The card's styles are registered with wb once here, so stamping a card only
+    copies style IDs instead of building new style objects for every cell.
+    """
+    ws = wb.create_sheet(title='Card Prototype')
+    fields = batter_fields if is_batter else pitcher_fields
+    placeholders = {field: _field_marker + field for field in fields}
+    create_card_structure(ws, template_ws, 1, 1, is_batter)
+    populate = populate_batter_card if is_batter else populate_pitcher_card
+    populate(ws, 1, 1, placeholders, _field_marker + 'year', _field_marker + 'team')
+
+    cells = []
+    for (row, col), cell in sorted(ws._cells.items()):
+        merged = isinstance(cell, MergedCell)
+        value = None if merged else cell.value
+        field = None
+        if isinstance(value, str) and value.startswith(_field_marker):
+            field, value = value[1:], None
+        cells.append((row - 1, col - 1, merged, cell._style, field, value))
+    merges = [(r.min_row - 1, r.min_col - 1, r.max_row - 1, r.max_col - 1) for r in ws.merged_cells.ranges]
+    wb.remove(ws)
+    return {'cells': cells, 'merges': merges}
+
+
+def stamp_card(ws, card, start_row, start_col, values):
+    """Write a prepared card at the given position, filling its fields from values"""
+    for row, col, merged, style, field, value in card['cells']:
+        row += start_row
+        col += start_col
+        if merged:
+            cell = MergedCell(ws, row, col)
+            cell._style = copy(style)
+        else:
+            cell = Cell(ws, row=row, column=col, style_array=copy(style))
+            value = values[field] if field else value
+            if value is not None:
+                cell.value = value
+        ws._cells[row, col] = cell
+
+    # Each merge is added once; the merged cells already carry their borders.
+    # Cards never overlap, so the ranges skip MultiCellRange.add's check
+    # against every merge already on the sheet
+    for min_row, min_col, max_row, max_col in card['merges']:
+        coord = CellRange(min_row=start_row + min_row, min_col=start_col + min_col,
+                          max_row=start_row + max_row, max_col=start_col + max_col).coord
+        ws.merged_cells.ranges.add(MergedCellRange(ws, coord))
+
+
+def _write_only_style(ws, prototype_ws, style, styles):
+    """Return the style IDs of a prepared card style in ws's write-only workbook
+
+    Styles are copied from the prototype workbook the first time they are seen.
+    """
+    key = tuple(style)
+    if key not in styles:
+        source = Cell(prototype_ws, style_array=copy(style))
+        target = WriteOnlyCell(ws)
+        if source.has_style:
+            target.font = copy(source.font)
+            target.fill = copy(source.fill)
+            target.border = copy(source.border)
+            target.alignment = copy(source.alignment)
+            target.number_format = source.number_format
+            target.protection = copy(source.protection)
+        styles[key] = target._style
+    return styles[key]
+
+
+def stream_cards(ws, layouts, cards, year, team, prototype_ws, styles):
+    """Append a team's cards to a write-only sheet, one band of three cards at a time
+
+    Rows must be written in order, so each of a band's 8 rows is assembled from
+    the matching row of its cards before it is appended.
+    """
+    for band in range(0, len(cards), 3):
+        band_cards = cards[band:band + 3]
+        start_row, _ = get_card_position(band)
+        rows = [[None] * 7 * len(band_cards) for _ in range(8)]
+
+        for position, (is_batter, player_data) in enumerate(band_cards):
+            card = layouts[is_batter]
+            values = dict(player_data, year=year, team=team)
+            for row, col, merged, style, field, value in card['cells']:
+                if not merged:
+                    value = values[field] if field else value
+                cell = WriteOnlyCell(ws, value=None if merged else value)
+                cell._style = copy(_write_only_style(ws, prototype_ws, style, styles))
+                rows[row][position * 7 + col] = cell
+
+            for min_row, min_col, max_row, max_col in card['merges']:
+                ws.merged_cells.ranges.add(CellRange(min_row=start_row + min_row, min_col=position * 7 + 1 + min_col,
+                                                     max_row=start_row + max_row, max_col=position * 7 + 1 + max_col))
+
+        for row in rows:
+            ws.append(row)
+
+
+# Card PDF pages: letter, with the card cells (29 pixel columns as set by
+# setup_team_sheet, and Excel's default 15 point rows) scaled so three cards
+# fit across between the margins
+pdf_column_width = 29 * 0.75
+pdf_row_height = 15
+pdf_margin = 36
+
+_pdf_border_widths = {'hair': 0.25, 'medium': 1, 'mediumDashed': 1, 'mediumDashDot': 1,
+                      'mediumDashDotDot': 1, 'slantDashDot': 1, 'thick': 1.5, 'double': 1.5}
+
+
+def _pdf_color(color, default):
+    """PDF "r g b" of an openpyxl color, or default for theme and indexed colors"""
+    if color is not None and color.type == 'rgb' and isinstance(color.rgb, str):
+        return pdf_writer.color(color.rgb)
+    return default
+
+
+def _pdf_text(placement, value):
+    """Content stream showing a card value the way Excel aligns it in its cell"""
+    font, size, color, x, width, y, horizontal = placement
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if horizontal in ('center', 'centerContinuous'):
+        align = 'center'
+    elif horizontal == 'right' or (horizontal in (None, 'general') and isinstance(value, (int, float))):
+        align = 'right'
+    else:
+        align = 'left'
+    return color + pdf_writer.text(font, size, x + 1.5, y, value, align, width - 3)
+
+
+def prepare_pdf_card(pdf, card, prototype_ws):
+    """Draw a prepared card's fills, borders and labels once as a PDF form
+
+    Returns the form's name and, for each field, where and how its text goes.
+    """
+    width, height = 7 * pdf_column_width, 8 * pdf_row_height
+    spans = {(min_row, min_col): (max_row, max_col) for min_row, min_col, max_row, max_col in card['merges']}
+    fills, lines, labels, fields = [], [], [], []
+    for row, col, merged, style, field, value in card['cells']:
+        cell = Cell(prototype_ws, style_array=copy(style))
+        left, top = col * pdf_column_width, height - row * pdf_row_height
+        right, bottom = left + pdf_column_width, top - pdf_row_height
+        if cell.fill.fill_type == 'solid':
+            fills.append(f"{_pdf_color(cell.fill.fgColor, '1 1 1')} rg "
+                         f"{left:.2f} {bottom:.2f} {pdf_column_width:.2f} {pdf_row_height} re f\n")
+        for side, (x0, y0, x1, y1) in (('left', (left, bottom, left, top)), ('right', (right, bottom, right, top)),
+                                       ('top', (left, top, right, top)), ('bottom', (left, bottom, right, bottom))):
+            border = getattr(cell.border, side)
+            if border is not None and border.style:
+                lines.append(f"{_pdf_border_widths.get(border.style, 0.5)} w {_pdf_color(border.color, '0 0 0')} RG "
+                             f"{x0:.2f} {y0:.2f} m {x1:.2f} {y1:.2f} l S\n")
+        if merged or (field is None and value is None):
+            continue
+
+        # Text is placed in the whole merged range the cell starts
+        max_row, max_col = spans.get((row, col), (row, col))
+        box_width = (max_col - col + 1) * pdf_column_width
+        box_height = (max_row - row + 1) * pdf_row_height
+        box_bottom = top - box_height
+        font = cell.font
+        size = font.sz or 11
+        name = pdf_writer.fonts[' '.join(look for look, on in (('bold', font.b), ('italic', font.i)) if on)
+                                or 'regular']
+        if cell.alignment.vertical == 'center':
+            y = box_bottom + (box_height - 0.7 * size) / 2
+        elif cell.alignment.vertical == 'top':
+            y = top - 1 - 0.8 * size
+        else:
+            y = box_bottom + 1 + 0.22 * size
+        placement = ((pdf.font(name), name), size, _pdf_color(font.color, '0 0 0').encode() + b' rg ',
+                     left, box_width, y, cell.alignment.horizontal)
+        if field:
+            fields.append((field, placement))
+        else:
+            labels.append(_pdf_text(placement, value))
+    content = ''.join(fills + lines).encode() + b''.join(labels)
+    return pdf.form(content, width, height), fields
+
+
+def read_team(team_sheet):
+    """Read a team's roster rows into a DataFrame keyed by column letter
+
+    Rows are read with iter_rows, which also works on read-only sheets.
+    """
+    width = team_sheet.max_column or 0
+    data = [list(row) + [None] * (width - len(row))
+            for row in team_sheet.iter_rows(min_row=3, values_only=True)]  # Skip header row (row 2)
+    width = max([width] + [len(row) for row in data])
+    return pd.DataFrame(data, columns=[get_column_letter(col) for col in range(1, width + 1)])
+
+
+def team_cards(df):
+    """Return (is_batter, player_data) for each card of a team, in page order"""
+    # Process batters (non-blank Batter Rating column J)
+    batters = df[df['J'].notna() & (df['J'] != '')]
+    print(f"  Found {len(batters)} batters")
+
+    # Process pitchers (non-blank Pitcher Rating column M)
+    pitchers = df[df['M'].notna() & (df['M'] != '')]
+    print(f"  Found {len(pitchers)} pitchers")
+
+    # Separate only-batters from pitcher-batters
+    only_batters = batters[~batters.index.isin(pitchers.index)]
+    pitcher_batters = batters[batters.index.isin(pitchers.index)]
+
+    print(f"  Found {len(only_batters)} only-batters")
+    print(f"  Found {len(pitcher_batters)} pitcher-batters")
+    print(f"  Found {len(pitchers)} pitchers")
+
+    # Only-batters first, then pitcher-batters (batter cards for players who
+    # also pitch), then pitcher cards
+    cards = []
+    for players, is_batter in ((only_batters, True), (pitcher_batters, True), (pitchers, False)):
+        fields = batter_fields if is_batter else pitcher_fields
+        for _, player in players.iterrows():
+            cards.append((is_batter, {field: player[column] for field, column in fields.items()}))
+    return cards
+
+
+def roster_cards(roster):
+    """Return the cards of one team of a rosters.roster_frame, as team_cards reads them from its sheet"""
+    # The sheet's columns are the ID (the frame's index) followed by the roster columns
+    columns = [get_column_letter(col) for col in range(1, len(roster.columns) + 2)]
+    return team_cards(pd.DataFrame(list(roster.itertuples(name=None)), columns=columns))
+
+
+def setup_team_sheet(output_wb, sheet_name):
+    """Create a team's card sheet without gridlines and with narrow columns"""
+    ws = output_wb.create_sheet(title=sheet_name)
+
+    # Turn off gridlines
+    ws.sheet_view.showGridLines = False
+
+    # Set all column widths to 29 pixels using the correct conversion
+    desired_pixel_width = 29
+    excel_width_unit = desired_pixel_width / 6.1
+    for col in range(1, 50):  # Set width for first 50 columns
+        ws.column_dimensions[get_column_letter(col)].width = excel_width_unit
+    return ws
+
+
+def load_templates(template_file):
+    """Return the batter and pitcher card templates"""
+    template_wb = openpyxl.load_workbook(template_file)
+    return template_wb['Batter Card Template'], template_wb['Pitcher Card Template']
+
+
+def read_card_teams(data_file):
+    """Read the cards of every team sheet in one read-only pass over the roster workbook
+
+    Returns (sheet name, year, team, cards) for each team.
+    """
+    with instrument.stage("cards.read") as record:
+        teams = _read_card_teams(data_file)
+        record["rows"] = sum(len(cards) for _, _, _, cards in teams)
+    return teams
+
+
+def _read_card_teams(data_file):
+    data_wb = openpyxl.load_workbook(data_file, read_only=True)
+    teams = []
     for sheet_name in data_wb.sheetnames:
         if sheet_name == 'TOT':  # Skip total sheet
             continue
-            
+
         print(f"Processing team: {sheet_name}")
-        
-        # Read team data
         team_sheet = data_wb[sheet_name]
-        
+
         # Get year and team name from A1
-        a1_value = team_sheet['A1'].value
+        a1_value = next(team_sheet.iter_rows(max_row=1, max_col=1, values_only=True), (None,))[0]
         year, team = extract_year_and_team(a1_value)
-        
+
         if not year or not team:
             print(f"Warning: Could not extract year/team from A1 for {sheet_name}")
             continue
-        
+
+        teams.append((sheet_name, year, team, team_cards(read_team(team_sheet))))
+    data_wb.close()
+    return teams
+
+
+def prepare_cards(templates):
+    """Prepare the batter and pitcher cards of loaded templates on a scratch workbook
+
+    Returns (scratch workbook, cards by is_batter), which write_team_cards can
+    reuse for every file it writes when streaming or writing PDF.
+    """
+    batter_template, pitcher_template = templates
+    prototype_wb = Workbook()
+    return prototype_wb, {True: prepare_card(prototype_wb, batter_template, is_batter=True),
+                          False: prepare_card(prototype_wb, pitcher_template, is_batter=False)}
+
+
+def write_team_cards(template_file, output_file, teams, streaming=True, templates=None, prepared=None):
+    """Render the cards of the given teams (from read_card_teams) into one workbook, or PDF for a .pdf file
+
+    With streaming the card sheets are written in one pass with openpyxl's
+    write-only mode, so only the team being written is held in memory.
+    templates are the already loaded load_templates sheets and prepared the
+    prepare_cards cards, if any.
+    """
+    with instrument.stage("cards.write", rows=sum(len(cards) for _, _, _, cards in teams)):
+        if output_file.lower().endswith('.pdf'):
+            return _write_team_cards_pdf(template_file, output_file, teams, templates, prepared)
+        return _write_team_cards(template_file, output_file, teams, streaming, templates, prepared)
+
+
+def _write_team_cards_pdf(template_file, output_file, teams, templates, prepared):
+    """Render the cards as PDF pages, each team starting on a new page
+
+    Every card's frame, fills and labels are one form drawn once per card type;
+    a card is that form placed at its get_card_position cell plus its fields'
+    text, and each page is written to disk as soon as it is full.
+    """
+    prototype_wb, layouts = prepared or prepare_cards(templates or load_templates(template_file))
+
+    width, height = pdf_writer.LETTER
+    card_width, card_height = 7 * pdf_column_width, 8 * pdf_row_height
+    scale = (width - 2 * pdf_margin) / (3 * card_width)
+    page_cards = 3 * int((height - 2 * pdf_margin) / (card_height * scale))
+
+    with pdf_writer.PdfWriter(output_file) as pdf:
+        forms = {is_batter: prepare_pdf_card(pdf, layout, prototype_wb.active)
+                 for is_batter, layout in layouts.items()}
+        for sheet_name, year, team, cards in teams:
+            print(f"  Creating {len(cards)} cards for {sheet_name}...")
+            for first in range(0, len(cards), page_cards):
+                content = [b"q %.4f 0 0 %.4f %d %d cm\n" % (scale, scale, pdf_margin, height - pdf_margin)]
+                for card_index, (is_batter, player_data) in enumerate(cards[first:first + page_cards]):
+                    start_row, start_col = get_card_position(card_index, is_batter)
+                    form, fields = forms[is_batter]
+                    content.append(b"q 1 0 0 1 %.2f %.2f cm /%s Do\n" % (
+                        (start_col - 1) * pdf_column_width, -(start_row + 7) * pdf_row_height, form.encode()))
+                    values = dict(player_data, year=year, team=team)
+                    for field, placement in fields:
+                        value = values[field]
+                        if not (value is None or value == '' or pd.isna(value)):
+                            content.append(_pdf_text(placement, value))
+                    content.append(b"Q\n")
+                content.append(b"Q\n")
+                pdf.add_page(b"".join(content))
+    return output_file
+
+
+def _write_team_cards(template_file, output_file, teams, streaming, templates, prepared):
+    # Create output workbook, with the batter and pitcher cards prepared once
+    # (in a separate workbook when streaming, since write-only sheets have no cells)
+    output_wb = Workbook(write_only=streaming)
+    if streaming:
+        prototype_wb, layouts = prepared or prepare_cards(templates or load_templates(template_file))
+    else:
+        batter_template, pitcher_template = templates or load_templates(template_file)
+        prototype_wb = output_wb
+        layouts = {True: prepare_card(prototype_wb, batter_template, is_batter=True),
+                   False: prepare_card(prototype_wb, pitcher_template, is_batter=False)}
+    styles = {}
+
+    for sheet_name, year, team, cards in teams:
         # Create new sheet for this team
-        team_sheet_output = output_wb.create_sheet(title=sheet_name)
-        
-        # Turn off gridlines
-        team_sheet_output.sheet_view.showGridLines = False
-        
-        # Set all column widths to 29 pixels using the correct conversion
-        desired_pixel_width = 29
-        excel_width_unit = desired_pixel_width / 6.1
-        for col in range(1, 50):  # Set width for first 50 columns
-            team_sheet_output.column_dimensions[get_column_letter(col)].width = excel_width_unit
-        
-        # Read data into DataFrame for easier processing
-        data = []
-        for row in range(3, team_sheet.max_row + 1):  # Skip header row (row 2)
-            row_data = {}
-            for col in range(1, team_sheet.max_column + 1):
-                cell_value = team_sheet.cell(row=row, column=col).value
-                row_data[get_column_letter(col)] = cell_value
-            data.append(row_data)
-        
-        df = pd.DataFrame(data)
-        
-        # Process batters (non-blank Batter Rating column J)
-        batters = df[df['J'].notna() & (df['J'] != '')]
-        print(f"  Found {len(batters)} batters")
-        
-        # Process pitchers (non-blank Pitcher Rating column M)
-        pitchers = df[df['M'].notna() & (df['M'] != '')]
-        print(f"  Found {len(pitchers)} pitchers")
-        
-        # Separate only-batters from pitcher-batters
-        only_batters = batters[~batters.index.isin(pitchers.index)]
-        pitcher_batters = batters[batters.index.isin(pitchers.index)]
-        
-        print(f"  Found {len(only_batters)} only-batters")
-        print(f"  Found {len(pitcher_batters)} pitcher-batters")
-        print(f"  Found {len(pitchers)} pitchers")
-        
-        # Create cards in the specified order
-        card_index = 0
-        
-        # 1. Only-batters first
-        print(f"  Creating {len(only_batters)} only-batter cards...")
-        for i, batter in only_batters.iterrows():
-            start_row, start_col = get_card_position(card_index, is_batter=True)
-            
-            # Create card structure with template formatting
-            create_card_structure(team_sheet_output, batter_template, start_row, start_col, is_batter=True)
-            
-            # Populate with data
-            player_data = {
-                'Player': batter['B'],
-                'Primary': batter['Q'],
-                'Age': batter['C'],
-                'Positions': batter['H'],
-                'B': batter['L'],
-                'T': batter['P'],
-                'DEF': batter['I'],
-                'Batter Rating': batter['J'],
-                'BPH': batter['K']
-            }
-            
-            populate_batter_card(team_sheet_output, start_row, start_col, player_data, year, team)
-            card_index += 1
-        
-        # 2. Pitcher-batters (batter cards for players who also pitch)
-        print(f"  Creating {len(pitcher_batters)} pitcher-batter cards...")
-        for i, batter in pitcher_batters.iterrows():
-            start_row, start_col = get_card_position(card_index, is_batter=True)
-            
-            # Create card structure with template formatting
-            create_card_structure(team_sheet_output, batter_template, start_row, start_col, is_batter=True)
-            
-            # Populate with data
-            player_data = {
-                'Player': batter['B'],
-                'Primary': batter['Q'],
-                'Age': batter['C'],
-                'Positions': batter['H'],
-                'B': batter['L'],
-                'T': batter['P'],
-                'DEF': batter['I'],
-                'Batter Rating': batter['J'],
-                'BPH': batter['K']
-            }
-            
-            populate_batter_card(team_sheet_output, start_row, start_col, player_data, year, team)
-            card_index += 1
-        
-        # 3. Pitcher cards (for players with pitcher ratings)
-        print(f"  Creating {len(pitchers)} pitcher cards...")
-        for i, pitcher in pitchers.iterrows():
-            start_row, start_col = get_card_position(card_index, is_batter=False)
-            
-            # Create card structure with template formatting
-            create_card_structure(team_sheet_output, pitcher_template, start_row, start_col, is_batter=False)
-            
-            # Populate with data
-            player_data = {
-                'Player': pitcher['B'],
-                'Primary': pitcher['Q'],
-                'Age': pitcher['C'],
-                'Positions': pitcher['H'],
-                'B': pitcher['L'],
-                'T': pitcher['P'],
-                'DEF': pitcher['I'],
-                'Pitcher Rating': pitcher['M'],
-                'PCN': pitcher['N'],
-                'PPH': pitcher['O']
-            }
-            
-            populate_pitcher_card(team_sheet_output, start_row, start_col, player_data, year, team)
-            card_index += 1
-    
+        team_sheet_output = setup_team_sheet(output_wb, sheet_name)
+
+        print(f"  Creating {len(cards)} cards for {sheet_name}...")
+        if streaming:
+            stream_cards(team_sheet_output, layouts, cards, year, team, prototype_wb.active, styles)
+            continue
+        for card_index, (is_batter, player_data) in enumerate(cards):
+            start_row, start_col = get_card_position(card_index, is_batter)
+            stamp_card(team_sheet_output, layouts[is_batter], start_row, start_col,
+                       dict(player_data, year=year, team=team))
+
     # Remove default sheet
     if 'Sheet' in output_wb.sheetnames:
         output_wb.remove(output_wb['Sheet'])
-    
-    # Save output file
+
     output_wb.save(output_file)
-    print(f"Player cards saved to: {output_file}")
+    return output_file
+
+
+def write_team_workbooks(template_file, team_dir, teams, streaming=True, extension='.xlsx', templates=None,
+                         prepared=None):
+    """Render each of the given teams into its own <team_dir>/<sheet>.xlsx workbook (or .pdf)
+
+    The template is loaded and its cards prepared once for all the teams,
+    unless already loaded templates or prepared cards are given.
+    """
+    templates = templates or load_templates(template_file)
+    prepared = prepared or prepare_cards(templates)
+    return [write_team_cards(template_file, os.path.join(team_dir, team[0] + extension), [team], streaming,
+                             templates, prepared)
+            for team in teams]
+
+
+def create_player_cards(data_file, template_file, output_file, streaming=True, team_dir=None, workers=None,
+                        pdf=False):
+    """Main function to create player cards
+
+    With team_dir, each team's cards are also written to their own
+    <team_dir>/<sheet>.xlsx (.pdf with pdf), with the teams split across
+    worker processes while this process writes output_file (skipped if it is
+    None). An output_file ending in .pdf is written as PDF.
+    """
+    # Load template once, for every file this process writes
+    try:
+        templates = load_templates(template_file)
+        print(f"Successfully loaded templates: {template_file}")
+    except Exception as e:
+        print(f"Error loading template: {e}")
+        return
+
+    # Read every team in one pass over the data file
+    teams = read_card_teams(data_file)
+    if not teams:
+        print(f"No team sheets found in: {data_file}")
+        return
+
+    # The cards are prepared on a scratch workbook when streaming or writing PDF;
+    # otherwise they are prepared on the output workbook itself
+    if streaming or (output_file or '').lower().endswith('.pdf'):
+        prepared = prepare_cards(templates)
+    else:
+        prepared = None
+
+    if team_dir is None:
+        write_team_cards(template_file, output_file, teams, streaming, templates, prepared)
+        print(f"Player cards saved to: {output_file}")
+        return output_file
+
+    os.makedirs(team_dir, exist_ok=True)
+    workers = workers or os.cpu_count()
+    # Each worker loads the template once for its share of the teams (loaded
+    # sheets are not passed between processes)
+    shares = [teams[i::workers] for i in range(workers) if teams[i::workers]]
+    with ProcessPoolExecutor(max_workers=len(shares)) as executor:
+        futures = [executor.submit(write_team_workbooks, template_file, team_dir, share, streaming,
+                                   '.pdf' if pdf else '.xlsx')
+                   for share in shares]
+        if output_file is not None:
+            write_team_cards(template_file, output_file, teams, streaming, templates, prepared)
+            print(f"Player cards saved to: {output_file}")
+        for future in futures:
+            future.result()
+    print(f"Player cards for {len(teams)} teams saved to: {team_dir}")
+    return output_file
+
+
+def _season_cards(data_file, template_file, output_file, profile=False):
+    """Create one season's cards in a worker, returning its instrument report when profiling"""
+    if profile:
+        instrument.enable()
+    create_player_cards(data_file, template_file, output_file)
+    return instrument.report() if profile else None
+
+
+def create_season_cards(data_files, template_file, output_dir, workers=None, profiles=None, pdf=False):
+    """Create the player card workbooks (or PDFs) of several seasons, one season per worker process
+
+    When profiles is a dict, each season's instrument report is added to it by season.
+    """
+    output_files = []
+    seasons = []
+    for data_file in data_files:
+        # "1977 rosters formatted.xlsx" -> "1977 Player Cards.xlsx"
+        season = re.search(r'(19|20)\d{2}', os.path.basename(data_file))
+        season = season.group() if season else os.path.splitext(os.path.basename(data_file))[0]
+        seasons.append(season)
+        output_files.append(os.path.join(output_dir, season + (' Player Cards.pdf' if pdf else ' Player Cards.xlsx')))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_season_cards, data_file, template_file, output_file, profiles is not None):
+                   season for data_file, output_file, season in zip(data_files, output_files, seasons)}
+        for future in as_completed(futures):
+            try:
+                profile = future.result()
+            except Exception as e:
+                print(f"Error creating cards for {futures[future]}: {e}")
+                continue
+            if profiles is not None:
+                profiles[futures[future]] = profile
+    return output_files
+
 
 if __name__ == "__main__":
-    # File paths
-    data_file = "../data/1995 rosters updated formatted v3.xlsx"
-    template_file = "../data/Player Cards Template.xlsx"
-    output_file = "../data/1995 Player Cards v3.xlsx"
-    
+    parser = argparse.ArgumentParser(description="Create player cards from formatted roster workbooks")
+    parser.add_argument("data_files", nargs="*", default=["../data/1995 rosters updated formatted v3.xlsx"],
+                        help="formatted roster workbooks, one per season")
+    parser.add_argument("--template", default="../data/Player Cards Template.xlsx", help="card template workbook")
+    parser.add_argument("--output", help="card workbook for a single season "
+                                         "(default ../data/1995 Player Cards v3.xlsx)")
+    parser.add_argument("--output-dir", default="../data",
+                        help="folder for '<year> Player Cards.xlsx' when several seasons are given")
+    parser.add_argument("--team-dir", help="for a single season, also write one workbook per team to this folder, "
+                                           "in parallel")
+    parser.add_argument("--no-combine", action="store_true", help="with --team-dir, skip the all-teams workbook")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--pdf", action="store_true", help="write PDF card sheets instead of workbooks")
+    parser.add_argument("--profile", action="store_true", help="print the time, memory and rows of each stage")
+    parser.add_argument("--profile-json", help="save the stage profile to this JSON file")
+    parser.add_argument("--trace", help="save the stages as a Chrome trace event file")
+    args = parser.parse_args()
+    profile = args.profile or args.profile_json or args.trace
+    if args.no_combine and not args.team_dir:
+        parser.error("--no-combine needs --team-dir")
+    if len(args.data_files) > 1 and (args.output or args.team_dir):
+        parser.error("--output and --team-dir take a single season; use --output-dir for several")
+
     # Check if files exist
-    if not os.path.exists(data_file):
-        print(f"Error: Data file {data_file} not found!")
-        exit(1)
-    
-    if not os.path.exists(template_file):
-        print(f"Error: Template file {template_file} not found!")
-        exit(1)
-    
+    for path in args.data_files + [args.template]:
+        if not os.path.exists(path):
+            print(f"Error: File {path} not found!")
+            exit(1)
+
     # Create player cards
-    create_player_cards(data_file, template_file, output_file) 
\ No newline at end of file
+    profiles = {} if profile else None
+    if len(args.data_files) > 1:
+        create_season_cards(args.data_files, args.template, args.output_dir, args.workers, profiles, args.pdf)
+    else:
+        if profile:
+            instrument.enable()
+        output_file = args.output or "../data/1995 Player Cards v3.xlsx"
+        output_file = os.path.splitext(output_file)[0] + '.pdf' if args.pdf else output_file
+        create_player_cards(args.data_files[0], args.template, None if args.no_combine else output_file,
+                            team_dir=args.team_dir, workers=args.workers, pdf=args.pdf)
+        if profile:
+            profiles[os.path.basename(args.data_files[0])] = instrument.report()
+
+    if profile:
+        profiles = dict(sorted(profiles.items()))
+        if args.profile:
+            instrument.print_breakdown(profiles)
+        if args.profile_json:
+            instrument.write_json(profiles, args.profile_json)
+        if args.trace:
+            instrument.write_trace(profiles, args.trace)
@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+import xlsxwriter
+
+import simulate
+
+# Fast Action Charts of plate appearance probabilities for every batter and
+# pitcher of a rated season.
+#
+# The probabilities follow the card reading of simulate.py: each card's
+# [bb-k/hbp] block and probable hit number count its outcomes among the 36
+# rolls, a matchup averages the batter's and the pitcher's card, and hits are
+# split by the batter's HR and triple numbers moved by the pitcher's gopher
+# rating. Every pairing is computed at once by broadcasting the batter arrays
+# against the pitcher arrays, giving one (outcomes x batters x pitchers)
+# matrix that is cached as .npy files next to the player IDs, names and teams:
+#   probabilities.npy           float32, outcomes x batters x pitchers
+#   batters.npy, pitchers.npy   player IDs (rows and columns of the matrix)
+#   batter_info.npy, pitcher_info.npy
+#                               name, team and rating of each player
+#   chart.json                  outcomes, year and the roster file it came from
+# Charts are rendered from the cache, so they can be re-written without
+# reading the rosters or recomputing the matrix.
+
+default_cache_dir = os.path.join('..', 'data', 'fast action')
+
+outcomes = ["hit", "bb", "k", "hbp", "hr", "3b", "2b", "1b", "out"]
+
+# Outcomes shown on the charts, and their labels
+chart_outcomes = {"hit": "Hit", "bb": "BB", "k": "K", "hbp": "HBP", "hr": "HR", "3b": "3B"}
+
+
+def _card_counts(cards):
+    """Rolls (of 36) that give a walk, strikeout, HBP and hit on each card"""
+    walk = cards["bb"].astype(np.float32)
+    strikeout = cards["k"] - walk
+    hit_batsman = cards["hbp"] - cards["k"].astype(np.float32)
+    # A hit needs a roll of at least the probable hit number above the HBP range
+    hit = np.clip(37 - np.maximum(cards["ph"], cards["hbp"] + 1), 0, 36).astype(np.float32)
+    return walk, strikeout, hit_batsman, hit
+
+
+def card_probabilities(batters, pitchers):
+    """Return an (outcomes x batters x pitchers) float32 array of plate appearance probabilities
+
+    batters and pitchers are parsed cards from simulate.parse_batters and
+    simulate.parse_pitchers.
+    """
+    # Half the rolls are read from each card
+    bb, k, hbp, hit = [(b[:, None] + p[None, :]) / 72 for b, p in zip(_card_counts(batters), _card_counts(pitchers))]
+
+    gopher = 2 * pitchers["gopher"][None, :].astype(np.int16)
+    home_run = np.clip(batters["hr"][:, None] + gopher, 0, 36)
+    triple = np.clip(batters["triple"][:, None] + gopher, 0, 36)
+    double = 36 - np.maximum(triple, 36 - simulate.DOUBLE_OUTCOMES)
+    single = 36 - triple - double
+
+    probabilities = np.empty((len(outcomes), len(bb), bb.shape[1]), dtype=np.float32)
+    probabilities[outcomes.index("hit")] = hit
+    probabilities[outcomes.index("bb")] = bb
+    probabilities[outcomes.index("k")] = k
+    probabilities[outcomes.index("hbp")] = hbp
+    probabilities[outcomes.index("hr")] = hit * home_run / 36
+    probabilities[outcomes.index("3b")] = hit * (triple - home_run) / 36
+    probabilities[outcomes.index("2b")] = hit * double / 36
+    probabilities[outcomes.index("1b")] = hit * single / 36
+    probabilities[outcomes.index("out")] = 1 - hit - bb - k - hbp
+    return probabilities
+
+
+def _info(roster, rating_column):
+    return np.asarray(roster[["Name", "Tm", rating_column]].astype(str).to_numpy(), dtype=str)
+
+
+def season_year(roster_file):
+    """Return the year in a "<year> rosters formatted.xlsx" file name"""
+    match = re.search(r"\d{4}", os.path.basename(roster_file))
+    if match is None:
+        raise ValueError(f"no year in {roster_file}")
+    return match.group()
+
+
+def _source(roster_file):
+    stat = os.stat(roster_file)
+    return {"file": os.path.abspath(roster_file), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def build_chart(roster_file, cache_dir=default_cache_dir):
+    """Compute the probability matrix of a formatted roster workbook and cache it"""
+    roster = simulate.read_roster(roster_file)
+    roster = roster[roster["Tm"] != "TOT"].reset_index(drop=True)
+    batters = simulate.parse_batters(roster["Batter Rating"], roster["BPH"])
+    pitchers = simulate.parse_pitchers(roster["Pitcher Rating"], roster["PPH"], roster["PCN"])
+    batter_rows = np.flatnonzero(batters["rated"])
+    pitcher_rows = np.flatnonzero(pitchers["rated"])
+    probabilities = card_probabilities({name: values[batter_rows] for name, values in batters.items()},
+                                       {name: values[pitcher_rows] for name, values in pitchers.items()})
+
+    year = season_year(roster_file)
+    chart_dir = os.path.join(cache_dir, year)
+    os.makedirs(chart_dir, exist_ok=True)
+    arrays = {
+        "probabilities": probabilities,
+        "batters": np.asarray(roster["ID"].to_numpy()[batter_rows], dtype=str),
+        "pitchers": np.asarray(roster["ID"].to_numpy()[pitcher_rows], dtype=str),
+        "batter_info": _info(roster.iloc[batter_rows], "Batter Rating"),
+        "pitcher_info": _info(roster.iloc[pitcher_rows], "Pitcher Rating"),
+    }
+    for name, values in arrays.items():
+        np.save(os.path.join(chart_dir, name + ".npy"), values)
+    with open(os.path.join(chart_dir, "chart.json"), "w") as f:
+        json.dump({"outcomes": outcomes, "year": year, "source": _source(roster_file)}, f)
+    return chart_dir
+
+
+class FastActionChart:
+    def __init__(self, chart_dir):
+        """Open a cached chart built by build_chart"""
+        self.chart_dir = chart_dir
+        with open(os.path.join(chart_dir, "chart.json")) as f:
+            meta = json.load(f)
+        self.outcomes = meta["outcomes"]
+        self.year = meta["year"]
+        self.source = meta["source"]
+        for name in ("probabilities", "batters", "pitchers", "batter_info", "pitcher_info"):
+            setattr(self, name, np.load(os.path.join(chart_dir, name + ".npy"), mmap_mode="r"))
+
+    def is_current(self, roster_file):
+        """Whether the chart was built from this roster file as it is now"""
+        return self.source == _source(roster_file)
+
+    def matchup(self, batter, pitcher):
+        """Return a batter's outcome probabilities against a pitcher as a dict"""
+        b = np.flatnonzero(self.batters == batter)
+        p = np.flatnonzero(self.pitchers == pitcher)
+        if len(b) == 0 or len(p) == 0:
+            return None
+        return dict(zip(self.outcomes, self.probabilities[:, b[0], p[0]].tolist()))
+
+
+def load_chart(roster_file, cache_dir=default_cache_dir, refresh=False):
+    """Open the cached chart of a roster workbook, building it first if it is missing or stale"""
+    chart_dir = os.path.join(cache_dir, season_year(roster_file))
+    if not refresh and os.path.exists(os.path.join(chart_dir, "chart.json")):
+        chart = FastActionChart(chart_dir)
+        if chart.is_current(roster_file):
+            return chart
+    return FastActionChart(build_chart(roster_file, cache_dir))
+
+
+def write_charts(chart, output_file, teams=None):
+    """Write one sheet per team: the team's batters against every other team's pitchers
+
+    Each batter has a row per charted outcome, with probabilities in percent.
+    teams limits the sheets written (all teams by default).
+    """
+    batter_teams = chart.batter_info[:, 1]
+    pitcher_teams = chart.pitcher_info[:, 1]
+    shown = [chart.outcomes.index(outcome) for outcome in chart_outcomes]
+
+    # constant_memory streams each row to disk as it is written
+    wb = xlsxwriter.Workbook(output_file, {"constant_memory": True})
+    header = wb.add_format({"bold": True, "align": "center", "text_wrap": True})
+    name_format = wb.add_format({"bold": True})
+    percent = wb.add_format({"num_format": "0.0"})
+    for team in teams or np.unique(batter_teams).tolist():
+        ws = wb.add_worksheet(team)
+        batters = np.flatnonzero(batter_teams == team)
+        pitchers = np.flatnonzero(pitcher_teams != team)
+        pitchers = pitchers[np.lexsort((chart.pitcher_info[pitchers, 0], pitcher_teams[pitchers]))]
+
+        ws.write_row(0, 0, [f"{chart.year} {team}", "", ""], header)
+        ws.write_row(0, 3, chart.pitcher_info[pitchers, 0].tolist(), header)
+        ws.write_row(1, 0, ["Batter", "Rating", "Outcome"], header)
+        ws.write_row(1, 3, [f"{t} {rating}" for t, rating in chart.pitcher_info[pitchers][:, 1:]], header)
+        values = np.round(100 * chart.probabilities[np.ix_(shown, batters, pitchers)], 1)
+
+        row = 2
+        for i, batter in enumerate(batters):
+            name, _, rating = chart.batter_info[batter]
+            for j, label in enumerate(chart_outcomes.values()):
+                ws.write_row(row, 0, [name if j == 0 else "", rating if j == 0 else ""], name_format)
+                ws.write(row, 2, label)
+                ws.write_row(row, 3, values[j, i].tolist(), percent)
+                row += 1
+        ws.set_column(0, 0, 20)
+        ws.set_column(1, 1, 16)
+        ws.set_column(3, 2 + len(pitchers), 9)
+        ws.freeze_panes(2, 3)
+    wb.close()
+    return output_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build Fast Action Charts of batter vs pitcher probabilities")
+    parser.add_argument("roster", help='formatted roster workbook, e.g. "../data/1977 rosters  formatted.xlsx"')
+    parser.add_argument("--cache-dir", default=default_cache_dir, help="folder holding the cached matrices")
+    parser.add_argument("--refresh", action="store_true", help="recompute the matrix even if it is cached")
+    parser.add_argument("--output", help="chart workbook (default ../data/Fast Action Chart Probs <year>.xlsx)")
+    parser.add_argument("--teams", nargs="*", help="teams to write charts for (all teams if omitted)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    chart = load_chart(args.roster, args.cache_dir, args.refresh)
+    _, n_batters, n_pitchers = chart.probabilities.shape
+    print(f"{n_batters} batters x {n_pitchers} pitchers in {time.perf_counter() - start:.2f} s ({chart.chart_dir})")
+
+    start = time.perf_counter()
+    output_file = args.output or os.path.join("..", "data", f"Fast Action Chart Probs {chart.year}.xlsx")
+    write_charts(chart, output_file, args.teams)
+    print(f"Charts saved to: {output_file} in {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,133 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+import instrument
+
+# Rate-limited HTTP fetching for the scrapers.
+#
+# Requests to each host draw from a token bucket (baseball-reference.com asks
+# for no more than 20 requests a minute) and are capped at a few in flight at
+# once. The bucket is per process, so several processes scraping at once must
+# split default_rate between them (rate_seasons does). 429 and 5xx responses
+# are retried with exponential backoff, honouring Retry-After when the server
+# sends it; a 429 also pauses the host's bucket for every thread. Every URL is fetched through fetch(),
+# so pointing the scraper's base URLs at a local stub server exercises the
+# same code path.
+
+retry_statuses = {429, 500, 502, 503, 504}
+
+# Requests per second to one host
+default_rate = 20 / 60
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=1):
+        """Allow `rate` acquisitions per second on average, bursting up to `capacity`"""
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and the bucket is not paused"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                paused = now < self._paused_until
+                if paused:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                    self._last = now
+                    # Take the token now (possibly going negative) so waiters queue in order
+                    self._tokens -= 1
+                    wait = -self._tokens / self.rate if self._tokens < 0 else 0
+            if wait:
+                time.sleep(wait)
+            # A token whose wait ran into a pause is given up, and a new one taken after it
+            if not paused and time.monotonic() >= self._paused_until:
+                return
+
+    def pause(self, seconds):
+        """Hand out no tokens for the next seconds, e.g. after a 429 with Retry-After"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # Waiters queued before the pause take new tokens after it, starting from one
+            self._tokens = min(self.capacity, 1)
+            self._last = self._paused_until
+
+
+class Fetcher:
+    def __init__(self, rate=default_rate, burst=1, per_host=2, retries=4, backoff=2.0, timeout=30):
+        """Fetch pages with per-host rate limits, concurrency caps and retries"""
+        self.rate = rate
+        self.burst = burst
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.requests = 0
+        self.retried = 0
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _host(self, url):
+        """Return the token bucket and concurrency slots for a URL's host"""
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (TokenBucket(self.rate, self.burst), threading.Semaphore(self.per_host))
+            return self._hosts[host]
+
+    def _session(self):
+        # requests sessions are not thread-safe, so each thread keeps its own
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.session()
+        return self._local.session
+
+    def _delay(self, res, attempt):
+        """Seconds to wait before the next attempt"""
+        retry_after = res.headers.get('Retry-After', '') if res is not None else ''
+        if retry_after.isdigit():
+            return int(retry_after)
+        return self.backoff * 2 ** attempt
+
+    def fetch(self, url):
+        """Return the text of a page, retrying on rate limits and server errors"""
+        bucket, slots = self._host(url)
+        for attempt in range(self.retries + 1):
+            res = None
+            try:
+                with slots:
+                    bucket.acquire()
+                    with self._lock:
+                        self.requests += 1
+                    instrument.count('fetch.requests')
+                    res = self._session().get(url, headers=dict(referer=url), timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            else:
+                if res.status_code not in retry_statuses or attempt == self.retries:
+                    res.raise_for_status()
+                    return res.text
+            with self._lock:
+                self.retried += 1
+            instrument.count('fetch.retries')
+            delay = self._delay(res, attempt)
+            if res is not None and res.status_code == 429:
+                bucket.pause(delay)
+            time.sleep(delay)
+
+
+def fetch_pages(urls, cache, workers=8):
+    """Return a dict of page text by URL, fetching uncached pages concurrently"""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(urls, executor.map(cache.get, urls)))
@@ -0,0 +1,141 @@
+import glob
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import instrument
+
+# Streaming batter vs pitcher aggregation over play-by-play files.
+#
+# Only the key and count columns are read, in chunks, with compact dtypes
+# (categorical IDs, int8 counts, or float32 when a file has blank counts).
+# Batter and pitcher IDs are interned to integers so each chunk reduces to
+# one int64 key per play. Chunk sums are
+# merged into the running totals with a sort and np.add.reduceat. Memory is
+# bounded by the number of distinct matchups, not by the size of the input.
+# aggregate_plays does the same over play arrays parsed from Retrosheet event
+# files by retrosheet.py, without reading any CSV.
+
+columns_to_sum = ['pa', 'ab', 'single', 'double', 'triple', 'hr', 'sh', 'sf', 'hbp', 'walk', 'iw', 'k', 'xi']
+
+# Postseason and All-Star games are left out of the totals
+postseason_gametypes = ['wildcard', 'divisionseries', 'lcs', 'worldseries', 'allstar']
+
+
+class IdTable:
+    """Interns player IDs as consecutive integer codes"""
+
+    def __init__(self):
+        self.ids = []
+        self._codes = {}
+
+    def codes(self, values):
+        """Return the integer code of each value of a categorical column"""
+        categories = values.cat.categories
+        mapping = np.empty(len(categories) + 1, dtype=np.int64)
+        for i, player in enumerate(categories):
+            code = self._codes.get(player)
+            if code is None:
+                code = self._codes[player] = len(self.ids)
+                self.ids.append(player)
+            mapping[i] = code
+        mapping[-1] = -1  # Missing IDs (categorical code -1)
+        return mapping[values.cat.codes.to_numpy()]
+
+
+def sum_by_key(keys, sums):
+    """Sum rows that share a key, returning sorted unique keys and their sums"""
+    if len(keys) == 0:
+        return keys, sums
+    # Stable sort is a timsort here, which is linear on already sorted runs
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.add.reduceat(sums[order], starts, axis=0)
+
+
+def expand_paths(paths):
+    """Expand file names and glob patterns into a sorted list of files"""
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(path)) or [path])
+    return files
+
+
+def _file_sums(path, batters, pitchers, exclude, columns, count_dtype, chunksize):
+    """Stream one play file and return its sorted matchup keys and sums, and the plays read"""
+    keys = np.empty(0, dtype=np.int64)
+    sums = np.empty((0, len(columns)), dtype=np.int32)
+    plays = 0
+    dtypes = {'batter': 'category', 'pitcher': 'category', 'gametype': 'category'}
+    dtypes.update({column: count_dtype for column in columns})
+
+    reader = pd.read_csv(path, usecols=['batter', 'pitcher', 'gametype'] + list(columns),
+                         dtype=dtypes, chunksize=chunksize)
+    for chunk in reader:
+        if exclude:
+            chunk = chunk[~chunk['gametype'].isin(exclude)]
+        batter = batters.codes(chunk['batter'])
+        pitcher = pitchers.codes(chunk['pitcher'])
+        # groupby drops plays with a missing batter or pitcher
+        keep = (batter >= 0) & (pitcher >= 0)
+        chunk_keys = (batter[keep] << 32) | pitcher[keep]
+        counts = np.nan_to_num(chunk[list(columns)].to_numpy()).astype(np.int32)[keep]
+        plays += len(chunk)
+
+        chunk_keys, chunk_sums = sum_by_key(chunk_keys, counts)
+        keys, sums = sum_by_key(np.concatenate([keys, chunk_keys]), np.concatenate([sums, chunk_sums]))
+    return keys, sums, plays
+
+
+def aggregate_h2h(paths, exclude=postseason_gametypes, columns=columns_to_sum, chunksize=500_000):
+    """Sum the count columns by batter and pitcher over one or more play files"""
+    batters = IdTable()
+    pitchers = IdTable()
+    keys = np.empty(0, dtype=np.int64)
+    sums = np.empty((0, len(columns)), dtype=np.int32)
+
+    for path in expand_paths(paths):
+        with instrument.stage("h2h.read") as record:
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', RuntimeWarning)
+                    file_keys, file_sums, plays = _file_sums(path, batters, pitchers, exclude, columns, 'int8',
+                                                             chunksize)
+            except ValueError:
+                # Blank counts cannot be read as int8, so reread this file as float32
+                file_keys, file_sums, plays = _file_sums(path, batters, pitchers, exclude, columns, 'float32',
+                                                         chunksize)
+            keys, sums = sum_by_key(np.concatenate([keys, file_keys]), np.concatenate([sums, file_sums]))
+            record["rows"] = plays
+
+    with instrument.stage("h2h.frame", rows=len(keys)):
+        batter_h2h = pd.DataFrame(sums, columns=list(columns))
+        batter_h2h.insert(0, 'pitcher', np.array(pitchers.ids, dtype=object)[keys & 0xFFFFFFFF])
+        batter_h2h.insert(0, 'batter', np.array(batters.ids, dtype=object)[keys >> 32])
+        return batter_h2h.sort_values(['batter', 'pitcher'], ignore_index=True)
+
+
+def aggregate_plays(plays, exclude=postseason_gametypes, columns=columns_to_sum):
+    """Sum the count columns by batter and pitcher over a retrosheet.Plays"""
+    with instrument.stage("h2h.plays", rows=len(plays)):
+        batter = np.asarray(plays.batter, dtype=np.int64)
+        pitcher = np.asarray(plays.pitcher, dtype=np.int64)
+        keep = (batter >= 0) & (pitcher >= 0)
+        if exclude:
+            excluded = [plays.gametypes.index(gametype) for gametype in exclude if gametype in plays.gametypes]
+            keep &= ~np.isin(plays.gametype, excluded)
+        counts = plays.counts(list(columns))
+        # Plays that are not plate appearances (stolen bases, wild pitches) add nothing
+        keep &= counts.any(axis=1)
+        keys, sums = sum_by_key((batter[keep] << 32) | pitcher[keep], counts[keep].astype(np.int32))
+
+    with instrument.stage("h2h.frame", rows=len(keys)):
+        ids = plays.players.astype(object)
+        batter_h2h = pd.DataFrame(sums, columns=list(columns))
+        batter_h2h.insert(0, 'pitcher', ids[keys & 0xFFFFFFFF])
+        batter_h2h.insert(0, 'batter', ids[keys >> 32])
+        return batter_h2h.sort_values(['batter', 'pitcher'], ignore_index=True)
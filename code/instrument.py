@@ -0,0 +1,254 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Opt-in per-stage instrumentation of the rating pipeline.
+#
+# Code marks its stages with
+#     with instrument.stage("rate.batters", rows=len(players)):
+# and counts events such as fetches and cache hits with instrument.count().
+# Nothing is recorded until enable() is called, so when profiling is off a
+# stage costs one check. Each stage records its wall and CPU seconds, the
+# process's peak RSS when it ended and the rows it handled. A report() is a
+# plain dict that can be returned from worker processes. A stage is keyed by
+# its path of enclosing stages (e.g. "cards_pdf/cards.read"), so the same step
+# run under different parents is totalled and compared separately. Reports of
+# several seasons are printed side by side with print_breakdown, with the time per row
+# and any stage slower than its row count predicts (from the other seasons or
+# an earlier run), and saved as JSON or as Chrome trace events
+# (chrome://tracing or https://ui.perfetto.dev).
+
+_enabled = False
+_started = 0.0
+_stages = []
+_counters = Counter()
+_path = []
+_lock = threading.Lock()
+
+
+def _reset_peak_rss():
+    # Linux resets the peak RSS reported in /proc/self/status on request
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    """Return the peak resident memory of this process in MB, or None if unknown"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+
+def enable():
+    """Start recording stages and counters, dropping anything recorded before"""
+    global _enabled, _started
+    _stages.clear()
+    _counters.clear()
+    _path.clear()
+    _reset_peak_rss()
+    _started = time.perf_counter()
+    _enabled = True
+
+
+def disable():
+    """Stop recording (what was recorded stays in report())"""
+    global _enabled
+    _enabled = False
+
+
+def enabled():
+    return _enabled
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Record the time, peak memory and rows of the code in the with block
+
+    Yields the stage record, so rows can be set once they are known:
+        with instrument.stage("scrape.merge") as record:
+            players = merge_players(...)
+            record["rows"] = len(players)
+    """
+    record = {"name": name, "rows": rows}
+    if not _enabled:
+        yield record
+        return
+
+    record["path"] = "/".join(_path + [name])
+    record["depth"] = len(_path)
+    _path.append(name)
+    start, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        _path.pop()
+        record["start"] = start - _started
+        record["wall"] = time.perf_counter() - start
+        record["cpu"] = time.process_time() - cpu
+        record["peak_rss_mb"] = peak_rss_mb()
+        _stages.append(record)
+
+
+def count(name, n=1):
+    """Add n to a counter such as fetch.requests or cache.hits"""
+    if _enabled:
+        with _lock:
+            _counters[name] += n
+
+
+def report():
+    """Return the recorded stages (in the order they started) and counters"""
+    stages = sorted(_stages, key=lambda record: record["start"])
+    return {"pid": os.getpid(), "wall": time.perf_counter() - _started if _enabled else None,
+            "peak_rss_mb": peak_rss_mb(), "stages": stages, "counters": dict(_counters)}
+
+
+def _stage_path(record):
+    # Reports saved before stages had paths only have their names
+    return record.get("path", record["name"])
+
+
+def summarize(profile):
+    """Total the stages of one report by path: calls, rows, wall and CPU seconds and peak RSS"""
+    totals = {}
+    for record in profile["stages"]:
+        total = totals.setdefault(_stage_path(record), {"name": record["name"], "calls": 0, "rows": 0, "wall": 0.0,
+                                                        "cpu": 0.0, "peak_rss_mb": None, "depth": record["depth"]})
+        total["calls"] += 1
+        total["rows"] += record["rows"] or 0
+        total["wall"] += record["wall"]
+        total["cpu"] += record["cpu"]
+        if record["peak_rss_mb"] is not None:
+            total["peak_rss_mb"] = max(total["peak_rss_mb"] or 0, record["peak_rss_mb"])
+        total["depth"] = min(total["depth"], record["depth"])
+    return totals
+
+
+def _per_row(total):
+    return 1e6 * total["wall"] / total["rows"] if total["rows"] else None
+
+
+def _expected(points, rows):
+    """Seconds expected for rows from a least squares line through (rows, seconds) points"""
+    if len({x for x, _ in points}) < 2:
+        return None
+    x = [x for x, _ in points]
+    y = [y for _, y in points]
+    mean_x, mean_y = sum(x) / len(x), sum(y) / len(y)
+    slope = sum((a - mean_x) * (b - mean_y) for a, b in points) / sum((a - mean_x) ** 2 for a in x)
+    return max(mean_y + slope * (rows - mean_x), min(y))
+
+
+def compare(profiles, baseline=None, threshold=1.5, min_seconds=0.05):
+    """Return (stage path, label, seconds, expected seconds) for stages that ran slow for their size
+
+    A stage is checked against the same label (e.g. season) in baseline, a
+    dict of labelled reports from an earlier run, scaled by rows. Without one,
+    it is checked against a straight line of time against rows through the
+    other labels, so a large season is not taken for a regression next to a
+    small one. Stages within min_seconds of the expected time are not flagged.
+    """
+    totals = {label: summarize(profile) for label, profile in profiles.items()}
+    base = {label: summarize(profile) for label, profile in (baseline or {}).items()}
+    slow = []
+    for path in {path for stages in totals.values() for path in stages}:
+        ran = {label: stages[path] for label, stages in totals.items() if path in stages and stages[path]["rows"]}
+        for label, total in ran.items():
+            before = base.get(label, {}).get(path)
+            if before is not None and before["rows"]:
+                expected = before["wall"] * total["rows"] / before["rows"]
+            else:
+                expected = _expected([(other["rows"], other["wall"]) for other_label, other in ran.items()
+                                      if other_label != label], total["rows"])
+            if expected is not None and total["wall"] > max(threshold * expected, expected + min_seconds):
+                slow.append((path, label, total["wall"], expected))
+    return sorted(slow)
+
+
+def print_breakdown(profiles, baseline=None, threshold=1.5):
+    """Print the stage breakdown of one or more labelled reports, e.g. one per season"""
+    totals = {label: summarize(profile) for label, profile in profiles.items()}
+    paths = []
+    for stages in totals.values():
+        paths.extend(path for path in stages if path not in paths)
+
+    for label, stages in totals.items():
+        profile = profiles[label]
+        print(f"\n{label}" + (f"  peak RSS {profile['peak_rss_mb']:.0f} MB" if profile["peak_rss_mb"] else ""))
+        print(f"  {'Stage':<28} {'Calls':>6} {'Rows':>9} {'Wall s':>9} {'CPU s':>9} {'us/row':>9} {'Peak MB':>8}")
+        for path in paths:
+            if path not in stages:
+                continue
+            total = stages[path]
+            cost = _per_row(total)
+            peak = total["peak_rss_mb"]
+            print(f"  {'  ' * total['depth'] + total['name']:<28} {total['calls']:>6} {total['rows']:>9} "
+                  f"{total['wall']:>9.3f} {total['cpu']:>9.3f} {'' if cost is None else f'{cost:.1f}':>9} "
+                  f"{'' if peak is None else f'{peak:.0f}':>8}")
+        for counter, value in sorted(profile["counters"].items()):
+            print(f"  {counter:<28} {value:>6}")
+
+    slow = compare(profiles, baseline, threshold)
+    if slow:
+        print(f"\nStages over {threshold:g}x the time expected for their rows:")
+        for path, label, seconds, expected in slow:
+            print(f"  {label:<8} {path:<28} {seconds:.3f} s vs {expected:.3f} s")
+
+
+def trace_events(profiles):
+    """Return the stages of labelled reports as Chrome trace events, one process row per label
+
+    Each event is named by its stage path, so the trace viewer's totals keep
+    a step under different parents apart.
+    """
+    events = []
+    for pid, (label, profile) in enumerate(profiles.items(), start=1):
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": str(label)}})
+        for record in profile["stages"]:
+            events.append({"name": _stage_path(record), "ph": "X", "pid": pid, "tid": record["depth"],
+                           "ts": record["start"] * 1e6, "dur": record["wall"] * 1e6,
+                           "args": {key: record[key] for key in ("rows", "cpu", "peak_rss_mb")}})
+        end = max((record["start"] + record["wall"] for record in profile["stages"]), default=0)
+        for counter, value in profile["counters"].items():
+            events.append({"name": counter, "ph": "C", "pid": pid, "ts": end * 1e6, "args": {counter: value}})
+    return events
+
+
+def write_json(profiles, output_file):
+    """Save labelled reports as JSON (the baseline format of print_breakdown)"""
+    with open(output_file, 'w') as f:
+        json.dump(profiles, f, indent=1)
+    return output_file
+
+
+def read_json(input_file):
+    with open(input_file) as f:
+        return json.load(f)
+
+
+def write_trace(profiles, output_file):
+    """Save labelled reports as a Chrome trace event file"""
+    with open(output_file, 'w') as f:
+        json.dump({"traceEvents": trace_events(profiles), "displayTimeUnit": "ms"}, f)
+    return output_file
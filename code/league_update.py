@@ -0,0 +1,304 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import create_player_cards
+import rating_service
+import rosters
+
+# Re-rate a replay league in season from its own game logs.
+#
+# A league folder keeps running totals per player and team (totals.<n>.npy, one
+# row per player and one column per total_columns entry) and league.json with
+# the players, their last ratings, how far each game log has been read, a
+# fingerprint of every team's roster rows and cards and the name of the totals
+# file. Each save writes the totals to a new file and then replaces
+# league.json, so the totals and the log offsets always change together: a
+# crash in between leaves the previous totals and offsets. Each update reads only the
+# records appended to the logs since the last one, adds them to the totals,
+# re-rates the players whose totals changed, and rewrites only the team roster
+# sheets (<league>/rosters/<Tm>.xlsx) and cards (<league>/cards/<Tm>.xlsx)
+# whose rows or cards actually changed. With --pdf both are written as PDF,
+# which is several times faster to regenerate than the workbooks.
+#
+# A game log is a CSV with one row per player per game: player_id (or Name),
+# Name, Tm, Pos (the position played: P, C, 1B ... RF, DH, PH or PR), the
+# counting stats in log_columns (missing ones count as 0), with IP written in
+# thirds (6.2) and, optionally, Age, Bats and Throws.
+#
+#   python league_update.py "../data/my league" "../data/my league logs.csv" --year 2026
+
+batting_stats = ["PA", "AB", "H_bat", "2B", "3B", "HR_bat", "RBI", "SB", "BB_bat", "SO_bat", "HBP_bat"]
+pitching_stats = ["GS", "GF", "BF", "H_pit", "HR_pit", "BB_pit", "SO_pit", "HBP_pit", "WP"]
+fielding_stats = ["PO", "A", "E", "SB_cat", "CS_cat"]
+log_columns = batting_stats + ["IP"] + pitching_stats + fielding_stats
+
+games = ["G_bat", "G_pit", "G_app", "G_cat"]
+appearances = ["P", "C", "1B", "2B_app", "3B_app", "SS", "LF", "CF", "RF", "DH", "PH", "PR"]
+fielding_positions = ["P", "C", "1B", "2B", "3B", "SS", "LF", "CF", "RF"]
+total_columns = games + batting_stats + ["outs"] + pitching_stats + fielding_stats + appearances
+
+_column = {column: i for i, column in enumerate(total_columns)}
+_appearance = {position: position + "_app" if position in ("2B", "3B") else position
+               for position in fielding_positions + ["DH", "PH", "PR"]}
+
+
+def _hash(rows):
+    return hashlib.sha1(repr(rows).encode()).hexdigest()
+
+
+class League:
+    def __init__(self, league_dir, year=None):
+        """Open the league in league_dir, or start an empty one for year"""
+        self.league_dir = league_dir
+        self._state_file = os.path.join(league_dir, "league.json")
+        if os.path.exists(self._state_file):
+            with open(self._state_file) as f:
+                state = json.load(f)
+            if state["columns"] != total_columns:
+                raise ValueError(f"{league_dir} was built with other total columns; rebuild it from the logs")
+        else:
+            state = {"columns": total_columns, "year": str(year or time.localtime().tm_year), "players": [],
+                     "ratings": [], "logs": {}, "rosters": {}, "cards": {}, "totals": None, "generation": 0}
+        # Leagues saved before the totals file was named in league.json used totals.npy
+        self._totals_name = state.get("totals", "totals.npy")
+        self._generation = state.get("generation", 0)
+        if self._totals_name is None:
+            self.totals = np.zeros((0, len(total_columns)), dtype=np.int64)
+        else:
+            self.totals = np.load(os.path.join(league_dir, self._totals_name))
+        self.year = state["year"]
+        self.players = state["players"]
+        self.ratings = state["ratings"]
+        self.logs = state["logs"]
+        self.fingerprints = {"rosters": state["rosters"], "cards": state["cards"]}
+        self._rows = {(player["player_id"], player["Tm"]): row for row, player in enumerate(self.players)}
+
+    def save(self):
+        """Write the totals and league state, replacing both at once"""
+        os.makedirs(self.league_dir, exist_ok=True)
+        # The totals go to a new file that only the new league.json names
+        generation = self._generation + 1
+        totals_name = f"totals.{generation}.npy"
+        with open(os.path.join(self.league_dir, totals_name), "wb") as f:
+            np.save(f, self.totals)
+            f.flush()
+            os.fsync(f.fileno())
+        state = {"columns": total_columns, "year": self.year, "players": self.players, "ratings": self.ratings,
+                 "logs": self.logs, **self.fingerprints, "totals": totals_name, "generation": generation}
+        with open(self._state_file + ".tmp", "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self._state_file + ".tmp", self._state_file)
+
+        # The previous totals are no longer named by league.json
+        if self._totals_name is not None:
+            try:
+                os.remove(os.path.join(self.league_dir, self._totals_name))
+            except FileNotFoundError:
+                pass
+        self._totals_name = totals_name
+        self._generation = generation
+
+    def read_log(self, log_file):
+        """Return the complete records appended to a game log since it was last read"""
+        offset = self.logs.get(os.path.abspath(log_file), 0)
+        with open(log_file, "rb") as f:
+            header = f.readline()
+            if offset > os.fstat(f.fileno()).st_size:
+                raise ValueError(f"{log_file} is shorter than when it was last read; rebuild the league")
+            f.seek(max(offset, f.tell()))
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # A line still being written is left for the next update
+        self.logs[os.path.abspath(log_file)] = max(offset, len(header)) + end
+        if not data[:end].strip():
+            return pd.DataFrame(columns=header.decode().strip().split(","))
+        return pd.read_csv(io.BytesIO(header + data[:end]))
+
+    def _player_rows(self, records):
+        """Row of each record's player, adding players seen for the first time"""
+        ids = records["player_id"] if "player_id" in records else records["Name"]
+        rows = np.empty(len(records), dtype=np.int64)
+        for i, (player_id, record) in enumerate(zip(ids.astype(str), records.to_dict("records"))):
+            key = (player_id, str(record["Tm"]))
+            row = self._rows.get(key)
+            if row is None:
+                row = self._rows[key] = len(self.players)
+                self.players.append({"player_id": key[0], "Name": str(record.get("Name", key[0])), "Tm": key[1],
+                                     "Age": None, "Bats": None, "Throws": None})
+                self.ratings.append(None)
+            # The latest age and handedness given win
+            player = self.players[row]
+            for column in ("Age", "Bats", "Throws"):
+                value = record.get(column)
+                if value is not None and value == value and value != "":
+                    player[column] = int(value) if column == "Age" else str(value)
+            rows[i] = row
+        return rows
+
+    def add_records(self, records):
+        """Add game log records to the totals and return the rows of the players they changed"""
+        if not len(records):
+            return np.empty(0, dtype=np.int64)
+        rows = self._player_rows(records)
+        if len(self.players) > len(self.totals):
+            self.totals = np.vstack([self.totals, np.zeros((len(self.players) - len(self.totals),
+                                                            len(total_columns)), dtype=np.int64)])
+
+        def counts(column):
+            if column not in records:
+                return np.zeros(len(records), dtype=np.int64)
+            return pd.to_numeric(records[column], errors="coerce").fillna(0).to_numpy().round().astype(np.int64)
+
+        added = np.zeros((len(records), len(total_columns)), dtype=np.int64)
+        for column in batting_stats + pitching_stats + fielding_stats:
+            added[:, _column[column]] = counts(column)
+        ip = pd.to_numeric(records["IP"], errors="coerce").fillna(0).to_numpy() if "IP" in records \
+            else np.zeros(len(records))
+        added[:, _column["outs"]] = np.floor(ip).astype(np.int64) * 3 + np.round(ip % 1 * 10).astype(np.int64)
+
+        # Games and position appearances follow from each record's position
+        position = records["Pos"].fillna("").astype(str).to_numpy() if "Pos" in records \
+            else np.full(len(records), "")
+        for code, column in _appearance.items():
+            added[:, _column[column]] = position == code
+        added[:, _column["G_bat"]] = added[:, _column["PA"]] > 0
+        added[:, _column["G_pit"]] = (position == "P") | (added[:, _column["BF"]] > 0)
+        added[:, _column["G_app"]] = np.isin(position, fielding_positions)
+        added[:, _column["G_cat"]] = position == "C"
+
+        np.add.at(self.totals, rows, added)
+        return np.unique(rows)
+
+    def stat_lines(self, rows):
+        """The stat lines (as rating_service reads them) of the given players' totals"""
+        lines = []
+        for row in rows:
+            totals = dict(zip(total_columns, self.totals[row].tolist()))
+            outs = totals.pop("outs")
+            chances = totals["PO"] + totals["A"] + totals["E"]
+            # Summaries name OF, as in the scraped fielding tables and the rating thresholds
+            by_position = {position: totals[_appearance[position]] for position in fielding_positions[:6]}
+            by_position["OF"] = totals["LF"] + totals["CF"] + totals["RF"]
+            played = sorted((position for position in by_position if by_position[position]),
+                            key=lambda position: -by_position[position])
+            line = {**totals, "IP": outs // 3 + outs % 3 / 10,
+                    "BA": round(totals["H_bat"] / totals["AB"], 3) if totals["AB"] else None,
+                    "Fld%": round((totals["PO"] + totals["A"]) / chances, 3) if chances else None,
+                    "Pos_Summary_fld": "-".join(played)}
+            # Like a player missing from a scraped table, a player who never
+            # batted, pitched or caught has blank stats there, not zeros
+            for games_column, columns in (("G_bat", batting_stats + ["BA"]), ("G_pit", pitching_stats + ["IP"]),
+                                          ("G_app", fielding_stats + ["Fld%"]), ("G_cat", ["SB_cat", "CS_cat"])):
+                if not totals[games_column]:
+                    line.update(dict.fromkeys(columns + [games_column]))
+            lines.append(line)
+        return lines
+
+    def rerate(self, rows):
+        """Re-rate the given players and return the rows whose ratings changed"""
+        if not len(rows):
+            return []
+        lines = self.stat_lines(rows)
+        rated = rating_service.rate_keys([rating_service.stat_key(line) for line in lines])
+        changed = []
+        for row, line_ratings in zip(rows, rated):
+            if line_ratings != self.ratings[row]:
+                changed.append(int(row))
+            self.ratings[row] = line_ratings
+        return changed
+
+    def players_frame(self, rows):
+        """The given players as the rated players frame rosters.roster_frame takes"""
+        lines = self.stat_lines(rows)
+        players = pd.DataFrame([{**self.players[row], **line, **self.ratings[row]}
+                                for row, line in zip(rows, lines)])
+        players["Primary_Pos_fld"] = players["Pos_Summary_fld"].str.split("-").str[0].replace("", np.nan)
+        players["OF"] = players["LF"] + players["CF"] + players["RF"]
+        return players
+
+    def write_teams(self, teams, template_file=None, pdf=False):
+        """Rewrite the roster and cards of the given teams where they changed, as workbooks or PDF
+
+        Returns the teams whose rosters and whose cards were written.
+        """
+        if not teams:
+            return [], []
+        rows = [row for row, player in enumerate(self.players) if player["Tm"] in teams]
+        players_short = rosters.roster_frame(self.players_frame(rows))
+        extension = ".pdf" if pdf else ".xlsx"
+        roster_dir = os.path.join(self.league_dir, "rosters")
+        card_dir = os.path.join(self.league_dir, "cards")
+        os.makedirs(roster_dir, exist_ok=True)
+        os.makedirs(card_dir, exist_ok=True)
+        templates = prepared = None
+        written_rosters, written_cards = [], []
+
+        for team, roster in players_short.groupby("Tm", observed=True):
+            fingerprint = _hash(list(roster.itertuples(name=None)))
+            if fingerprint != self.fingerprints["rosters"].get(team):
+                roster_file = os.path.join(roster_dir, team + extension)
+                if pdf:
+                    rosters.write_rosters_pdf(roster, self.year, roster_file)
+                else:
+                    rosters.write_rosters(roster, self.year, roster_file)
+                self.fingerprints["rosters"][team] = fingerprint
+                written_rosters.append(team)
+
+            if template_file is None:
+                continue
+            # Cards only show names, positions and ratings, so games often leave them as they were
+            cards = create_player_cards.roster_cards(roster)
+            fingerprint = _hash(cards)
+            if fingerprint != self.fingerprints["cards"].get(team):
+                if prepared is None:
+                    templates = create_player_cards.load_templates(template_file)
+                    prepared = create_player_cards.prepare_cards(templates)
+                create_player_cards.write_team_cards(
+                    template_file, os.path.join(card_dir, team + extension),
+                    [(team, self.year, rosters.team_dict.get(team, team), cards)], templates=templates,
+                    prepared=prepared)
+                self.fingerprints["cards"][team] = fingerprint
+                written_cards.append(team)
+        return written_rosters, written_cards
+
+
+def update_league(league_dir, log_files, year=None, template_file=None, pdf=False):
+    """Add the new game log records to a league, re-rate and rewrite what changed, and save it"""
+    start = time.perf_counter()
+    league = League(league_dir, year)
+    records = [league.read_log(log_file) for log_file in log_files]
+    records = pd.concat(records, ignore_index=True) if records else pd.DataFrame()
+    changed = league.add_records(records)
+    rerated = league.rerate(changed)
+    teams = sorted({league.players[row]["Tm"] for row in changed})
+    written_rosters, written_cards = league.write_teams(teams, template_file, pdf)
+    league.save()
+    print(f"{len(records)} new records: {len(changed)} players' totals changed, {len(rerated)} ratings changed, "
+          f"{len(written_rosters)} rosters and {len(written_cards)} card files written "
+          f"in {time.perf_counter() - start:.2f}s")
+    return league
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update a replay league's ratings from its game logs")
+    parser.add_argument("league_dir", help="folder holding the league's totals, rosters and cards")
+    parser.add_argument("log_files", nargs="*", help="game log CSV files (only new records are read)")
+    parser.add_argument("--year", help="season shown on a new league's rosters and cards (this year by default)")
+    parser.add_argument("--template", default="../data/Player Cards Template.xlsx", help="card template workbook")
+    parser.add_argument("--no-cards", action="store_true", help="skip the player cards")
+    parser.add_argument("--pdf", action="store_true", help="write the rosters and cards as PDF")
+    args = parser.parse_args()
+
+    template_file = None if args.no_cards else args.template
+    if template_file and not os.path.exists(template_file):
+        print(f"Error: File {template_file} not found!")
+        exit(1)
+    update_league(args.league_dir, args.log_files, args.year, template_file, args.pdf)
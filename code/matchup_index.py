@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import h2h
+import instrument
+
+# Memory-mapped batter vs pitcher matchup index.
+#
+# An index is a folder of .npy files built from a batter_h2h aggregate:
+#   batters.npy, pitchers.npy   sorted player IDs (a player's code is its position)
+#   keys.npy                    sorted int64 matchup keys, (batter code << 32) | pitcher code
+#   counts.npy                  one row per count column, in key order
+#   batter_offsets.npy          rows of batter code i are batter_offsets[i]:batter_offsets[i + 1]
+#   by_pitcher.npy              rows ordered by pitcher, then batter
+#   pitcher_offsets.npy         the same offsets for by_pitcher
+#   top_pa.npy                  rows by plate appearances, most first
+#   index.json                  count columns, seasons and row count
+# Arrays are opened with mmap_mode='r', so a lookup only reads the pages it
+# touches: a point lookup is three binary searches, a player's matchups are a
+# contiguous slice, and top-N by plate appearances is a prefix of top_pa.
+
+default_index_dir = os.path.join('..', 'data', 'h2h index')
+
+_arrays = ['batters', 'pitchers', 'keys', 'counts', 'batter_offsets', 'by_pitcher', 'pitcher_offsets', 'top_pa']
+
+
+def _save(index_dir, batters, pitchers, keys, counts, columns, seasons):
+    """Write the index files for sorted unique keys and their counts (one row per column)"""
+    batter_codes = keys >> 32
+    pitcher_codes = keys & 0xFFFFFFFF
+    by_pitcher = np.lexsort((batter_codes, pitcher_codes))
+    arrays = {
+        # Fixed-width strings, since object arrays cannot be memory-mapped
+        'batters': np.asarray(batters, dtype=str),
+        'pitchers': np.asarray(pitchers, dtype=str),
+        'keys': keys,
+        'counts': np.ascontiguousarray(counts, dtype=np.int32),
+        'batter_offsets': np.searchsorted(batter_codes, np.arange(len(batters) + 1)),
+        'by_pitcher': by_pitcher,
+        'pitcher_offsets': np.searchsorted(pitcher_codes[by_pitcher], np.arange(len(pitchers) + 1)),
+        # Stable sort on the negated counts keeps key order for ties, as nlargest does
+        'top_pa': np.argsort(-counts[columns.index('pa')], kind='stable') if 'pa' in columns else np.empty(0, int),
+    }
+
+    os.makedirs(index_dir, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(os.path.join(index_dir, name + '.npy'), values)
+    with open(os.path.join(index_dir, 'index.json'), 'w') as f:
+        json.dump({'columns': list(columns), 'seasons': [str(s) for s in seasons], 'rows': len(keys)}, f)
+    return index_dir
+
+
+def build_index(batter_h2h, index_dir, seasons=()):
+    """Write a matchup index for a batter_h2h frame (batter, pitcher and count columns)"""
+    columns = [column for column in batter_h2h.columns if column not in ('batter', 'pitcher')]
+    batters, batter_codes = np.unique(batter_h2h['batter'].to_numpy().astype(str), return_inverse=True)
+    pitchers, pitcher_codes = np.unique(batter_h2h['pitcher'].to_numpy().astype(str), return_inverse=True)
+    keys = (batter_codes.astype(np.int64) << 32) | pitcher_codes
+    keys, sums = h2h.sum_by_key(keys, batter_h2h[columns].to_numpy(np.int32))
+    return _save(index_dir, batters, pitchers, keys, sums.T, columns, seasons)
+
+
+def combine_indexes(index_dirs, index_dir):
+    """Write a combined index summing the matchups of several indexes (e.g. one per season)"""
+    indexes = [MatchupIndex(path) for path in index_dirs]
+    columns = indexes[0].columns
+    if any(index.columns != columns for index in indexes):
+        raise ValueError("indexes have different count columns")
+
+    batters = np.unique(np.concatenate([index.batters for index in indexes]))
+    pitchers = np.unique(np.concatenate([index.pitchers for index in indexes]))
+    keys = []
+    for index in indexes:
+        # Re-code each index's players against the combined ID lists
+        batter_codes = np.searchsorted(batters, index.batters)[index.keys >> 32]
+        pitcher_codes = np.searchsorted(pitchers, index.pitchers)[index.keys & 0xFFFFFFFF]
+        keys.append((batter_codes.astype(np.int64) << 32) | pitcher_codes)
+
+    keys, sums = h2h.sum_by_key(np.concatenate(keys), np.concatenate([index.counts.T for index in indexes]))
+    seasons = [season for index in indexes for season in index.seasons]
+    return _save(index_dir, batters, pitchers, keys, sums.T, columns, seasons)
+
+
+class MatchupIndex:
+    def __init__(self, index_dir):
+        """Open an index built by build_index or combine_indexes"""
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, 'index.json')) as f:
+            meta = json.load(f)
+        self.columns = meta['columns']
+        self.seasons = meta['seasons']
+        for name in _arrays:
+            setattr(self, name, np.load(os.path.join(index_dir, name + '.npy'), mmap_mode='r'))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _code(self, ids, player):
+        """Return a player's code, or -1 if the player is not in the index"""
+        i = np.searchsorted(ids, player)
+        return int(i) if i < len(ids) and ids[i] == player else -1
+
+    def _row(self, batter, pitcher):
+        b = self._code(self.batters, batter)
+        p = self._code(self.pitchers, pitcher)
+        if b < 0 or p < 0:
+            return -1
+        key = (b << 32) | p
+        i = np.searchsorted(self.keys, key)
+        return int(i) if i < len(self.keys) and self.keys[i] == key else -1
+
+    def _frame(self, rows):
+        """Return the given rows as a batter_h2h frame"""
+        rows = np.asarray(rows, dtype=np.int64)
+        keys = self.keys[rows]
+        frame = pd.DataFrame(self.counts[:, rows].T, columns=self.columns)
+        frame.insert(0, 'pitcher', self.pitchers[keys & 0xFFFFFFFF].astype(object))
+        frame.insert(0, 'batter', self.batters[keys >> 32].astype(object))
+        return frame
+
+    def lookup(self, batter, pitcher):
+        """Return a batter's line against a pitcher as a dict, or None if they never met"""
+        i = self._row(batter, pitcher)
+        if i < 0:
+            return None
+        return dict(zip(self.columns, self.counts[:, i].tolist()))
+
+    def _rows(self, batter=None, pitcher=None):
+        if batter is not None:
+            b = self._code(self.batters, batter)
+            return np.arange(self.batter_offsets[b], self.batter_offsets[b + 1]) if b >= 0 else np.empty(0, int)
+        if pitcher is not None:
+            p = self._code(self.pitchers, pitcher)
+            return self.by_pitcher[self.pitcher_offsets[p]:self.pitcher_offsets[p + 1]] if p >= 0 else np.empty(0, int)
+        return None
+
+    def pitchers_faced(self, batter):
+        """Return every pitcher a batter faced, sorted by pitcher"""
+        return self._frame(self._rows(batter=batter))
+
+    def batters_faced(self, pitcher):
+        """Return every batter a pitcher faced, sorted by batter"""
+        return self._frame(self._rows(pitcher=pitcher))
+
+    def top(self, n=10, column='pa', batter=None, pitcher=None):
+        """Return the n matchups with the highest column, optionally for one batter or pitcher"""
+        if n <= 0:
+            return self._frame(np.empty(0, int))
+        rows = self._rows(batter, pitcher)
+        if rows is None and column == 'pa':
+            return self._frame(self.top_pa[:n])
+        values = self.counts[self.columns.index(column)]
+        if rows is not None:
+            values = values[rows]
+        best = np.arange(len(values))
+        if n < len(values):
+            # Partition out the n-th largest value, then keep the first ties as nlargest does
+            kth = np.partition(values, len(values) - n)[len(values) - n]
+            above = np.flatnonzero(values > kth)
+            best = np.concatenate([above, np.flatnonzero(values == kth)[:n - len(above)]])
+        best = best[np.lexsort((best, -values[best]))]
+        return self._frame(best if rows is None else rows[best])
+
+
+def _index_path(args, name):
+    return os.path.join(args.index_dir, name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and query batter vs pitcher matchup indexes")
+    parser.add_argument("--index-dir", default=default_index_dir, help="folder holding the indexes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="index play files (or a batter h2h csv with --from-h2h)")
+    build.add_argument("name", help="index name, e.g. 1995")
+    build.add_argument("files", nargs="+", help="play files or glob patterns")
+    build.add_argument("--from-h2h", action="store_true", help="files are already aggregated batter h2h csvs")
+    build.add_argument("--exclude", nargs="*", default=h2h.postseason_gametypes, help="game types to leave out")
+    build.add_argument("--profile", action="store_true", help="print the time, memory and rows of each stage")
+
+    combine = commands.add_parser("combine", help="sum several indexes into a multi-season index")
+    combine.add_argument("name", help="name of the combined index, e.g. 1990s")
+    combine.add_argument("sources", nargs="+", help="names of the indexes to combine")
+
+    lookup = commands.add_parser("lookup", help="one batter's line against one pitcher")
+    lookup.add_argument("name")
+    lookup.add_argument("batter")
+    lookup.add_argument("pitcher")
+
+    pitchers = commands.add_parser("pitchers", help="all pitchers faced by a batter")
+    pitchers.add_argument("name")
+    pitchers.add_argument("batter")
+
+    batters = commands.add_parser("batters", help="all batters faced by a pitcher")
+    batters.add_argument("name")
+    batters.add_argument("pitcher")
+
+    top = commands.add_parser("top", help="top matchups by a count column")
+    top.add_argument("name")
+    top.add_argument("-n", type=int, default=10)
+    top.add_argument("--column", default="pa")
+    top.add_argument("--batter")
+    top.add_argument("--pitcher")
+
+    args = parser.parse_args()
+    pd.set_option("display.width", 200)
+
+    if args.command == "build":
+        if args.profile:
+            instrument.enable()
+        if args.from_h2h:
+            batter_h2h = pd.concat([pd.read_csv(path) for path in h2h.expand_paths(args.files)], ignore_index=True)
+        else:
+            batter_h2h = h2h.aggregate_h2h(args.files, exclude=args.exclude)
+        with instrument.stage("h2h.index", rows=len(batter_h2h)):
+            path = build_index(batter_h2h, _index_path(args, args.name), seasons=[args.name])
+        print(f"Indexed {len(MatchupIndex(path))} matchups in {path}")
+        if args.profile:
+            instrument.print_breakdown({args.name: instrument.report()})
+    elif args.command == "combine":
+        path = combine_indexes([_index_path(args, source) for source in args.sources], _index_path(args, args.name))
+        print(f"Indexed {len(MatchupIndex(path))} matchups in {path}")
+    else:
+        index = MatchupIndex(_index_path(args, args.name))
+        if args.command == "lookup":
+            line = index.lookup(args.batter, args.pitcher)
+            print(line if line is not None else f"{args.batter} never faced {args.pitcher}")
+        elif args.command == "pitchers":
+            print(index.pitchers_faced(args.batter).to_string(index=False))
+        elif args.command == "batters":
+            print(index.batters_faced(args.pitcher).to_string(index=False))
+        elif args.command == "top":
+            print(index.top(args.n, args.column, args.batter, args.pitcher).to_string(index=False))
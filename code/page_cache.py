@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+import instrument
+
+# On-disk cache of fetched web pages, keyed by URL.
+#
+# Each page is stored as <sha256 of url>.html with a .json sidecar holding the
+# URL and fetch time. A page's modification time is bumped every time it is
+# served, so the least recently used pages are evicted first when the cache
+# grows past max_bytes. In offline mode pages are only ever served from disk,
+# which also lets the scraping code run against saved HTML fixtures.
+
+default_cache_dir = os.path.join('..', 'data', 'cache')
+
+
+def _fetch(url):
+    res = requests.get(url, headers=dict(referer=url))
+    res.raise_for_status()
+    return res.text
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a page is not in the cache"""
+
+
+class PageCache:
+    def __init__(self, cache_dir=default_cache_dir, ttl=None, max_bytes=500 * 2**20, offline=False, fetch=None):
+        """Open (or create) a page cache; ttl is in seconds, None keeps pages forever
+
+        Missing pages are fetched with fetch(url), a plain requests.get by default.
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.fetch = fetch or _fetch
+        self.hits = 0
+        self.misses = 0
+        # get() is called from fetch_pages' threads; the counters and size are shared
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path in self._pages())
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _path(self, url, ext='.html'):
+        return os.path.join(self.cache_dir, self._key(url) + ext)
+
+    def _pages(self):
+        return [entry.path for entry in os.scandir(self.cache_dir) if entry.name.endswith('.html')]
+
+    def _fetched(self, url):
+        """Return when a cached page was fetched, or None if it is not cached"""
+        try:
+            with open(self._path(url, '.json')) as f:
+                return json.load(f)['fetched']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def cached(self, url):
+        """Whether get(url) would be served from disk"""
+        fetched = self._fetched(url)
+        if fetched is None or not os.path.exists(self._path(url)):
+            return False
+        return self.offline or self.ttl is None or time.time() - fetched <= self.ttl
+
+    def get(self, url):
+        """Return the text of a page, fetching it only if it is not cached"""
+        if self.cached(url):
+            path = self._path(url)
+            try:
+                with open(path, encoding='utf-8') as f:
+                    text = f.read()
+                os.utime(path)
+                with self._lock:
+                    self.hits += 1
+                instrument.count('cache.hits')
+                return text
+            except FileNotFoundError:
+                pass  # Evicted by another process since cached() was checked
+
+        if self.offline:
+            raise CacheMiss(url)
+
+        with self._lock:
+            self.misses += 1
+        instrument.count('cache.misses')
+        text = self.fetch(url)
+        self.store(url, text)
+        return text
+
+    def store(self, url, text):
+        """Save a page to the cache, e.g. to seed it with a saved HTML fixture"""
+        path = self._path(url)
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        data = text.encode('utf-8')
+
+        # Write to temporary files first so other processes never see half a page
+        for ext, content in (('.html', data), ('.json', json.dumps({'url': url, 'fetched': time.time()}).encode())):
+            tmp = self._path(url, ext) + f'.{os.getpid()}.{threading.get_ident()}'
+            with open(tmp, 'wb') as f:
+                f.write(content)
+            os.replace(tmp, self._path(url, ext))
+
+        with self._lock:
+            self._size += len(data) - old_size
+            full = self._size > self.max_bytes
+        if full:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used pages until the cache fits in max_bytes"""
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        pages = []
+        for path in self._pages():
+            try:
+                stat = os.stat(path)
+                pages.append((stat.st_mtime, stat.st_size, path))
+            except FileNotFoundError:
+                continue
+        pages.sort()
+        self._size = sum(size for _, size, _ in pages)
+
+        for _, size, path in pages:
+            if self._size <= self.max_bytes:
+                break
+            for stale in (path, path[:-len('.html')] + '.json'):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+            self._size -= size
+
+    def clear(self):
+        """Remove every cached page"""
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(('.html', '.json')):
+                os.remove(entry.path)
+        with self._lock:
+            self._size = 0
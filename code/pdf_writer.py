@@ -0,0 +1,164 @@
+import unicodedata
+import zlib
+
+# Minimal vector PDF writer for the card and roster PDFs.
+#
+# Pages are written to disk as they are added, so only the object offsets and
+# page numbers stay in memory however many pages a file has. Text uses the
+# standard Helvetica fonts (no embedding, WinAnsi encoding), defined once per
+# file. Drawing that repeats on every card or page, such as a card's frame,
+# fills and labels, is written once as a form XObject and placed with Do.
+# All pages, forms and fonts share one resource dictionary.
+
+LETTER = (612, 792)
+LANDSCAPE_LETTER = (792, 612)
+
+fonts = {
+    "regular": "Helvetica",
+    "bold": "Helvetica-Bold",
+    "italic": "Helvetica-Oblique",
+    "bold italic": "Helvetica-BoldOblique",
+}
+
+# Advance widths (1/1000 em) of characters 32-126 in Helvetica and Helvetica-Bold;
+# the oblique fonts have the same widths
+_widths = {
+    "Helvetica": [
+        278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+        1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+        333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+        556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584],
+    "Helvetica-Bold": [
+        278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+        975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+        333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+        611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584],
+}
+_widths["Helvetica-Oblique"] = _widths["Helvetica"]
+_widths["Helvetica-BoldOblique"] = _widths["Helvetica-Bold"]
+
+
+def _char_width(widths, char):
+    code = ord(char)
+    if 32 <= code <= 126:
+        return widths[code - 32]
+    # Accented letters are as wide as the letter without the accent
+    base = unicodedata.normalize("NFKD", char)[:1]
+    if base and 32 <= ord(base) <= 126:
+        return widths[ord(base) - 32]
+    return 556
+
+
+def text_width(text, font, size):
+    """Width in points of text set in one of the standard fonts"""
+    widths = _widths[font]
+    return sum(_char_width(widths, char) for char in text) * size / 1000
+
+
+def _pdf_string(text):
+    data = text.encode("cp1252", errors="replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def color(rgb):
+    """Return "r g b" for an "RRGGBB" or "AARRGGBB" hex color"""
+    rgb = rgb[-6:]
+    return " ".join(f"{int(rgb[i:i + 2], 16) / 255:.3f}" for i in (0, 2, 4))
+
+
+class PdfWriter:
+    def __init__(self, output_file, compress=True):
+        """Start a PDF file; add fonts, forms and pages, then close it"""
+        self.output_file = output_file
+        self.compress = compress
+        self._file = open(output_file, "wb")
+        self._offsets = [None]
+        self._pages = []
+        self._fonts = {}
+        self._forms = {}
+        self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._catalog = self._reserve()
+        self._page_tree = self._reserve()
+        self._resources = self._reserve()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _reserve(self):
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _object(self, number, body):
+        self._offsets[number] = self._file.tell()
+        self._file.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def _stream(self, number, data, entries=b""):
+        if self.compress:
+            data = zlib.compress(data, 6)
+            entries += b" /Filter /FlateDecode"
+        self._object(number, b"<< /Length %d%s >>\nstream\n" % (len(data), entries) + data + b"\nendstream")
+
+    def font(self, name):
+        """Return the resource name (e.g. F1) of a standard font, defining it on first use"""
+        if name not in self._fonts:
+            number = self._reserve()
+            self._object(number, b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+                         % name.encode())
+            self._fonts[name] = (f"F{len(self._fonts) + 1}", number)
+        return self._fonts[name][0]
+
+    def form(self, content, width, height):
+        """Write drawing used many times as a form XObject and return its resource name"""
+        number = self._reserve()
+        name = f"X{len(self._forms) + 1}"
+        self._stream(number, content.encode("latin-1") if isinstance(content, str) else content,
+                     b" /Type /XObject /Subtype /Form /BBox [0 0 %.2f %.2f] /Resources %d 0 R"
+                     % (width, height, self._resources))
+        self._forms[name] = number
+        return name
+
+    def add_page(self, content, size=LETTER):
+        """Write a page with the given content stream (str or bytes) to disk"""
+        stream = self._reserve()
+        page = self._reserve()
+        self._stream(stream, content.encode("latin-1") if isinstance(content, str) else content)
+        self._object(page, b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %g %g] /Resources %d 0 R /Contents %d 0 R >>"
+                     % (self._page_tree, size[0], size[1], self._resources, stream))
+        self._pages.append(page)
+
+    def close(self):
+        """Write the page tree, shared resources and cross-reference table, and close the file"""
+        if self._file.closed:
+            return
+        fonts = b" ".join(b"/%s %d 0 R" % (name.encode(), number) for name, number in self._fonts.values())
+        forms = b" ".join(b"/%s %d 0 R" % (name.encode(), number) for name, number in self._forms.items())
+        self._object(self._resources, b"<< /ProcSet [/PDF /Text] /Font << %s >> /XObject << %s >> >>"
+                     % (fonts, forms))
+        kids = b" ".join(b"%d 0 R" % page for page in self._pages)
+        self._object(self._page_tree, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._pages)))
+        self._object(self._catalog, b"<< /Type /Catalog /Pages %d 0 R >>" % self._page_tree)
+
+        xref = self._file.tell()
+        self._file.write(b"xref\n0 %d\n0000000000 65535 f \n" % len(self._offsets))
+        self._file.write(b"".join(b"%010d 00000 n \n" % offset for offset in self._offsets[1:]))
+        self._file.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                         % (len(self._offsets), self._catalog, xref))
+        self._file.close()
+        return self.output_file
+
+
+def text(font, size, x, y, value, align="left", width=0):
+    """Content stream operators (as bytes) that show value in a box starting at x, aligned within width"""
+    value = str(value)
+    if align == "center":
+        x += (width - text_width(value, font[1], size)) / 2
+    elif align == "right":
+        x += width - text_width(value, font[1], size)
+    return b"BT /%s %g Tf %.2f %.2f Td %s Tj ET\n" % (font[0].encode(), size, x, y, _pdf_string(value))
@@ -0,0 +1,150 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fetcher
+import instrument
+import page_cache
+import ratings
+import rosters
+import scrape
+import season_store
+
+# Rate one or more seasons end to end: scrape, rate and write the formatted
+# "<year> rosters formatted.xlsx" workbook for each, one season per worker
+# process. Data stays in memory between stages, and each rated season is also
+# saved to the season store. Seasons that were only imported from formatted
+# workbooks have no stats, so --from-store rewrites their workbooks with the
+# stored ratings instead of re-rating them. With --profile each worker records its stages
+# with instrument.py and the seasons' breakdowns are printed side by side.
+
+
+def parse_years(specs):
+    """Expand year arguments like 1977 or 1950-2020 into a sorted list of years"""
+    years = set()
+    for spec in specs:
+        for part in spec.split(','):
+            if '-' in part:
+                first, last = part.split('-', 1)
+                years.update(range(int(first), int(last) + 1))
+            elif part:
+                years.add(int(part))
+    return [str(year) for year in sorted(years)]
+
+
+def load_players(year, store, from_store=False):
+    """Scrape a season, or read its stats back from the season store"""
+    if not from_store:
+        return scrape.scrape_players(year)
+    players = season_store.read_players(store, years=[year]).drop(columns=["year"])
+    return players.astype({column: object for column in players.select_dtypes("category")})
+
+
+def rate_season(year, output_dir, cache_options=None, store=season_store.default_store, from_store=False,
+                profile=False, pdf=False, fetcher_options=None):
+    """Scrape, rate and write the formatted rosters for one season, also as a PDF with pdf
+
+    A roster-only season in the store (see season_store.roster_only) keeps
+    its stored ratings and is not written back to the store.
+    fetcher_options are passed to scrape.configure_fetcher, e.g. this
+    process's share of the request rate.
+
+    Returns (year, players, seconds, instrument report or None without profile).
+    """
+    start = time.perf_counter()
+    if profile:
+        instrument.enable()
+    if fetcher_options:
+        scrape.configure_fetcher(**fetcher_options)
+    scrape.configure_cache(**(cache_options or {}))
+    with instrument.stage("load") as record:
+        players = load_players(year, store, from_store)
+        record["rows"] = len(players)
+    if from_store and season_store.roster_only(year, store):
+        print(f"{year}: roster-only season in the store, keeping its stored ratings")
+    else:
+        ratings.rate_players(players)
+
+        # Rating numbers such as BPH and PCN go out as numbers, as they did after
+        # the notebook re-read its stage CSVs
+        with instrument.stage("store.write", rows=len(players)):
+            scrape.infer_dtypes(players)
+            season_store.write_season(players, year, store)
+
+    players_short = rosters.roster_frame(players)
+    output_file = os.path.join(output_dir, year + ' rosters formatted.xlsx')
+    with instrument.stage("rosters.write", rows=len(players_short)):
+        rosters.write_rosters(players_short, year, output_file)
+    if pdf:
+        with instrument.stage("rosters.pdf", rows=len(players_short)):
+            rosters.write_rosters_pdf(players_short, year, os.path.splitext(output_file)[0] + '.pdf')
+    return year, len(players_short), time.perf_counter() - start, instrument.report() if profile else None
+
+
+def rate_seasons(years, output_dir, workers=None, cache_options=None, store=season_store.default_store,
+                 from_store=False, profile=False, pdf=False):
+    """Rate each season in a process pool and return (year, players, seconds, report) per season
+
+    Each worker has its own fetcher, so the request rate to a host is split
+    evenly between the workers and all of them together stay under it.
+    """
+    results = []
+    processes = max(1, min(workers or os.cpu_count(), len(years)))
+    fetcher_options = {"rate": fetcher.default_rate / processes}
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {executor.submit(rate_season, year, output_dir, cache_options, store, from_store, profile,
+                                   pdf, fetcher_options): year
+                   for year in years}
+        for future in as_completed(futures):
+            year = futures[future]
+            try:
+                results.append(future.result())
+                print(f"{year}: {results[-1][1]} players in {results[-1][2]:.1f}s")
+            except Exception as e:
+                print(f"Error rating {year}: {e}")
+    return sorted(results)
+
+
+def print_summary(results, wall_time):
+    """Print the wall time per season and for the whole run"""
+    print("\nSeason   Players   Seconds")
+    for year, count, seconds, _ in results:
+        print(f"{year:<8} {count:>7} {seconds:>9.1f}")
+    print(f"\nRated {len(results)} seasons in {wall_time:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rate one or more seasons with SherCo PLUS ratings")
+    parser.add_argument("years", nargs="+", help="years or ranges, e.g. 1977 or 1950-2020")
+    parser.add_argument("--output-dir", default="../data", help="folder for the roster workbooks")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--cache-dir", default=page_cache.default_cache_dir, help="folder for cached pages")
+    parser.add_argument("--ttl", type=float, default=None, help="refetch cached pages older than this many seconds")
+    parser.add_argument("--offline", action="store_true", help="serve pages from the cache only")
+    parser.add_argument("--store", default=season_store.default_store, help="season store folder")
+    parser.add_argument("--from-store", action="store_true",
+                        help="re-rate stats already in the season store instead of scraping")
+    parser.add_argument("--pdf", action="store_true", help="also write each season's rosters as a PDF")
+    parser.add_argument("--profile", action="store_true",
+                        help="print the time, memory and rows of each stage, season by season")
+    parser.add_argument("--profile-json", help="save the stage profiles to this JSON file")
+    parser.add_argument("--trace", help="save the stages as a Chrome trace event file")
+    parser.add_argument("--baseline", help="flag stages slower per row than in this earlier --profile-json file")
+    args = parser.parse_args()
+    profile = bool(args.profile or args.profile_json or args.trace or args.baseline)
+
+    cache_options = {"cache_dir": args.cache_dir, "ttl": args.ttl, "offline": args.offline}
+    start = time.perf_counter()
+    results = rate_seasons(parse_years(args.years), args.output_dir, args.workers, cache_options,
+                           args.store, args.from_store, profile, args.pdf)
+    print_summary(results, time.perf_counter() - start)
+
+    if profile:
+        profiles = {year: report for year, _, _, report in results}
+        if args.profile or args.baseline:
+            instrument.print_breakdown(profiles, instrument.read_json(args.baseline) if args.baseline else None)
+        if args.profile_json:
+            instrument.write_json(profiles, args.profile_json)
+        if args.trace:
+            instrument.write_trace(profiles, args.trace)
@@ -0,0 +1,227 @@
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+import ratings
+
+# Rate custom and imaginary stat lines on demand, in process or over a local
+# HTTP/JSON service.
+#
+# A stat line is a dict of the scraped column names the formulas read (see
+# stat_fields), e.g. {"PA": 600, "H_bat": 160, "AB": 540, ...}; missing fields
+# are treated like blank cells. Lines are rated with the same column functions
+# as rate_players, but on plain float arrays instead of a DataFrame, so one
+# line takes well under a millisecond and a batch costs one vectorized pass.
+# Results are kept in an LRU cache keyed by the stat line, so repeated lines
+# are only looked up.
+#
+#   python rating_service.py --port 8765
+#   curl -d '{"PA": 600, "AB": 540, "H_bat": 160, "G_bat": 150}' localhost:8765/rate
+#   python rating_service.py --csv "../data/imaginary players.csv"
+
+batting_fields = ["BA", "AB", "PA", "H_bat", "2B", "3B", "HR_bat", "RBI", "SB", "BB_bat", "SO_bat", "HBP_bat",
+                  "G_bat"]
+pitching_fields = ["IP", "BF", "H_pit", "HR_pit", "BB_pit", "SO_pit", "HBP_pit", "WP", "G_pit"]
+fielding_fields = ["G_app", "PO", "A", "Fld%", "G_cat", "SB_cat", "CS_cat"]
+stat_fields = batting_fields + pitching_fields + fielding_fields
+
+# A stat line's position is Primary_Pos_fld, or the first of Pos_Summary_fld
+position_fields = ["Primary_Pos_fld", "Pos_Summary_fld"]
+
+rating_fields = ["batter_rating", "PH_num_bat", "pitcher_rating", "PCN", "PPH", "fielder_rating"]
+number_fields = ["PH_num_bat", "PCN", "PPH"]
+
+
+def _number(value):
+    """A stat as a float, or None when blank or not a number (like errors="coerce")"""
+    if value is None or value == "":
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value  # NaN
+
+
+def stat_key(line):
+    """Return the hashable stat values of a line that its ratings depend on"""
+    values = [_number(line.get(field)) for field in stat_fields]
+    ba, ab, h = values[0], values[1], values[3]
+    if ba is None and ab and h is not None:
+        values[0] = round(h / ab, 3)  # Batting average as baseball-reference rounds it
+    return tuple(values) + (_position(line),)
+
+
+def _position(line):
+    position = line.get("Primary_Pos_fld")
+    if not isinstance(position, str):
+        summary = line.get("Pos_Summary_fld")
+        position = summary.split("-")[0] if isinstance(summary, str) else None
+    return position or None
+
+
+def stat_columns(keys):
+    """Turn stat keys into the columns the rating functions read"""
+    columns = {field: np.array([key[i] for key in keys], dtype=float) for i, field in enumerate(stat_fields)}
+    columns["Primary_Pos_fld"] = np.array([key[-1] for key in keys], dtype=object)
+    return columns
+
+
+def _rating(value, number=False):
+    if not isinstance(value, str):
+        return None
+    return int(value) if number and value.isdigit() else value
+
+
+def rate_keys(keys):
+    """Rate stat keys in one vectorized pass and return a ratings dict per key"""
+    columns = stat_columns(keys)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        batter, bph = ratings.batter_ratings(columns)
+        pitcher, pcn, pph = ratings.pitcher_ratings(columns)
+        fielder = ratings.fielder_ratings(columns)
+    numbers = [field in number_fields for field in rating_fields]
+    return [{field: _rating(value, number) for field, value, number in zip(rating_fields, row, numbers)}
+            for row in zip(batter, bph, pitcher, pcn, pph, fielder)]
+
+
+class RatingService:
+    def __init__(self, cache_size=100_000):
+        """Rate stat lines with an LRU cache of up to cache_size lines"""
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # The first call builds numpy's string ufuncs; pay for it at startup
+        rate_keys([stat_key({})])
+
+    def rate(self, stat_lines):
+        """Rate one stat line (dict) or a list of them, returning ratings in the same shape
+
+        Lines not in the cache are rated together in one pass.
+        """
+        single = isinstance(stat_lines, dict)
+        keys = [stat_key(line) for line in ([stat_lines] if single else stat_lines)]
+        results = [None] * len(keys)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                rated = self._cache.get(key)
+                if rated is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    results[i] = rated
+            self.hits += len(keys) - sum(len(lines) for lines in missing.values())
+            self.misses += len(missing)
+
+        if missing:
+            rated = rate_keys(list(missing))
+            with self._lock:
+                for (key, lines), line_ratings in zip(missing.items(), rated):
+                    self._cache[key] = line_ratings
+                    for i in lines:
+                        results[i] = line_ratings
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        # Copies, so callers cannot change the cached ratings
+        results = [dict(line_ratings) for line_ratings in results]
+        return results[0] if single else results
+
+    def stats(self):
+        """Return the cache size, hits and misses"""
+        with self._lock:
+            return {"cached": len(self._cache), "cache_size": self.cache_size, "hits": self.hits,
+                    "misses": self.misses}
+
+
+def rate_frame(service, players):
+    """Add the rating columns to a DataFrame of stat lines"""
+    rated = pd.DataFrame(service.rate(players.to_dict("records")), columns=rating_fields, index=players.index)
+    players[rating_fields] = rated.astype({field: "Int64" for field in number_fields})
+    return players
+
+
+def make_handler(service):
+    """Return a request handler class serving service
+
+    POST /rate takes a stat line or a list of them as JSON and returns the
+    ratings in the same shape; GET /stats returns the cache statistics.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep connections open between requests
+        disable_nagle_algorithm = True  # Send small replies at once, not after the client's delayed ACK
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._reply(200, service.stats())
+            else:
+                self._reply(404, {"error": f"unknown path {self.path}"})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.path != "/rate":
+                self._reply(404, {"error": f"unknown path {self.path}"})
+                return
+            try:
+                stat_lines = json.loads(body)
+                if not isinstance(stat_lines, dict) and not (
+                        isinstance(stat_lines, list) and all(isinstance(line, dict) for line in stat_lines)):
+                    raise ValueError("expected a stat line object or a list of them")
+            except ValueError as e:
+                self._reply(400, {"error": str(e)})
+                return
+            self._reply(200, service.rate(stat_lines))
+
+        def log_message(self, format, *args):
+            pass  # One line per request would cost more than the rating
+
+    return Handler
+
+
+def serve(service, host="127.0.0.1", port=8765):
+    """Serve service over HTTP until interrupted"""
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Rating service listening on http://{host}:{port} (POST /rate, GET /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rate custom stat lines over HTTP/JSON or from a CSV file")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on")
+    parser.add_argument("--cache-size", type=int, default=100_000, help="stat lines kept in the LRU cache")
+    parser.add_argument("--csv", help="rate the stat lines of this CSV file instead of serving")
+    parser.add_argument("--output", help="CSV file for the rated lines (default: <csv> rated.csv)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    service = RatingService(args.cache_size)
+    if args.csv:
+        players = rate_frame(service, pd.read_csv(args.csv))
+        output_file = args.output or args.csv.rsplit(".", 1)[0] + " rated.csv"
+        players.to_csv(output_file, index=False)
+        print(f"Rated {len(players)} stat lines in {time.perf_counter() - start:.2f}s: {output_file}")
+    else:
+        serve(service, args.host, args.port)
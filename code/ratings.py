@@ -0,0 +1,258 @@
+import numpy as np
+import pandas as pd
+
+import instrument
+
+# SherCo PLUS rating engine.
+#
+# Every rating in the "Rate Players" section of sherco_ratings.ipynb is either a
+# breakpoint grade (batting average, BAA, speed, caught stealing) or a two-dice
+# 11-66 number picked by a 0-36 rate. Both are done here on whole columns: grades
+# with np.searchsorted (the same rule as bisect) and dice numbers by indexing
+# precomputed lookup arrays with the rate.
+
+# Batter letter rating from batting average
+BATTER_BREAKPOINTS = np.array([
+    0.029, 0.057, 0.084, 0.112, 0.140, 0.168, 0.196,
+    0.223, 0.251, 0.279, 0.307, 0.335, 0.362, 0.390
+])
+BATTER_LETTERS = np.array([
+    "G", "G+", "F", "E", "E+", "D", "D+", "C",
+    "C+", "B", "B+", "A", "A+", "AA", "AAA"
+])
+
+# Pitcher letter rating from batting average against
+PITCHER_BREAKPOINTS = np.array([
+    0.140, 0.168, 0.196, 0.223, 0.251, 0.279, 0.307, 0.335, 0.362
+])
+PITCHER_LETTERS = np.array(["J+", "J", "K", "L", "M", "W", "X", "Y", "Z+", "Z"])
+
+# Speed rating from stolen bases per time on first
+SPEED_BREAKPOINTS = np.array([0.075, 0.100, 0.200, 0.300])
+SPEED_RATINGS = np.array(["", "*", "**", "***", "****"])
+
+# Catcher rating from caught stealing rate
+CS_BREAKPOINTS = np.array([0.21, 0.31, 0.41, 0.51])
+CS_RATINGS = np.array(["", "-1", "-2", "-3", "-4"])
+
+# Fielding thresholds by primary position
+SUPERIOR_FLD_PCT = {"P": 0.980, "C": 0.993, "1B": 0.995, "2B": 0.984, "3B": 0.971, "SS": 0.973, "OF": 0.990}
+ARM_ASSISTS_PER_G = {"P": 0.7, "1B": 0.7, "2B": 2.8, "3B": 2.0, "SS": 2.8, "OF": 0.08}
+RANGE_PUTOUTS_PER_G = {"P": 0.3, "1B": 8.3, "2B": 2.1, "3B": 0.8, "SS": 1.6, "OF": 2.1}
+
+# The 36 two-dice numbers in rate order (1 -> "11", 36 -> "66")
+DICE = [str(first) + str(second) for first in range(1, 7) for second in range(1, 7)]
+
+# Rates that fall outside 0-36 (or are missing) read this slot, which matches
+# what .map({...}).astype(str) gave in the notebook
+MISSING = "nan"
+
+
+def _dice_table(zero, numbers):
+    """Build a 0-36 lookup array with a trailing slot for missing rates"""
+    return np.array([zero] + list(numbers) + [MISSING])
+
+
+HR_NUMBERS = _dice_table("", DICE)
+TRIPLE_NUMBERS = _dice_table("", ["(" + d + ")" for d in DICE])
+BB_NUMBERS = _dice_table("n", DICE)
+K_NUMBERS = _dice_table("n", DICE)
+HBP_NUMBERS = _dice_table("", ["/" + d for d in DICE])
+PROBABLE_HIT_NUMBERS = _dice_table("66", DICE[::-1])
+BB_NUMBERS_PIT = _dice_table("11", DICE)
+CONTROL_NUMBERS = _dice_table("65", DICE[::-1][1:] + ["11"])
+
+
+def grade(values, breakpoints, grades):
+    """Grade each value by the breakpoint it falls under (same rule as bisect)"""
+    return grades[np.searchsorted(breakpoints, values, side="right")]
+
+
+def dice_lookup(rates, table):
+    """Look up the dice number for each 0-36 rate"""
+    rates = np.asarray(rates, dtype=float)
+    valid = (rates >= 0) & (rates <= 36) & (rates == np.floor(rates))
+    index = np.where(valid, rates, len(table) - 1).astype(np.intp)
+    return table[index]
+
+
+def dice_rate(numerator, denominator):
+    """Scale a per-event rate to the 36 outcomes of two dice"""
+    return np.round(numerator / denominator * 36, 0)
+
+
+def _fill_zero(values):
+    return np.where(np.isnan(values), 0, values)
+
+
+def _concat(*parts):
+    """Join string columns element-wise"""
+    result = parts[0]
+    for part in parts[1:]:
+        result = np.char.add(result, part)
+    return result
+
+
+def _column(strings, missing=None):
+    """Turn a string array into an object column, with NaN where a whole value is missing"""
+    column = strings.astype(object)
+    if missing is None:
+        missing = strings == MISSING
+    column[missing] = np.nan
+    return column
+
+
+def _values(players, name):
+    values = players[name]
+    if isinstance(values, np.ndarray) and values.dtype == float:
+        return values  # Already numeric, as rating_service passes its columns
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def prepare_players(players):
+    """Rename the summary columns and add the primary fielding position"""
+    players.rename(columns={
+        "Pos\xa0Summary": "Pos_Summary",
+        "Pos\xa0Summary_fld": "Pos_Summary_fld"
+    }, inplace=True)
+    # Split each distinct summary once rather than once per player
+    codes, summaries = pd.factorize(players["Pos_Summary_fld"])
+    primary = summaries.str.split("-").str[0].to_numpy(dtype=object)
+    players["Primary_Pos_fld"] = np.where(codes < 0, np.nan, primary[codes])
+    return players
+
+
+def batter_ratings(players):
+    """Return the batter rating strings and probable hit numbers"""
+    ba = _values(players, "BA")
+    h = _values(players, "H_bat")
+    pa = _values(players, "PA")
+
+    # Clutch rating
+    clutch = np.where(np.round(_values(players, "RBI") / _values(players, "G_bat"), 3) >= .6, "#", "")
+
+    # Letter rating
+    letter = grade(np.where(np.isnan(ba), 0.0, ba), BATTER_BREAKPOINTS, BATTER_LETTERS)
+
+    # HR and triple numbers
+    hr_rate = _fill_zero(dice_rate(_values(players, "HR_bat"), h))
+    triple_rate = _fill_zero(dice_rate(_values(players, "3B"), h))
+    triple_val = np.where(triple_rate > 0, hr_rate + triple_rate, 0)
+
+    # Speed rating
+    speed_score = np.round(_values(players, "SB") / (
+        (h + _values(players, "BB_bat") + _values(players, "HBP_bat")) -
+        (_values(players, "2B") + _values(players, "3B") + _values(players, "HR_bat"))), 3)
+    speed = grade(_fill_zero(speed_score), SPEED_BREAKPOINTS, SPEED_RATINGS)
+
+    # Base on balls, strikeout and HBP numbers
+    walk_rate = _fill_zero(dice_rate(_values(players, "BB_bat"), pa))
+    k_rate = _fill_zero(dice_rate(_values(players, "SO_bat"), pa))
+    k_val = np.where(k_rate > 0, walk_rate + k_rate, 0)
+    hbp_rate = _fill_zero(dice_rate(_values(players, "HBP_bat"), pa))
+    hbp_val = np.where(hbp_rate > 0, k_val + hbp_rate, 0)
+
+    # Probable hit number
+    hit_rate = _fill_zero(dice_rate(h, pa))
+
+    rating = _concat(clutch, letter, dice_lookup(hr_rate, HR_NUMBERS),
+                     dice_lookup(triple_val, TRIPLE_NUMBERS), speed,
+                     " [", dice_lookup(walk_rate, BB_NUMBERS), "-",
+                     dice_lookup(k_val, K_NUMBERS), dice_lookup(hbp_val, HBP_NUMBERS), "]")
+    return _column(rating), _column(dice_lookup(hit_rate, PROBABLE_HIT_NUMBERS))
+
+
+def pitcher_ratings(players):
+    """Return the pitcher rating strings, control numbers and probable hit numbers"""
+    ip = _values(players, "IP")
+    bf = _values(players, "BF")
+    h = _values(players, "H_pit")
+    bb = _values(players, "BB_pit")
+    hbp = _values(players, "HBP_pit")
+    wp = _values(players, "WP")
+    no_ip = np.isnan(ip)
+    no_bf = np.isnan(bf)
+
+    # Letter rating
+    baa = np.round(h / (bf - (bb + hbp)), 3)
+    letter = np.where(no_ip, "", grade(baa, PITCHER_BREAKPOINTS, PITCHER_LETTERS))
+
+    # Innings of effectiveness (IP is stored as .0, .1, .2 thirds)
+    ip_real = np.round(ip) + (10 * (ip - np.round(ip)) / 3)
+    ie = np.round(ip_real / _values(players, "G_pit"), 0)
+    ie = np.where(ie == 0, 1, ie)
+    ie_str = np.where(np.isnan(ie), "<NA>", _fill_zero(ie).astype(np.int64).astype(str))
+
+    # Base on balls, strikeout and HBP numbers
+    bb_rate = np.where(no_bf, np.nan, _fill_zero(dice_rate(bb, bf)))
+    k_rate = dice_rate(_values(players, "SO_pit"), bf)
+    k_val = np.where(k_rate == 0, 0, np.where(k_rate > 0, bb_rate + k_rate, np.nan))
+    hbp_rate = _fill_zero(dice_rate(hbp, bf))
+    hbp_val = np.where(hbp_rate == 0, 0, np.where(hbp_rate > 0, k_val + hbp_rate, np.nan))
+
+    # Wild pitch and gopher ball ratings
+    wp_num = np.where(wp >= 5, "[WP]", "")
+    hr_rate = _values(players, "HR_pit") / h
+    gopher = np.where(hr_rate <= .05, "-", np.where(hr_rate >= .1, "+", ""))
+
+    # Control and probable hit numbers
+    control_rate = dice_rate(bb + hbp + h, bf)
+    hit_rate = np.where(no_bf, np.nan, _fill_zero(dice_rate(h, bf)))
+
+    goph_lett_inn = np.where(no_ip, "", _concat(gopher, letter, ie_str))
+    bb_k_hbp = np.where(no_ip, "", _concat(
+        "(", dice_lookup(bb_rate, BB_NUMBERS_PIT), "-",
+        dice_lookup(k_val, K_NUMBERS), dice_lookup(hbp_val, HBP_NUMBERS), ") "))
+    rating = _concat(goph_lett_inn, " ", bb_k_hbp, " ", wp_num)
+    return (_column(rating, np.isnan(wp)),
+            _column(dice_lookup(control_rate, CONTROL_NUMBERS)),
+            _column(dice_lookup(hit_rate, PROBABLE_HIT_NUMBERS)))
+
+
+def _by_position(codes, positions, table, missing=np.nan):
+    """Look up each player's value in a per-position table from factorized positions"""
+    return np.array([table.get(position, missing) for position in positions] + [missing])[codes]
+
+
+def fielder_ratings(players):
+    """Return the fielder rating strings"""
+    # Each distinct position is looked up once
+    codes, positions = pd.factorize(players["Primary_Pos_fld"])
+    g_app = _values(players, "G_app")
+    sb_cat = _values(players, "SB_cat")
+    cs_cat = _values(players, "CS_cat")
+
+    # Superior rating
+    superior_pct = _by_position(codes, positions, SUPERIOR_FLD_PCT)
+    superior = np.where(_values(players, "Fld%") >= superior_pct, "S", "")
+
+    # Arm rating (catchers always get the strong arm)
+    arm_apg = _by_position(codes, positions, ARM_ASSISTS_PER_G)
+    catcher = _by_position(codes, positions, {"C": True}, False)
+    arm = np.where((_values(players, "A") / g_app >= arm_apg) | catcher, "9", "8")
+
+    # Range rating
+    range_pog = _by_position(codes, positions, RANGE_PUTOUTS_PER_G)
+    range_ = np.where(_values(players, "PO") / g_app >= range_pog, "5", "4")
+
+    # Catcher caught stealing rating
+    cs_num = grade(cs_cat / (sb_cat + cs_cat), CS_BREAKPOINTS, CS_RATINGS)
+    cs_num = np.where(np.isnan(_values(players, "G_cat")) | (sb_cat == 0), "", cs_num)
+
+    return _column(_concat(superior, arm, range_, " ", cs_num), np.zeros(len(codes), dtype=bool))
+
+
+def rate_players(players):
+    """Add batter, pitcher and fielder rating columns to a players frame"""
+    rows = len(players)
+    if "Primary_Pos_fld" not in players:
+        with instrument.stage("rate.prepare", rows):
+            prepare_players(players)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        with instrument.stage("rate.batters", rows):
+            players["batter_rating"], players["PH_num_bat"] = batter_ratings(players)
+        with instrument.stage("rate.pitchers", rows):
+            players["pitcher_rating"], players["PCN"], players["PPH"] = pitcher_ratings(players)
+        with instrument.stage("rate.fielders", rows):
+            players["fielder_rating"] = fielder_ratings(players)
+    return players
@@ -0,0 +1,235 @@
+import argparse
+import glob
+import json
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Cross-season index of rated rosters.
+#
+# Every "<year> rosters formatted.xlsx" in the data folder is read once (the
+# seasons in parallel) into one table, saved as ratings.parquet with an
+# index.json listing the workbook each season came from. Updating re-reads only
+# the seasons whose workbook is new or has changed. Opening the index loads the
+# table once and sorts folded full and last names, so a name prefix is a binary
+# search and team, position, grade and year filters are masks over arrays.
+
+default_data_dir = os.path.join('..', 'data')
+default_index_dir = os.path.join('..', 'data', 'ratings index')
+
+_season_file = re.compile(r'^(\d{4}) rosters +formatted\.xlsx$')
+
+text_columns = ["Name", "Tm", "Positions", "DEF", "Batter Rating", "B", "Pitcher Rating", "T", "Primary"]
+
+# Letter grades at the start of the rating strings
+_batter_grade = r'^#?(AAA|AA|[A-G]\+?)'
+_pitcher_grade = r'^[+-]?([JKLMWXYZ]\+?)'
+
+
+def fold(names):
+    """Lower-case names without accents, for prefix searches"""
+    return [unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower() for name in names]
+
+
+def season_files(data_dir=default_data_dir):
+    """Return {year: workbook} for the formatted roster workbooks in a folder
+
+    When a year has several workbooks (e.g. with one or two spaces before
+    "formatted"), the most recently modified is used.
+    """
+    files = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, '*rosters*formatted.xlsx'))):
+        match = _season_file.match(os.path.basename(path))
+        if match is None:
+            continue
+        year = match.group(1)
+        if year not in files or os.path.getmtime(path) >= os.path.getmtime(files[year]):
+            files[year] = path
+    return dict(sorted(files.items()))
+
+
+def _source(path):
+    stat = os.stat(path)
+    return {"file": os.path.basename(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def read_season(year, path):
+    """Read every team sheet of one season's workbook into index rows"""
+    season = pd.concat(pd.read_excel(path, sheet_name=None, skiprows=1).values(), ignore_index=True)
+    season = season.drop(columns=["ID"], errors="ignore")
+    for column in season.columns:
+        if column in text_columns:
+            season[column] = season[column].fillna("").astype(str).str.strip()
+        else:
+            season[column] = pd.to_numeric(season[column], errors="coerce")
+    season.insert(0, "year", np.int16(year))
+    season["batter_grade"] = season["Batter Rating"].str.extract(_batter_grade, expand=False).fillna("")
+    season["pitcher_grade"] = season["Pitcher Rating"].str.extract(_pitcher_grade, expand=False).fillna("")
+    return season
+
+
+def _read_seasons(seasons, workers):
+    if len(seasons) <= 1 or workers == 1:
+        return [read_season(year, path) for year, path in seasons.items()]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(read_season, seasons.keys(), seasons.values()))
+
+
+def update_index(data_dir=default_data_dir, index_dir=default_index_dir, workers=None, rebuild=False):
+    """Add new or changed seasons from the data folder to the index, and return their years"""
+    meta_file = os.path.join(index_dir, 'index.json')
+    table_file = os.path.join(index_dir, 'ratings.parquet')
+    sources = {}
+    ratings = None
+    if not rebuild and os.path.exists(meta_file):
+        with open(meta_file) as f:
+            sources = json.load(f)["sources"]
+        ratings = pd.read_parquet(table_file)
+
+    files = season_files(data_dir)
+    changed = {year: path for year, path in files.items() if sources.get(year) != _source(path)}
+    removed = [year for year in sources if year not in files]
+    if not changed and not removed and ratings is not None:
+        return []
+
+    # Replace the changed seasons and drop seasons whose workbook is gone
+    frames = _read_seasons(changed, workers)
+    if ratings is not None:
+        stale = ratings["year"].astype(str).isin(list(changed) + removed)
+        frames.insert(0, ratings[~stale])
+    ratings = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["year"])
+    ratings = ratings.sort_values(["year", "Tm"], kind="stable", ignore_index=True)
+
+    os.makedirs(index_dir, exist_ok=True)
+    ratings.to_parquet(table_file, index=False)
+    with open(meta_file, 'w') as f:
+        json.dump({"sources": {year: _source(path) for year, path in files.items()}}, f)
+    return sorted(changed)
+
+
+class RatingsIndex:
+    def __init__(self, index_dir=default_index_dir):
+        """Open an index built by update_index"""
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, 'index.json')) as f:
+            self.sources = json.load(f)["sources"]
+        self.ratings = pd.read_parquet(os.path.join(index_dir, 'ratings.parquet'))
+
+        # Folded full and last names, each sorted with the rows they belong to
+        names = np.array(fold(self.ratings["Name"]))
+        last_names = np.array([name.rsplit(" ", 1)[-1] for name in names])
+        self._name_keys = []
+        for keys in (names, last_names):
+            order = np.argsort(keys, kind="stable")
+            self._name_keys.append((keys[order], order))
+
+        self._year = self.ratings["year"].to_numpy()
+        self._team = self.ratings["Tm"].to_numpy(dtype=str)
+        self._primary = self.ratings["Primary"].to_numpy(dtype=str)
+        # Dashes around the position list, so "-SS-" finds SS anywhere in it
+        self._positions = np.char.add(np.char.add("-", self.ratings["Positions"].to_numpy(dtype=str)), "-")
+        self._batter_grade = self.ratings["batter_grade"].to_numpy(dtype=str)
+        self._pitcher_grade = self.ratings["pitcher_grade"].to_numpy(dtype=str)
+
+    def __len__(self):
+        return len(self.ratings)
+
+    def seasons(self):
+        """Return the indexed years"""
+        return sorted(int(year) for year in self.sources)
+
+    def _name_rows(self, name):
+        """Rows whose full or last name starts with name"""
+        prefix = fold([name])[0]
+        rows = []
+        for keys, order in self._name_keys:
+            start = np.searchsorted(keys, prefix, side="left")
+            end = np.searchsorted(keys, prefix + "\uffff", side="left")
+            rows.append(order[start:end])
+        return np.union1d(*rows)
+
+    def search(self, name=None, team=None, position=None, batter_grade=None, pitcher_grade=None,
+               years=None, any_position=False, totals=False):
+        """Return the rated players matching every given filter, by year and team
+
+        name is a prefix of the full or last name, ignoring case and accents.
+        team, position and the grades may be one value or a list. position
+        matches the primary position, or any listed position with any_position.
+        years is a (first, last) range or a list of years. Multi-team season
+        totals (team TOT) are left out unless totals is set.
+        """
+        mask = np.ones(len(self), dtype=bool) if totals else self._team != "TOT"
+        if name:
+            named = np.zeros(len(self), dtype=bool)
+            named[self._name_rows(name)] = True
+            mask &= named
+
+        def one_of(values, wanted):
+            return np.isin(values, [wanted] if isinstance(wanted, str) else list(wanted))
+
+        if team is not None:
+            mask &= one_of(self._team, team)
+        if batter_grade is not None:
+            mask &= one_of(self._batter_grade, batter_grade)
+        if pitcher_grade is not None:
+            mask &= one_of(self._pitcher_grade, pitcher_grade)
+        if position is not None:
+            wanted = [position] if isinstance(position, str) else list(position)
+            played = one_of(self._primary, wanted)
+            if any_position:
+                for pos in wanted:
+                    played |= np.char.find(self._positions, f"-{pos}-") >= 0
+            mask &= played
+        if years is not None:
+            if isinstance(years, tuple):
+                mask &= (self._year >= int(years[0])) & (self._year <= int(years[1]))
+            else:
+                mask &= np.isin(self._year, [int(year) for year in years])
+        return self.ratings[mask]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and search the cross-season ratings index")
+    parser.add_argument("--data-dir", default=default_data_dir, help="folder of '<year> rosters formatted.xlsx' files")
+    parser.add_argument("--index-dir", default=default_index_dir, help="folder holding the index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    update = commands.add_parser("update", help="index new or changed seasons")
+    update.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    update.add_argument("--rebuild", action="store_true", help="re-read every season")
+
+    search = commands.add_parser("search", help="find rated players, e.g. search --position SS --batter-grade AA")
+    search.add_argument("--name", help="prefix of the full or last name")
+    search.add_argument("--team", nargs="+")
+    search.add_argument("--position", nargs="+")
+    search.add_argument("--any-position", action="store_true", help="match any listed position, not just primary")
+    search.add_argument("--batter-grade", nargs="+", help="batter letter grades, e.g. AA A+")
+    search.add_argument("--pitcher-grade", nargs="+", help="pitcher letter grades, e.g. J+ J")
+    search.add_argument("--years", help="year range, e.g. 1955-2020")
+    search.add_argument("--totals", action="store_true", help="include multi-team season totals (TOT)")
+
+    args = parser.parse_args()
+    pd.set_option("display.width", 200)
+
+    if args.command == "update":
+        start = time.perf_counter()
+        years = update_index(args.data_dir, args.index_dir, args.workers, args.rebuild)
+        print(f"Indexed {', '.join(years) if years else 'no new seasons'} in {time.perf_counter() - start:.1f} s")
+    else:
+        index = RatingsIndex(args.index_dir)
+        years = None
+        if args.years:
+            first, _, last = args.years.partition("-")
+            years = (first, last or first)
+        start = time.perf_counter()
+        found = index.search(args.name, args.team, args.position, args.batter_grade, args.pitcher_grade, years,
+                             args.any_position, args.totals)
+        elapsed = time.perf_counter() - start
+        print(found[["year", "Name", "Tm", "Primary", "Positions", "DEF", "Batter Rating", "Pitcher Rating"]]
+              .to_string(index=False))
+        print(f"\n{len(found)} players of {len(index)} in {elapsed * 1000:.1f} ms")
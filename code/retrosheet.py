@@ -0,0 +1,293 @@
+import argparse
+import functools
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import h2h
+
+# Retrosheet event files parsed straight into compact play arrays.
+#
+# Each play record of the event files (.EVA/.EVN/.EVE, one per team and
+# season, or per postseason round) becomes one row of typed columns; "NP"
+# records, which only mark substitutions, are left out. Player and game IDs
+# are interned, so a play takes 22 bytes:
+#   batter, pitcher   int32 codes into players.npy, -1 for a pitcher not yet listed
+#   game              int32 code into games.npy
+#   event             int8 Retrosheet event type (see event_types)
+#   balls, strikes    int8 count before the last pitch, -1 when unknown
+#   inning            int8
+#   home              int8, 1 when the home team bats
+#   bat_hand, pit_hand int8 index into hands; a switch hitter bats opposite the pitcher
+#   month             int8
+#   gametype          int8 index into gametypes
+#   sac               int8, 1 for a sacrifice hit and 2 for a sacrifice fly
+# Files are parsed in worker processes and their codes merged, and the arrays
+# are saved as .npy files in a folder that Plays opens with mmap_mode='r'.
+# Batting and throwing hands come from the .ROS roster files next to the
+# event files, and the game type from the event file name (e.g. 1995WS.EVE).
+#
+#   python retrosheet.py "../data/1995eve/*.EV*" --output "../data/1995 plays"
+
+# Retrosheet's event type codes
+event_types = {
+    0: "unknown", 2: "out", 3: "strikeout", 4: "stolen base", 5: "defensive indifference", 6: "caught stealing",
+    8: "pickoff", 9: "wild pitch", 10: "passed ball", 11: "balk", 12: "other advance", 13: "foul error",
+    14: "walk", 15: "intentional walk", 16: "hit by pitch", 17: "interference", 18: "error", 19: "fielder's choice",
+    20: "single", 21: "double", 22: "triple", 23: "home run",
+}
+
+hands = ["?", "L", "R"]
+gametypes = ["regular"] + h2h.postseason_gametypes
+
+# Event file names of postseason rounds and All-Star games after the year, e.g. WS, ALCS or NLDS1;
+# regular season files are named by team
+_file_gametypes = re.compile(r"(?:AL|NL|L)?(WC|DS|CS|WS|AS)\d*$")
+_round_gametypes = {"WC": "wildcard", "DS": "divisionseries", "CS": "lcs", "WS": "worldseries", "AS": "allstar"}
+
+fields = ["batter", "pitcher", "game", "event", "balls", "strikes", "inning", "home", "bat_hand", "pit_hand",
+          "month", "gametype", "sac"]
+_dtypes = {"batter": np.int32, "pitcher": np.int32, "game": np.int32}
+
+# Events ending a plate appearance, and the h2h count columns each one adds to
+_pa_events = [2, 3, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23]
+_event_counts = {20: ["single"], 21: ["double"], 22: ["triple"], 23: ["hr"], 14: ["walk"], 15: ["walk", "iw"],
+                 16: ["hbp"], 3: ["k"], 17: ["xi"]}
+
+# Basic plays by their leading letters, longest first; a leading digit is an out,
+# except for 99, a play whose outcome is unknown
+_prefixes = [("FLE", 13), ("POCS", 8), ("DGR", 21), ("SB", 4), ("CS", 6), ("PO", 8), ("DI", 5), ("OA", 12),
+             ("WP", 9), ("PB", 10), ("BK", 11), ("HP", 16), ("HR", 23), ("IW", 15), ("FC", 19), ("SH", 2),
+             ("SF", 2), ("K", 3), ("W", 14), ("I", 15), ("C", 17), ("E", 18), ("S", 20), ("D", 21), ("T", 22),
+             ("H", 23)]
+
+
+@functools.lru_cache(maxsize=None)
+def classify(event):
+    """Return the event type and sacrifice flag of a play's event field"""
+    description = event.split(".", 1)[0].replace("!", "").replace("#", "").replace("?", "")
+    basic, *modifiers = description.split("/")
+    if basic == "99":
+        event_type = 0
+    elif basic[:1].isdigit():
+        event_type = 2
+    else:
+        event_type = next((code for prefix, code in _prefixes if basic.startswith(prefix)), 0)
+    sac = 1 if "SH" in modifiers or basic == "SH" else 2 if "SF" in modifiers or basic == "SF" else 0
+    return event_type, sac
+
+
+def file_gametype(path):
+    """Game type of the games in an event file, from its name"""
+    match = _file_gametypes.match(os.path.basename(path).split(".")[0].lstrip("0123456789").upper())
+    return _round_gametypes[match.group(1)] if match else "regular"
+
+
+def read_roster_hands(folder):
+    """Return {player: (bats, throws)} from the .ROS files in a folder"""
+    player_hands = {}
+    for name in sorted(os.listdir(folder)):
+        if name.upper().endswith(".ROS"):
+            with open(os.path.join(folder, name), encoding="latin-1") as f:
+                for line in f:
+                    parts = line.rstrip("\r\n").split(",")
+                    if len(parts) >= 5:
+                        player_hands[parts[0]] = (parts[3], parts[4])
+    return player_hands
+
+
+def _hand(hand):
+    return 1 if hand == "L" else 2 if hand == "R" else 0
+
+
+def parse_file(path, player_hands=None):
+    """Parse one event file into play arrays with file-local player and game codes
+
+    Returns (columns, players, games), where players and games are the IDs
+    of the local codes.
+    """
+    player_hands = player_hands or {}
+    players = {}
+    games = []
+    rows = []
+    gametype = gametypes.index(file_gametype(path))
+    pitchers = [None, None]  # By fielding team, 0 for the visitors
+    adjusted = {}  # badj and padj hands for the next plate appearance
+    month = 0
+
+    with open(path, encoding="latin-1") as f:
+        for line in f:
+            kind = line[:4]
+            if kind == "play":
+                _, inning, team, batter, count, _, event = line.rstrip("\r\n").split(",", 6)
+                event_type, sac = classify(event)
+                if event_type == 0 and event.startswith("NP"):
+                    continue
+                pitcher = pitchers[1 - int(team)]
+                pit_hand = _hand(adjusted.get(pitcher) or player_hands.get(pitcher, "??")[1])
+                bats = adjusted.get(batter) or player_hands.get(batter, "??")[0]
+                if bats == "B":
+                    bats = "R" if pit_hand == 1 else "L" if pit_hand == 2 else "?"
+                rows.append((players.setdefault(batter, len(players)),
+                             players.setdefault(pitcher, len(players)) if pitcher else -1,
+                             len(games) - 1, event_type,
+                             int(count[0]) if count[:1].isdigit() else -1,
+                             int(count[1]) if count[1:2].isdigit() else -1,
+                             int(inning), int(team), _hand(bats), pit_hand, month, gametype, sac))
+                if event_type in _pa_events:
+                    adjusted.pop(batter, None)
+                    adjusted.pop(pitcher, None)
+            elif kind in ("star", "sub,"):
+                # start,player,"name",team,batting order,position; names may contain commas
+                parts = line.rstrip("\r\n").split(",")
+                if parts[-1] == "1":
+                    pitchers[int(parts[-3])] = parts[1]
+            elif kind in ("badj", "padj"):
+                _, player, hand = line.rstrip("\r\n").split(",")[:3]
+                adjusted[player] = hand
+            elif line.startswith("id,"):
+                game = line[3:].strip()
+                games.append(game)
+                month = int(game[7:9]) if game[7:9].isdigit() else 0
+                pitchers = [None, None]
+                adjusted = {}
+
+    rows = np.array(rows, dtype=np.int32).reshape(-1, len(fields))
+    columns = {field: rows[:, i].astype(_dtypes.get(field, np.int8)) for i, field in enumerate(fields)}
+    return columns, list(players), games
+
+
+def _parse_file(path):
+    return parse_file(path, read_roster_hands(os.path.dirname(path) or "."))
+
+
+def parse_events(paths, workers=None):
+    """Parse event files (names or glob patterns) in parallel and merge them into one set of play arrays
+
+    Returns (columns, players, games) with codes into the players and games ID lists.
+    """
+    files = h2h.expand_paths(paths)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parsed = list(executor.map(_parse_file, files))
+
+    player_codes = {}
+    game_codes = {}
+    columns = {field: [] for field in fields}
+    for file_columns, file_players, file_games in parsed:
+        # Re-code the file's players and games against the merged lists
+        players = np.array([player_codes.setdefault(player, len(player_codes)) for player in file_players] + [-1],
+                           dtype=np.int32)
+        games = np.array([game_codes.setdefault(game, len(game_codes)) for game in file_games] + [-1],
+                         dtype=np.int32)
+        for field in fields:
+            values = file_columns[field]
+            if field in ("batter", "pitcher"):
+                values = players[values]
+            elif field == "game":
+                values = games[values]
+            columns[field].append(values)
+    columns = {field: np.concatenate(values) if values else np.empty(0, _dtypes.get(field, np.int8))
+               for field, values in columns.items()}
+    return columns, list(player_codes), list(game_codes)
+
+
+def save_plays(plays_dir, columns, players, games, files=()):
+    """Write play arrays as .npy files that Plays can memory-map"""
+    os.makedirs(plays_dir, exist_ok=True)
+    for field, values in columns.items():
+        np.save(os.path.join(plays_dir, field + ".npy"), values)
+    # Fixed-width strings, since object arrays cannot be memory-mapped
+    np.save(os.path.join(plays_dir, "players.npy"), np.asarray(players, dtype=str))
+    np.save(os.path.join(plays_dir, "games.npy"), np.asarray(games, dtype=str))
+    with open(os.path.join(plays_dir, "plays.json"), "w") as f:
+        json.dump({"fields": list(columns), "plays": len(columns["event"]), "hands": hands, "gametypes": gametypes,
+                   "files": [os.path.basename(path) for path in files]}, f)
+    return plays_dir
+
+
+def build_plays(paths, plays_dir, workers=None):
+    """Parse event files and save their play arrays to plays_dir"""
+    columns, players, games = parse_events(paths, workers)
+    return save_plays(plays_dir, columns, players, games, h2h.expand_paths(paths))
+
+
+class Plays:
+    def __init__(self, plays_dir):
+        """Open play arrays saved by save_plays"""
+        self.plays_dir = plays_dir
+        with open(os.path.join(plays_dir, "plays.json")) as f:
+            meta = json.load(f)
+        self.fields = meta["fields"]
+        self.gametypes = meta["gametypes"]
+        self.hands = meta["hands"]
+        self.files = meta["files"]
+        self.players = np.load(os.path.join(plays_dir, "players.npy"), mmap_mode="r")
+        self.games = np.load(os.path.join(plays_dir, "games.npy"), mmap_mode="r")
+        for field in self.fields:
+            setattr(self, field, np.load(os.path.join(plays_dir, field + ".npy"), mmap_mode="r"))
+
+    def __len__(self):
+        return len(self.event)
+
+    def counts(self, columns=h2h.columns_to_sum):
+        """Return the h2h count columns of every play as an int8 array, one row per play"""
+        table = np.zeros((max(event_types) + 1, len(columns)), dtype=np.int8)
+        for event in _pa_events:
+            for column in ["pa", "ab"] + _event_counts.get(event, []):
+                if column in columns:
+                    table[event, columns.index(column)] = 1
+        counts = table[self.event]
+        sac = np.asarray(self.sac)
+        for flag, column in [(1, "sh"), (2, "sf")]:
+            if column in columns:
+                counts[:, columns.index(column)] = sac == flag
+        if "ab" in columns:
+            # At bats are plate appearances less walks, hit batters, sacrifices and interference
+            not_ab = [columns.index(column) for column in ["walk", "hbp", "sh", "sf", "xi"] if column in columns]
+            counts[:, columns.index("ab")] &= ~counts[:, not_ab].any(axis=1)
+        return counts
+
+    def frame(self, columns=h2h.columns_to_sum):
+        """Return the plays as a DataFrame like the exported play files
+
+        Player, game, hand and game type columns are categorical and the
+        counts int8, so it takes a fraction of the memory of the CSV.
+        """
+        def categorical(codes, categories):
+            return pd.Categorical.from_codes(np.asarray(codes), categories=pd.Index(categories))
+
+        frame = pd.DataFrame({
+            "gid": categorical(self.game, self.games.astype(object)),
+            "inning": np.asarray(self.inning),
+            "top_bot": np.asarray(self.home),
+            "batter": categorical(self.batter, self.players.astype(object)),
+            "pitcher": categorical(self.pitcher, self.players.astype(object)),
+            "bathand": categorical(self.bat_hand, self.hands),
+            "pithand": categorical(self.pit_hand, self.hands),
+            "event": np.asarray(self.event),
+            "balls": np.asarray(self.balls),
+            "strikes": np.asarray(self.strikes),
+            "month": np.asarray(self.month),
+            "gametype": categorical(self.gametype, self.gametypes),
+        })
+        frame[list(columns)] = self.counts(columns)
+        return frame
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse Retrosheet event files into memory-mappable play arrays")
+    parser.add_argument("event_files", nargs="+", help="event files or glob patterns, e.g. ../data/1995eve/*.EV*")
+    parser.add_argument("--output", required=True, help="folder for the play arrays, e.g. '../data/1995 plays'")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    plays_dir = build_plays(args.event_files, args.output, args.workers)
+    plays = Plays(plays_dir)
+    print(f"Parsed {len(plays)} plays by {len(plays.players)} players in {len(plays.games)} games from "
+          f"{len(plays.files)} files in {time.perf_counter() - start:.2f}s: {plays_dir}")
@@ -0,0 +1,312 @@
+import pandas as pd
+import numpy as np
+import io
+from copy import copy
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Border, Side, PatternFill, Font, Alignment
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.filters import AutoFilter
+from openpyxl.worksheet.table import Table, TableColumn, TableStyleInfo
+
+import pdf_writer
+
+# Team roster sheets and the formatted "<year> rosters formatted.xlsx" workbook,
+# ported from the "Save teams to separate Excel tabs" and "Format Excel file"
+# sections of sherco_ratings.ipynb
+
+team_dict = {
+    "ANA": "Anaheim Angels",
+    "ARI": "Arizona Diamondbacks",
+    "ATL": "Atlanta Braves",
+    "BAL": "Baltimore Orioles",
+    "BOS": "Boston Red Sox",
+    "BRO": "Brooklyn Dodgers",
+    "CAL": "California Angels",
+    "CHC": "Chicago Cubs",
+    "CHW": "Chicago White Sox",
+    "CIN": "Cincinnati Reds",
+    "CLE": "Cleveland Indians",
+    "COL": "Colorado Rockies",
+    "DET": "Detroit Tigers",
+    "FLA": "Florida Marlins",
+    "HOU": "Houston Astros",
+    "KCA": "Kansas City Athletics",
+    "KCR": "Kansas City Royals",
+    "LAA": "Los Angeles Angels",
+    "LAD": "Los Angeles Dodgers",
+    "MIA": "Miami Marlins",
+    "MLN": "Milwaukee Braves",
+    "MIL": "Milwaukee Brewers",
+    "MIN": "Minnesota Twins",
+    "MON": "Montreal Expos",
+    "NYG": "New York Giants",
+    "NYM": "New York Mets",
+    "NYY": "New York Yankees",
+    "OAK": "Oakland A's",
+    "PHI": "Philadelphia Phillies",
+    "PIT": "Pittsburgh Pirates",
+    "SDP": "San Diego Padres",
+    "SEA": "Seattle Mariners",
+    "SEP": "Seattle Pilots",
+    "SFG": "San Francisco Giants",
+    "STL": "St. Louis Cardinals",
+    "TBD": "Tampa Bay Devil Rays",
+    "TBR": "Tampa Bay Rays",
+    "TEX": "Texas Rangers",
+    "TOR": "Toronto Blue Jays",
+    "TOT": "Muli-team Totals",
+    "WSN": "Washington Nationals",
+    "WSA": "Washington Senators",
+    "WSH": "Washington Senators"
+}
+
+roster_columns = ["Name", "Age", "Tm", "Games_Played", "GS", "GF", "Pos_Summary_fld",
+                  "fielder_rating", "batter_rating", "PH_num_bat", "Bats", "pitcher_rating", "PCN",
+                  "PPH", "Throws", "Primary_Pos_fld", "P", "C", "1B", "2B_app", "3B_app", "SS",
+                  "LF", "CF", "RF", "OF", "DH", "PH", "PR"]
+
+roster_names = {
+    "Games_Played": "G",
+    "Pos_Summary_fld": "Positions",
+    "fielder_rating": "DEF",
+    "batter_rating": "Batter Rating",
+    "PH_num_bat": "BPH",
+    "Bats": "B",
+    "pitcher_rating": "Pitcher Rating",
+    "Throws": "T",
+    "Primary_Pos_fld": "Primary",
+    "2B_app": "2B",
+    "3B_app": "3B"
+}
+
+pos_cat_dtype = pd.api.types.CategoricalDtype(categories=["C", "1B", "2B", "3B", "SS", "OF", "DH_PH_PR", "P", ""],
+                                              ordered=True)
+
+# Column widths A:AD of the formatted roster sheets
+column_widths = [6, 22, 4, 5, 5, 4, 4, 14, 8, 24, 5, 3, 24, 5, 5, 3, 12] + [5] * 13
+
+
+def roster_frame(players):
+    """Return the roster columns of rated players, sorted by team and position"""
+    if 'DH' not in players:
+        players['DH'] = 0
+
+    # fix games played column
+    players["Games_Played"] = np.where(players["Primary_Pos_fld"] == "P", players["G_pit"], players["G_bat"])
+
+    # Scraped players are unique by player ID and team; by name for older frames
+    by_id = "player_id" in players and players["player_id"].notna().all()
+    key = ["player_id", "Tm"] if by_id else ["Name", "Tm"]
+    players_short = players.loc[~players.duplicated(key), roster_columns].rename(columns=roster_names)
+    players_short["Primary"] = players_short["Primary"].replace(np.nan, "DH_PH_PR").astype(pos_cat_dtype)
+    players_short = players_short.astype(object).fillna("")
+    players_short["Primary"] = players_short["Primary"].astype(pos_cat_dtype)
+    players_short["Name"] = players_short["Name"].str.replace("\xa0", " ")
+    players_short = players_short.sort_values(["Tm", "Primary", "G", "GS", "GF"],
+                                              ascending=(True, True, False, False, False))
+    return players_short
+
+
+def format_rosters(wb, year):
+    """Add the title row, table style, widths and fonts to every team sheet"""
+    header_fill = openpyxl.styles.colors.Color(rgb='00FFFFFF')
+    style = TableStyleInfo(name="TableStyleMedium9", showFirstColumn=False,
+                           showLastColumn=False, showRowStripes=True, showColumnStripes=False)
+    border = Border(left=Side(border_style='thin', color='FF000000'),
+                    right=Side(border_style='thin', color='FF000000'),
+                    top=Side(border_style='thin', color='FF000000'),
+                    bottom=Side(border_style='thin', color='FF000000')
+    )
+    alignment = Alignment(horizontal='center')
+
+    for sheet in wb:
+        sheetname = sheet.title
+        sheet.insert_rows(1)
+        row_count = sheet.max_row
+        column_count = sheet.max_column
+        max_cell = "A2:" + str(get_column_letter(column_count)) + str(row_count) + ""
+
+        sheet.merge_cells('A1:AD1')
+        sheet['A1'].alignment = Alignment(horizontal='center')
+        sheet['A1'].fill = PatternFill(patternType='solid', fgColor=header_fill)
+        sheet['A1'].value = year + ' ' + team_dict[sheetname]
+        sheet['A2'].value = "ID"
+        tab = Table(displayName="Table" + sheetname, ref=max_cell)
+        tab.tableStyleInfo = style
+        sheet.add_table(tab)
+        for col, width in enumerate(column_widths, start=1):
+            sheet.column_dimensions[get_column_letter(col)].width = width
+
+        rows = sheet[max_cell]
+        for row in rows:
+            for cell in row:
+                cell.border = border
+                cell.alignment = alignment
+                cell.font = Font(size = 14)
+
+        sheet['A1'].font = Font(size = 32, bold = True, color='005A80B8')
+        for col in range(1, len(column_widths) + 1):
+            sheet.cell(row=2, column=col).font = Font(size = 14, bold = True, color='00FFFFFF')
+
+    return wb
+
+
+def _roster_styles(sheet):
+    """Return the style IDs of the title, header and body cells, registered once per workbook"""
+    border = Border(left=Side(border_style='thin', color='FF000000'),
+                    right=Side(border_style='thin', color='FF000000'),
+                    top=Side(border_style='thin', color='FF000000'),
+                    bottom=Side(border_style='thin', color='FF000000')
+    )
+    title = WriteOnlyCell(sheet)
+    title.alignment = Alignment(horizontal='center')
+    title.fill = PatternFill(patternType='solid', fgColor=openpyxl.styles.colors.Color(rgb='00FFFFFF'))
+    title.font = Font(size = 32, bold = True, color='005A80B8')
+    header = WriteOnlyCell(sheet)
+    header.border = border
+    header.alignment = Alignment(horizontal='center')
+    header.font = Font(size = 14, bold = True, color='00FFFFFF')
+    body = WriteOnlyCell(sheet)
+    body.border = border
+    body.alignment = Alignment(horizontal='center')
+    body.font = Font(size = 14)
+    return title._style, header._style, body._style
+
+
+def _styled_cell(sheet, value, style):
+    cell = WriteOnlyCell(sheet, value=None if isinstance(value, str) and value == "" else value)
+    cell._style = copy(style)
+    return cell
+
+
+def stream_rosters(players_short, year, output_file):
+    """Write the formatted roster workbook in one pass with openpyxl's write-only mode
+
+    The sheets look the same as format_rosters output, but the title row,
+    widths, merge and table are set up front and each row is styled as it is
+    written, so no sheet is ever held in memory or restyled afterwards.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    style = TableStyleInfo(name="TableStyleMedium9", showFirstColumn=False,
+                           showLastColumn=False, showRowStripes=True, showColumnStripes=False)
+    header_names = ["ID"] + [str(column) for column in players_short.columns]
+
+    for team, roster in players_short.groupby('Tm', observed=True):
+        sheet = wb.create_sheet(title=team)
+        title, header, body = _roster_styles(sheet)
+        max_cell = "A2:" + get_column_letter(len(header_names)) + str(len(roster) + 2)
+
+        for col, width in enumerate(column_widths, start=1):
+            sheet.column_dimensions[get_column_letter(col)].width = width
+        sheet.merged_cells.add('A1:AD1')
+        tab = Table(displayName="Table" + team, ref=max_cell, autoFilter=AutoFilter(ref=max_cell),
+                    tableColumns=[TableColumn(id=i, name=name) for i, name in enumerate(header_names, start=1)])
+        tab.tableStyleInfo = style
+        sheet.tables.add(tab)  # add_table warns in write-only mode even when the columns are given
+
+        sheet.append([_styled_cell(sheet, year + ' ' + team_dict.get(team, team), title)])
+        sheet.append([_styled_cell(sheet, name, header) for name in header_names])
+        for row in roster.itertuples(name=None):
+            sheet.append([_styled_cell(sheet, value, body) for value in row])
+
+    wb.save(output_file)
+    return output_file
+
+
+# Roster PDF pages: landscape letter, with the sheet's rows and column widths
+# (in points, for 14 point text) scaled to fit between the margins
+pdf_margin = 36
+pdf_title_height = 42
+pdf_row_height = 18.75
+pdf_header_fill = '4F81BD'  # TableStyleMedium9 header and stripes
+pdf_stripe_fill = 'DCE6F1'
+
+
+def _pdf_column_edges():
+    """Left edge of each roster column and the right edge of the last, in points"""
+    edges = [0]
+    for width in column_widths:
+        edges.append(edges[-1] + (width * 7 + 5) * 0.75)  # Excel character widths to pixels to points
+    return edges
+
+
+def _pdf_row(edges, fill=None):
+    """Content stream of one bordered roster row, optionally filled"""
+    right = edges[-1]
+    content = ""
+    if fill:
+        content += f"{pdf_writer.color(fill)} rg 0 0 {right:.2f} {pdf_row_height} re f\n"
+    content += "0.5 w 0 0 0 RG "
+    content += "".join(f"{x:.2f} 0 m {x:.2f} {pdf_row_height} l " for x in edges)
+    content += f"0 0 m {right:.2f} 0 l 0 {pdf_row_height} m {right:.2f} {pdf_row_height} l S\n"
+    return content.encode()
+
+
+def _pdf_value(value):
+    """Text of a roster value as the workbook shows it"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return "" if pd.isna(value) else str(value)
+
+
+def write_rosters_pdf(players_short, year, output_file):
+    """Write the formatted rosters as a PDF, one or more landscape pages per team
+
+    Each page has the team title, the header row and striped, bordered rows
+    like the workbook's sheets. The header and the two kinds of row are drawn
+    once as forms, and pages are written to disk as they are finished.
+    """
+    width, height = pdf_writer.LANDSCAPE_LETTER
+    edges = _pdf_column_edges()
+    scale = (width - 2 * pdf_margin) / edges[-1]
+    page_rows = int(((height - 2 * pdf_margin) / scale - pdf_title_height) / pdf_row_height) - 1
+    header_names = ["ID"] + [str(column) for column in players_short.columns]
+    centers = [(left + right) / 2 for left, right in zip(edges, edges[1:])]
+
+    with pdf_writer.PdfWriter(output_file) as pdf:
+        regular = (pdf.font("Helvetica"), "Helvetica")
+        bold = (pdf.font("Helvetica-Bold"), "Helvetica-Bold")
+        baseline = (pdf_row_height - 0.7 * 14) / 2
+        header = pdf.form(_pdf_row(edges, pdf_header_fill) + b"1 1 1 rg " + b"".join(
+            pdf_writer.text(bold, 14, x, baseline, name, "center") for x, name in zip(centers, header_names)),
+            edges[-1], pdf_row_height)
+        rows = {True: pdf.form(_pdf_row(edges, pdf_stripe_fill), edges[-1], pdf_row_height),
+                False: pdf.form(_pdf_row(edges), edges[-1], pdf_row_height)}
+
+        for team, roster in players_short.groupby('Tm', observed=True):
+            title = year + ' ' + team_dict.get(team, team)
+            roster = list(roster.itertuples(name=None))
+            for first in range(0, len(roster), page_rows):
+                content = [b"q %.4f 0 0 %.4f %d %d cm\n" % (scale, scale, pdf_margin, height - pdf_margin),
+                           pdf_writer.color('5A80B8').encode() + b" rg ",
+                           pdf_writer.text(bold, 32, edges[-1] / 2, 10 - pdf_title_height, title, "center"),
+                           b"q 1 0 0 1 0 %.2f cm /%s Do Q\n"
+                           % (-pdf_title_height - pdf_row_height, header.encode())]
+                y = -pdf_title_height - pdf_row_height
+                for index, row in enumerate(roster[first:first + page_rows], start=first):
+                    y -= pdf_row_height
+                    content.append(b"q 1 0 0 1 0 %.2f cm /%s Do 0 0 0 rg\n" % (y, rows[index % 2 == 0].encode()))
+                    content.extend(pdf_writer.text(regular, 14, x, baseline, text, "center")
+                                   for x, text in zip(centers, map(_pdf_value, row)) if text)
+                    content.append(b"Q\n")
+                content.append(b"Q\n")
+                pdf.add_page(b"".join(content), (width, height))
+    return output_file
+
+
+def write_rosters(players_short, year, output_file, streaming=True):
+    """Write one formatted sheet per team to the roster workbook"""
+    if streaming:
+        return stream_rosters(players_short, year, output_file)
+
+    # Unformatted team sheets are built in memory and formatted with openpyxl
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        for team, roster in players_short.groupby('Tm', observed=True):
+            roster.to_excel(writer, sheet_name=team)
+    buffer.seek(0)
+
+    wb = format_rosters(openpyxl.load_workbook(buffer), year)
+    wb.save(output_file)
+    return output_file
@@ -0,0 +1,244 @@
+import pandas as pd
+import numpy as np
+from bs4 import BeautifulSoup
+import re
+
+import instrument
+from fetcher import Fetcher, fetch_pages
+from page_cache import PageCache
+from table_extract import extract_tables
+
+# Scraping and merging of a season's player stats from baseball-reference.com,
+# ported from the "Scrape season data" section of sherco_ratings.ipynb
+
+base_url = 'https://www.baseball-reference.com/leagues/MLB/'
+base_app_url = 'https://www.baseball-reference.com/teams/'
+
+# Every page goes through one on-disk cache, and pages missing from it are
+# fetched through one rate-limited fetcher
+_page_cache = None
+_fetcher = None
+
+
+def configure_fetcher(**kwargs):
+    """Set up the fetcher used for pages not in the cache (see Fetcher for options)"""
+    global _fetcher
+    _fetcher = Fetcher(**kwargs)
+    if _page_cache is not None:
+        _page_cache.fetch = _fetcher.fetch
+    return _fetcher
+
+
+def get_fetcher():
+    """Return the fetcher, creating the default one on first use"""
+    if _fetcher is None:
+        configure_fetcher()
+    return _fetcher
+
+
+def configure_cache(**kwargs):
+    """Set up the page cache used by all fetches (see PageCache for options)"""
+    global _page_cache
+    kwargs.setdefault('fetch', get_fetcher().fetch)
+    _page_cache = PageCache(**kwargs)
+    return _page_cache
+
+
+def get_cache():
+    """Return the page cache, creating the default one on first use"""
+    if _page_cache is None:
+        configure_cache()
+    return _page_cache
+
+
+def page_soup(url):
+    """Fetch a page (from the cache if possible) and parse it once"""
+    text = get_cache().get(url)
+    ## Work around comments
+    comm = re.compile("<!--|-->")
+    return BeautifulSoup(comm.sub("", text), 'lxml')
+
+
+def season_urls(year):
+    """Return the standings, batting, pitching, fielding and catcher URLs for a season"""
+    return {
+        'season': base_url + year + '-standings.shtml',
+        'bat': base_url + year + '-standard-batting.shtml',
+        'pit': base_url + year + '-standard-pitching.shtml',
+        'fld': base_url + year + '-standard-fielding.shtml',
+        'cat': base_url + year + '-specialpos_c-fielding.shtml',
+    }
+
+
+# https://github.com/BenKite/baseball_data/blob/master/baseballReferenceScrape.py
+def findTables(url):
+    soup = page_soup(url)
+    divs = soup.find_all('div', id = "content")
+    divs = divs[0].find_all("div", id=re.compile("^all"))
+    ids = []
+    for div in divs:
+        searchme = str(div.find_all("table"))
+        x = searchme[searchme.find("id=") + 3: searchme.find(">")]
+        x = x.replace("\"", "")
+        if len(x) > 0:
+            ids.append(x)
+    return(ids)
+
+
+def pullTables(url, tableIDs, player_ids=False):
+    """Return a dict of typed DataFrames for several tables of one page"""
+    with instrument.stage("scrape.fetch", rows=1):
+        text = get_cache().get(url)
+    with instrument.stage("scrape.parse") as record:
+        tables = extract_tables(text, tableIDs, player_ids=player_ids)
+        record["rows"] = sum(len(table) for table in tables.values())
+    return tables
+
+
+def pullTable(url, tableID, player_ids=False):
+    return pullTables(url, [tableID], player_ids)[tableID]
+
+
+def get_teams(year):
+    """Return the team abbreviations from the season standings"""
+    season = pullTable(season_urls(year)['season'], 'expanded_standings_overall')
+    season["Tm"] = [re.sub('w‑', '', x) for x in season["Tm"]]
+    season["Tm"] = [re.sub('y‑', '', x) for x in season["Tm"]]
+    my_teams = list(season["Tm"])
+    my_teams.remove("Avg")
+    return my_teams
+
+
+def get_apps(year, teams_list):
+    """Pull appearances by team for all teams into one dataframe"""
+    urls = [base_app_url + team + '/' + year + '.shtml' for team in teams_list]
+    with instrument.stage("scrape.fetch", rows=len(urls)):
+        pages = fetch_pages(urls, get_cache())
+
+    apps = []
+    with instrument.stage("scrape.parse") as record:
+        for team, url in zip(teams_list, urls):
+            one_team = extract_tables(pages[url], ['appearances'], player_ids=True)['appearances']
+            one_team = one_team.drop(columns=["", "WAR", "Salary"], errors='ignore')
+            one_team["Tm"] = team
+            apps.append(one_team)
+        apps = pd.concat(apps, ignore_index=True)
+        record["rows"] = len(apps)
+    return apps
+
+
+def how_bats(name):
+    """Bats from the handedness marker at the end of the name"""
+    if name.endswith("#"):
+        return "S"
+    if name.endswith("*"):
+        return "L"
+    return "R" if name else ""
+
+
+def how_throws(name):
+    """Throws from the handedness marker at the end of the name"""
+    if name.endswith("*"):
+        return "L"
+    return "R" if name else ""
+
+
+def infer_dtypes(frame):
+    """Convert scraped text columns the way a CSV write and re-read would"""
+    for i, dtype in enumerate(frame.dtypes):
+        if pd.api.types.is_numeric_dtype(dtype):
+            continue
+        values = frame.iloc[:, i].replace(["", "nan"], np.nan)
+        try:
+            values = pd.to_numeric(values)
+        except (ValueError, TypeError):
+            pass
+        frame.isetitem(i, values)
+    return frame
+
+
+# Columns each source contributes to the players frame (the ones the rating
+# stages, roster sheets and season store use), and their names there
+bat_columns = {"G": "G_bat", "PA": "PA", "H": "H_bat", "2B": "2B", "3B": "3B", "HR": "HR_bat", "RBI": "RBI",
+               "SB": "SB", "BB": "BB_bat", "SO": "SO_bat", "HBP": "HBP_bat", "BA": "BA"}
+pit_columns = {"G": "G_pit", "GS": "GS", "GF": "GF", "IP": "IP", "H": "H_pit", "HR": "HR_pit", "BB": "BB_pit",
+               "SO": "SO_pit", "HBP": "HBP_pit", "WP": "WP", "BF": "BF"}
+fld_columns = {"Pos\xa0Summary": "Pos_Summary_fld", "Pos Summary": "Pos_Summary_fld", "Fld%": "Fld%",
+               "PO": "PO", "A": "A"}
+cat_columns = {"G": "G_cat", "SB": "SB_cat", "CS": "CS_cat"}
+app_columns = {"G": "G_app", "P": "P", "C": "C", "1B": "1B", "2B": "2B_app", "3B": "3B_app", "SS": "SS",
+               "LF": "LF", "CF": "CF", "RF": "RF", "OF": "OF", "DH": "DH", "PH": "PH", "PR": "PR"}
+
+
+def _project(frame, columns, extra=()):
+    """Keep the player ID, the given extra columns and the stat columns present, renamed"""
+    kept = [column for column in columns if column in frame]
+    projected = frame.loc[frame["player_id"].notna(), ["player_id", *extra, *kept]]
+    return projected.rename(columns=columns)
+
+
+def _keyed(frame, player_codes, team_codes=None):
+    """Index a projected source by its integer player (and team) key, keeping a key's first row
+
+    Rows for players or teams without a code are dropped.
+    """
+    key = player_codes.get_indexer(frame.pop("player_id")).astype(np.int64)
+    known = key >= 0
+    if team_codes is not None:
+        team = team_codes.get_indexer(frame["Tm"])
+        known &= team >= 0
+        key = key * len(team_codes) + team
+    frame = frame[known].set_axis(pd.Index(key[known], name="key"))
+    return frame[~frame.index.duplicated(keep="first")]
+
+
+def merge_players(bat, pit, fld, cat, appearances):
+    """Join the scraped tables on baseball-reference player IDs into one players frame
+
+    Each table needs the player_id column pullTables adds with player_ids=True.
+    Player IDs and teams are interned as integer codes; batting and pitching
+    lines are keyed by player and team, fielding and catching by player.
+    """
+    bat = bat.assign(Bats=bat["Name"].apply(how_bats))
+    pit = pit.assign(Throws=pit["Name"].apply(how_throws))
+    identity = ["Name", "Age", "Tm"]
+    bat = _project(bat, bat_columns, identity + ["Bats"])
+    pit = _project(pit, pit_columns, identity + ["Throws"])
+    fld = _project(fld, fld_columns)
+    cat = _project(cat, cat_columns)
+    appearances = _project(appearances, app_columns, ["Tm"])
+
+    player_codes = pd.Index(pd.unique(pd.concat([bat["player_id"], pit["player_id"]])))
+    team_codes = pd.Index(pd.unique(pd.concat([bat["Tm"], pit["Tm"]])))
+    bat = _keyed(bat, player_codes, team_codes)
+    pit = _keyed(pit, player_codes, team_codes)
+
+    # Name, age and team come from the batting line, or the pitching line for pitchers who never batted
+    players = pd.concat([bat[identity], pit[identity]])
+    players = players[~players.index.duplicated(keep="first")]
+    players = players.join([bat.drop(columns=identity), pit.drop(columns=identity)])
+    players["player"] = players.index // len(team_codes)
+    players["player_id"] = player_codes[players["player"]]
+
+    for source in (fld, cat):
+        players = players.join(_keyed(source, player_codes), on="player")
+    appearances = _keyed(appearances, player_codes, team_codes).drop(columns=["Tm"])
+    players = players.join(appearances).drop(columns=["player"])
+
+    players["Name"] = [' '.join(re.sub("[*#]", "", name).split()) for name in players["Name"]]
+    return infer_dtypes(players.sort_values(["Name", "Tm"], kind="stable").reset_index(drop=True))
+
+
+def scrape_players(year):
+    """Scrape a season from baseball-reference.com and return the merged players frame"""
+    urls = season_urls(year)
+    with instrument.stage("scrape"):
+        appearances = get_apps(year, get_teams(year))
+        bat = pullTable(urls['bat'], 'players_standard_batting', player_ids=True)
+        pit = pullTable(urls['pit'], 'players_standard_pitching', player_ids=True)
+        fld = pullTable(urls['fld'], 'players_players_standard_fielding_fielding', player_ids=True)
+        cat = pullTable(urls['cat'], 'players_players_standard_fielding_fielding', player_ids=True)
+    with instrument.stage("scrape.merge") as record:
+        players = merge_players(bat, pit, fld, cat, appearances)
+        record["rows"] = len(players)
+    return players
@@ -0,0 +1,174 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import rosters
+
+# Typed columnar store of rated seasons.
+#
+# One Parquet dataset partitioned by year (<root>/year=1977/part-0.parquet),
+# holding the stats the rating formulas use, the ratings themselves and the
+# roster columns, all with explicit types. Reads only touch the columns and
+# partitions asked for, so loading one team or one column across 70 seasons
+# does not parse everything.
+#
+# Seasons imported from formatted workbooks only have the roster columns and
+# ratings, with null stats. Their Parquet file is marked as roster-only in its
+# schema metadata, and roster_only() tells them apart from rated seasons, which
+# must not be re-rated from their (missing) stats.
+
+default_store = os.path.join('..', 'data', 'season store')
+
+_category = pa.dictionary(pa.int8(), pa.string())
+
+# Stats used by the rating stages and the roster sheets
+count_columns = [
+    "G_bat", "PA", "H_bat", "2B", "3B", "HR_bat", "RBI", "SB", "BB_bat", "SO_bat", "HBP_bat",
+    "G_pit", "GS", "GF", "BF", "H_pit", "HR_pit", "BB_pit", "SO_pit", "HBP_pit", "WP",
+    "G_app", "PO", "A", "G_cat", "SB_cat", "CS_cat",
+    "P", "C", "1B", "2B_app", "3B_app", "SS", "LF", "CF", "RF", "OF", "DH", "PH", "PR",
+    "Games_Played",
+]
+rate_columns = ["BA", "IP", "Fld%"]
+
+schema = pa.schema(
+    [
+        ("Name", pa.string()),
+        ("player_id", pa.string()),
+        ("Age", pa.int8()),
+        ("Tm", _category),
+        ("Bats", _category),
+        ("Throws", _category),
+        ("Pos_Summary_fld", pa.string()),
+        ("Primary_Pos_fld", _category),
+    ]
+    + [(column, pa.int32()) for column in count_columns]
+    + [(column, pa.float64()) for column in rate_columns]
+    + [
+        ("batter_rating", pa.string()),
+        ("PH_num_bat", pa.int8()),
+        ("pitcher_rating", pa.string()),
+        ("PCN", pa.int8()),
+        ("PPH", pa.int8()),
+        ("fielder_rating", pa.string()),
+    ]
+)
+
+partitioning = ds.partitioning(pa.schema([("year", pa.int16())]), flavor="hive")
+_dataset_schema = schema.append(pa.field("year", pa.int16()))
+
+# Read integer columns back as nullable integers rather than floats
+_pandas_types = {pa.int8(): pd.Int8Dtype(), pa.int16(): pd.Int16Dtype(), pa.int32(): pd.Int32Dtype()}
+
+
+def _to_table(players):
+    """Project a players frame onto the store schema"""
+    arrays = []
+    for field in schema:
+        if field.name not in players:
+            arrays.append(pa.nulls(len(players), field.type))
+            continue
+        values = players[field.name]
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type):
+            values = pd.to_numeric(values.replace("", np.nan), errors="coerce")
+            if pa.types.is_integer(field.type):
+                values = values.round().astype("Int64")
+            arrays.append(pa.array(values, type=field.type, from_pandas=True))
+        else:
+            present = values.notna() & (values != "")
+            values = values.astype(str).astype(object).where(present, None)
+            arrays.append(pa.array(values, type=pa.string(), from_pandas=True).cast(field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _partition_file(year, root):
+    return os.path.join(root, "year=" + str(year), "part-0.parquet")
+
+
+def write_season(players, year, root=default_store, roster_only=False):
+    """Write (or replace) one season of rated players, marked as roster-only with roster_only"""
+    players = players.copy()
+    if "DH" not in players:
+        players["DH"] = 0
+    if "Games_Played" not in players and "G_bat" in players:
+        players["Games_Played"] = np.where(players["Primary_Pos_fld"] == "P", players["G_pit"], players["G_bat"])
+    players = players.sort_values("Tm", kind="stable")
+
+    partition = os.path.join(root, "year=" + str(year))
+    shutil.rmtree(partition, ignore_errors=True)
+    os.makedirs(partition)
+    table = _to_table(players).replace_schema_metadata({"contents": "rosters" if roster_only else "stats"})
+    pq.write_table(table, _partition_file(year, root))
+    return partition
+
+
+def write_rosters(roster, year, root=default_store):
+    """Write a season's roster sheet columns (as named in the formatted workbooks)"""
+    names = {new: old for old, new in rosters.roster_names.items()}
+    roster = roster.rename(columns=names).drop(columns=["ID"], errors="ignore")
+    roster["Primary_Pos_fld"] = roster["Primary_Pos_fld"].replace("DH_PH_PR", np.nan)
+    return write_season(roster, year, root, roster_only=True)
+
+
+def import_rosters(excel_file, year, root=default_store):
+    """Load the roster columns of an existing formatted workbook into the store"""
+    sheets = pd.read_excel(excel_file, sheet_name=None, skiprows=1)
+    return write_rosters(pd.concat(sheets.values(), ignore_index=True), year, root)
+
+
+def seasons(root=default_store):
+    """Return the years in the store"""
+    if not os.path.isdir(root):
+        return []
+    return sorted(int(name.split("=", 1)[1]) for name in os.listdir(root) if name.startswith("year="))
+
+
+def roster_only(year, root=default_store):
+    """Whether a season in the store has only roster columns and ratings, without the stats to rate it
+
+    Seasons stored before they were marked count as roster-only when they
+    have no plate appearances or batters faced at all.
+    """
+    metadata = pq.read_schema(_partition_file(year, root)).metadata or {}
+    if b"contents" in metadata:
+        return metadata[b"contents"] == b"rosters"
+    stats = read_players(root, ["PA", "BF"], years=[year])
+    return not (stats["PA"].notna().any() or stats["BF"].notna().any())
+
+
+def _filter(years=None, teams=None, filter=None):
+    expression = filter
+    for field, values in (("year", years), ("Tm", teams)):
+        if values is None:
+            continue
+        condition = ds.field(field).isin([int(v) for v in values] if field == "year" else list(values))
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_players(root=default_store, columns=None, years=None, teams=None, filter=None):
+    """Read rated players, loading only the given columns, years and teams
+
+    filter is an optional pyarrow.dataset expression, e.g. ds.field("HR_bat") >= 30.
+    """
+    # The full schema lets seasons written before a column was added read it as nulls
+    dataset = ds.dataset(root, format="parquet", partitioning=partitioning, schema=_dataset_schema)
+    if columns is not None and "year" not in columns:
+        columns = ["year"] + list(columns)
+    table = dataset.to_table(columns=columns, filter=_filter(years, teams, filter))
+    return table.to_pandas(types_mapper=_pandas_types.get)
+
+
+def read_rosters(root=default_store, years=None, teams=None):
+    """Read the roster sheet columns, named as in the formatted workbooks"""
+    players = read_players(root, rosters.roster_columns, years, teams)
+    players_short = players.rename(columns=rosters.roster_names)
+    players_short["Primary"] = players_short["Primary"].astype(object).replace(np.nan, "DH_PH_PR")
+    players_short["Primary"] = players_short["Primary"].astype(rosters.pos_cat_dtype)
+    return players_short.sort_values(["year", "Tm", "Primary", "G", "GS", "GF"],
+                                     ascending=(True, True, True, False, False, False), ignore_index=True)
@@ -0,0 +1,382 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Monte Carlo replays of a rated season, driven by the rating strings.
+#
+# Every two-dice number on a card is turned into its position among the 36
+# outcomes ("11" -> 1 ... "66" -> 36), so a roll is a single integer draw and
+# reading a card is a comparison. Plate appearances are resolved like this:
+#
+#   1. One die picks the card: 1-3 the batter's, 4-6 the pitcher's.
+#   2. Two dice on that card's [bb-k/hbp] block: up to the walk number is a
+#      walk, up to the strikeout number a strikeout, up to the HBP number a hit
+#      batsman. Otherwise the roll is a hit when it is at least the probable
+#      hit number (BPH or PPH), and an out in play when it is not.
+#   3. For hits, two dice on the batter's HR and triple numbers (moved two
+#      outcomes by the pitcher's gopher rating); the top DOUBLE_OUTCOMES rolls
+#      of the rest are doubles and the remainder singles.
+#
+# Starters pitch their innings of effectiveness, then relievers follow in
+# order for theirs. Batting orders are the nine position players with the most
+# games. Clutch, speed, control numbers and the DEF ratings are parsed but not
+# used by this simplified resolution. Thousands of games are played at once:
+# each step resolves one plate appearance for every game still going.
+
+# Plate appearance outcomes
+OUT, STRIKEOUT, WALK, HBP, SINGLE, DOUBLE, TRIPLE, HOME_RUN = range(8)
+EVENTS = ["out", "k", "bb", "hbp", "1b", "2b", "3b", "hr"]
+
+# Hits that are doubles, in 36ths (not on the card)
+DOUBLE_OUTCOMES = 7
+
+# Games stop after this many innings
+MAX_INNINGS = 20
+
+BATTER_PATTERN = (r"^(?P<clutch>#?)(?P<letter>AAA|AA|[A-G]\+?)(?P<hr>\d\d)?(?:\((?P<triple>\d\d)\))?"
+                  r"(?P<speed>\**) \[(?P<bb>\d\d|n)-(?P<k>\d\d|n)(?:/(?P<hbp>\d\d))?\]")
+PITCHER_PATTERN = (r"^(?P<gopher>[+-]?)(?P<letter>[JKLMWXYZ]\+?)(?P<ie>\d+)"
+                   r" +\((?P<bb>\d\d)-(?P<k>\d\d|n)(?:/(?P<hbp>\d\d))?\)")
+FIELDER_PATTERN = r"^(?P<superior>S?)(?P<arm>\d)(?P<range>\d)(?: +-(?P<cs>\d))?"
+
+
+def dice_position(numbers):
+    """Return the 1-36 position of each two-dice number ("11" -> 1, "66" -> 36), 0 where there is none"""
+    values = pd.to_numeric(pd.Series(numbers, dtype=object), errors="coerce").to_numpy(dtype=float)
+    tens, ones = np.floor(values / 10), values % 10
+    valid = (tens >= 1) & (tens <= 6) & (ones >= 1) & (ones <= 6)
+    return np.where(valid, (tens - 1) * 6 + ones, 0).astype(np.int8)
+
+
+def _positions(parts, name):
+    return dice_position(parts[name].to_numpy())
+
+
+def parse_batters(ratings, probable_hits):
+    """Parse batter rating strings and BPH numbers into int8 arrays"""
+    parts = pd.Series(ratings, dtype=object).astype(str).str.extract(BATTER_PATTERN)
+    bb = _positions(parts, "bb")
+    k = np.maximum(_positions(parts, "k"), bb)
+    hbp = np.maximum(_positions(parts, "hbp"), k)
+    hr = _positions(parts, "hr")
+    return {
+        "rated": parts["letter"].notna().to_numpy(),
+        "clutch": (parts["clutch"] == "#").to_numpy(),
+        "speed": parts["speed"].str.len().fillna(0).to_numpy(dtype=np.int8),
+        "bb": bb, "k": k, "hbp": hbp,
+        "ph": dice_position(probable_hits),
+        "hr": hr,
+        "triple": np.maximum(_positions(parts, "triple"), hr),
+    }
+
+
+def parse_pitchers(ratings, probable_hits, control):
+    """Parse pitcher rating strings, PPH and PCN numbers into int8 arrays"""
+    parts = pd.Series(ratings, dtype=object).astype(str).str.extract(PITCHER_PATTERN)
+    bb = _positions(parts, "bb")
+    k = np.maximum(_positions(parts, "k"), bb)
+    return {
+        "rated": parts["letter"].notna().to_numpy(),
+        "gopher": parts["gopher"].map({"+": 1, "-": -1}).fillna(0).to_numpy(dtype=np.int8),
+        "ie": np.maximum(pd.to_numeric(parts["ie"], errors="coerce").fillna(1).to_numpy(), 1).astype(np.int8),
+        "bb": bb, "k": k, "hbp": np.maximum(_positions(parts, "hbp"), k),
+        "ph": dice_position(probable_hits),
+        "pcn": dice_position(control),
+    }
+
+
+def parse_fielders(ratings):
+    """Parse DEF strings into superior, arm, range and catcher arrays"""
+    parts = pd.Series(ratings, dtype=object).astype(str).str.extract(FIELDER_PATTERN)
+    return {
+        "superior": (parts["superior"] == "S").to_numpy(),
+        "arm": pd.to_numeric(parts["arm"]).fillna(0).to_numpy(dtype=np.int8),
+        "range": pd.to_numeric(parts["range"]).fillna(0).to_numpy(dtype=np.int8),
+        "cs": pd.to_numeric(parts["cs"]).fillna(0).to_numpy(dtype=np.int8),
+    }
+
+
+def _advance_tables():
+    """Runs scored and the next base state (bit 1 first, 2 second, 4 third) for each outcome"""
+    runs = np.zeros((8, 8), dtype=np.int8)
+    bases = np.zeros((8, 8), dtype=np.int8)
+    for state in range(8):
+        first, second, third = state & 1, state >> 1 & 1, state >> 2 & 1
+        on_base = first + second + third
+        bases[OUT, state] = bases[STRIKEOUT, state] = state
+        # Walks and hit batsmen only move runners who are forced
+        forced = {0: 1, 1: 3, 2: 3, 3: 7, 4: 5, 5: 7, 6: 7, 7: 7}[state]
+        bases[WALK, state] = bases[HBP, state] = forced
+        runs[WALK, state] = runs[HBP, state] = state == 7
+        # Singles score runners from second and third, doubles everyone but the
+        # runner from first, who goes to third
+        bases[SINGLE, state], runs[SINGLE, state] = 1 | (2 if first else 0), second + third
+        bases[DOUBLE, state], runs[DOUBLE, state] = 2 | (4 if first else 0), second + third
+        bases[TRIPLE, state], runs[TRIPLE, state] = 4, on_base
+        bases[HOME_RUN, state], runs[HOME_RUN, state] = 0, on_base + 1
+    return runs, bases
+
+
+RUNS, NEXT_BASES = _advance_tables()
+
+
+class League:
+    def __init__(self, roster, rotation_size=5):
+        """Build card arrays, batting orders, rotations and bullpens from a roster frame
+
+        roster has the columns of the formatted roster sheets (Tm, G, GS, GF,
+        DEF, Batter Rating, BPH, Pitcher Rating, PCN, PPH, Primary).
+        """
+        roster = roster[roster["Tm"] != "TOT"].reset_index(drop=True)
+        self.roster = roster
+        self.batters = parse_batters(roster["Batter Rating"], roster["BPH"])
+        self.pitchers = parse_pitchers(roster["Pitcher Rating"], roster["PPH"], roster["PCN"])
+        self.fielders = parse_fielders(roster["DEF"])
+        self.teams = np.array(sorted(roster["Tm"].unique()), dtype=object)
+
+        games = pd.to_numeric(roster["G"], errors="coerce").fillna(0)
+        starts = pd.to_numeric(roster["GS"], errors="coerce").fillna(0)
+        position_player = (roster["Primary"].astype(str) != "P").to_numpy()
+        lineups, rotations, bullpens = [], [], []
+        for team in self.teams:
+            on_team = (roster["Tm"] == team).to_numpy()
+            hitters = np.flatnonzero(on_team & position_player & self.batters["rated"])
+            hitters = hitters[np.argsort(-games.to_numpy()[hitters], kind="stable")][:9]
+            if len(hitters) < 9:
+                raise ValueError(f"{team} has only {len(hitters)} rated position players")
+            lineups.append(hitters)
+
+            arms = np.flatnonzero(on_team & self.pitchers["rated"])
+            by_starts = arms[np.argsort(-starts.to_numpy()[arms], kind="stable")]
+            rotation = by_starts[:rotation_size]
+            relievers = np.setdiff1d(arms, rotation)
+            relievers = relievers[np.argsort(-games.to_numpy()[relievers], kind="stable")]
+            rotations.append(rotation)
+            bullpens.append(relievers if len(relievers) else rotation)
+
+        self.lineups = np.array(lineups)
+        # Pad rotations and bullpens to equal widths by repeating their pitchers
+        self.rotations = np.array([np.resize(r, rotation_size) for r in rotations])
+        width = max(len(b) for b in bullpens)
+        self.bullpens = np.array([np.resize(b, width) for b in bullpens])
+        self.bullpen_sizes = np.array([len(b) for b in bullpens])
+
+    def schedule(self, games_per_team, rng):
+        """Return home team, away team and round arrays for a random balanced schedule
+
+        Each round every team plays once, against a random opponent.
+        """
+        n = len(self.teams)
+        pairs = np.argsort(rng.random((games_per_team, n)), axis=1)[:, :n - n % 2].reshape(games_per_team, -1, 2)
+        rounds = np.repeat(np.arange(games_per_team), pairs.shape[1])
+        return pairs[:, :, 0].ravel(), pairs[:, :, 1].ravel(), rounds
+
+
+def play_games(league, home, away, rounds, rng, stats=None):
+    """Play a batch of games at once and return the (away, home) runs of each
+
+    rounds picks each team's starter from its rotation. If stats is given, it
+    is a dict of "batting" and "pitching" (players x events) arrays that the
+    outcome counts are added to.
+    """
+    n = len(home)
+    b, p = league.batters, league.pitchers
+    teams = np.stack([away, home], axis=1)
+    starters = league.rotations[teams, (rounds % league.rotations.shape[1])[:, None]]
+    # Each game starts its bullpen at a different reliever to spread the work
+    bullpen_start = rng.integers(0, 1 << 16, size=(n, 2))
+
+    score = np.zeros((n, 2), dtype=np.int32)
+    slot = np.zeros((n, 2), dtype=np.int32)
+    pitcher = starters.copy()
+    pitcher_outs = np.zeros((n, 2), dtype=np.int32)
+    relief = np.zeros((n, 2), dtype=np.int32)
+    half = np.zeros(n, dtype=np.int8)
+    inning = np.ones(n, dtype=np.int32)
+    outs = np.zeros(n, dtype=np.int8)
+    bases = np.zeros(n, dtype=np.int8)
+    live = np.arange(n)
+    plate_appearances = 0
+
+    while len(live):
+        bat = half[live]
+        field = 1 - bat
+        batter = league.lineups[teams[live, bat], slot[live, bat]]
+        arm = pitcher[live, field]
+        m = len(live)
+        plate_appearances += m
+
+        # Read the batter's or the pitcher's card
+        pitchers_card = rng.integers(0, 2, size=m, dtype=np.int8).astype(bool)
+        walk = np.where(pitchers_card, p["bb"][arm], b["bb"][batter])
+        strikeout = np.where(pitchers_card, p["k"][arm], b["k"][batter])
+        hit_batsman = np.where(pitchers_card, p["hbp"][arm], b["hbp"][batter])
+        probable_hit = np.where(pitchers_card, p["ph"][arm], b["ph"][batter])
+
+        roll = rng.integers(1, 37, size=m, dtype=np.int8)
+        event = np.where(roll >= probable_hit, SINGLE, OUT).astype(np.int8)
+        event[roll <= hit_batsman] = HBP
+        event[roll <= strikeout] = STRIKEOUT
+        event[roll <= walk] = WALK
+
+        # Hit type from the batter's HR and triple numbers
+        hit = event == SINGLE
+        gopher = 2 * p["gopher"][arm[hit]]
+        home_run = np.clip(b["hr"][batter[hit]] + gopher, 0, 36)
+        triple = np.clip(b["triple"][batter[hit]] + gopher, 0, 36)
+        kind = rng.integers(1, 37, size=int(hit.sum()), dtype=np.int8)
+        event[hit] = np.where(kind <= home_run, HOME_RUN, np.where(
+            kind <= triple, TRIPLE, np.where(kind > 36 - DOUBLE_OUTCOMES, DOUBLE, SINGLE)))
+
+        if stats is not None:
+            stats["batting"] += np.bincount(batter * 8 + event, minlength=stats["batting"].size).reshape(-1, 8)
+            stats["pitching"] += np.bincount(arm * 8 + event, minlength=stats["pitching"].size).reshape(-1, 8)
+
+        state = bases[live]
+        score[live, bat] += RUNS[event, state]
+        bases[live] = NEXT_BASES[event, state]
+        made_out = event <= STRIKEOUT
+        outs[live] += made_out
+        pitcher_outs[live, field] += made_out
+        slot[live, bat] = (slot[live, bat] + 1) % 9
+
+        # Home team ahead after the top of the ninth, or walking off in the bottom
+        away_runs, home_runs = score[live, 0], score[live, 1]
+        late = inning[live] >= 9
+        done = late & (bat == 1) & (home_runs > away_runs)
+
+        side_retired = (outs[live] >= 3) & ~done
+        if side_retired.any():
+            g = live[side_retired]
+            g_field = 1 - half[g]
+            done[side_retired] |= (
+                (inning[g] >= 9) & (((half[g] == 0) & (score[g, 1] > score[g, 0])) |
+                                    ((half[g] == 1) & (score[g, 1] != score[g, 0])))
+            ) | ((inning[g] >= MAX_INNINGS) & (half[g] == 1))
+
+            # Go to the bullpen once the pitcher has used up his innings of effectiveness
+            tired = pitcher_outs[g, g_field] >= 3 * p["ie"][pitcher[g, g_field]]
+            if tired.any():
+                t, t_field = g[tired], g_field[tired]
+                team = teams[t, t_field]
+                reliever = (bullpen_start[t, t_field] + relief[t, t_field]) % league.bullpen_sizes[team]
+                pitcher[t, t_field] = league.bullpens[team, reliever]
+                pitcher_outs[t, t_field] = 0
+                relief[t, t_field] += 1
+
+            outs[g] = 0
+            bases[g] = 0
+            inning[g] += half[g]
+            half[g] = 1 - half[g]
+
+        live = live[~done]
+
+    return score, plate_appearances
+
+
+def play_seasons(league, seasons, games_per_team, seed, batch_seasons=20):
+    """Replay whole seasons and return each season's wins by team, player stats and PA count"""
+    rng = np.random.default_rng(seed)
+    n_teams = len(league.teams)
+    wins = np.zeros((seasons, n_teams), dtype=np.int32)
+    players = len(league.roster)
+    stats = {"batting": np.zeros((players, 8), dtype=np.int64),
+             "pitching": np.zeros((players, 8), dtype=np.int64)}
+    plate_appearances = 0
+
+    for first in range(0, seasons, batch_seasons):
+        batch = range(first, min(seasons, first + batch_seasons))
+        schedules = [league.schedule(games_per_team, rng) for _ in batch]
+        home = np.concatenate([s[0] for s in schedules])
+        away = np.concatenate([s[1] for s in schedules])
+        rounds = np.concatenate([s[2] for s in schedules])
+        season = np.repeat(np.array(batch), [len(s[0]) for s in schedules])
+
+        score, pas = play_games(league, home, away, rounds, rng, stats)
+        plate_appearances += pas
+        winner = np.where(score[:, 1] > score[:, 0], home, away)
+        tie = score[:, 1] == score[:, 0]
+        np.add.at(wins, (season[~tie], winner[~tie]), 1)
+
+    return wins, stats, plate_appearances
+
+
+def _play_chunk(args):
+    return play_seasons(*args)
+
+
+def project_seasons(league, seasons, games_per_team=162, workers=None, seed=None):
+    """Replay a season many times across a process pool
+
+    Returns a wins table (one row per team) and projected per-season player
+    lines, plus the number of plate appearances played.
+    """
+    workers = workers or os.cpu_count()
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    chunks = [len(part) for part in np.array_split(np.arange(seasons), workers) if len(part)]
+    with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        results = list(executor.map(_play_chunk, [(league, n, games_per_team, s) for n, s in zip(chunks, seeds)]))
+
+    wins = np.concatenate([r[0] for r in results])
+    batting = sum(r[1]["batting"] for r in results) / seasons
+    pitching = sum(r[1]["pitching"] for r in results) / seasons
+    plate_appearances = sum(r[2] for r in results)
+
+    best = wins == wins.max(axis=1, keepdims=True)
+    table = pd.DataFrame({
+        "Tm": league.teams,
+        "W": wins.mean(axis=0).round(1),
+        "W_sd": wins.std(axis=0).round(1),
+        "W_p10": np.percentile(wins, 10, axis=0),
+        "W_p90": np.percentile(wins, 90, axis=0),
+        "best_record": (best / best.sum(axis=1, keepdims=True)).mean(axis=0).round(3),
+    }).sort_values("W", ascending=False, ignore_index=True)
+
+    lines = league.roster[["Name", "Tm"]].copy()
+    for i, event in enumerate(EVENTS):
+        lines[event] = batting[:, i].round(1)
+    lines["PA"] = batting.sum(axis=1).round(1)
+    hits = batting[:, SINGLE:].sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lines["AVG"] = np.round(hits / (lines["PA"] - batting[:, WALK] - batting[:, HBP]), 3)
+    lines["BF"] = pitching.sum(axis=1).round(1)
+    lines["SO_pit"] = pitching[:, STRIKEOUT].round(1)
+    lines["HR_pit"] = pitching[:, HOME_RUN].round(1)
+    return table, lines[(lines["PA"] > 0) | (lines["BF"] > 0)], plate_appearances
+
+
+def read_roster(excel_file):
+    """Read every team sheet of a "<year> rosters formatted.xlsx" workbook"""
+    sheets = pd.read_excel(excel_file, sheet_name=None, skiprows=1)
+    return pd.concat(sheets.values(), ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a rated season many times")
+    parser.add_argument("roster", help='formatted roster workbook, e.g. "../data/1977 rosters  formatted.xlsx"')
+    parser.add_argument("--seasons", type=int, default=1000, help="number of seasons to play")
+    parser.add_argument("--games", type=int, default=162, help="games per team per season")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for a repeatable projection")
+    parser.add_argument("--output", help="write the team and player projections to this Excel file")
+    args = parser.parse_args()
+
+    league = League(read_roster(args.roster))
+    start = time.perf_counter()
+    table, lines, plate_appearances = project_seasons(league, args.seasons, args.games, args.workers, args.seed)
+    elapsed = time.perf_counter() - start
+
+    pd.set_option("display.width", 200)
+    print(table.to_string(index=False))
+    print(f"\n{args.seasons} seasons, {plate_appearances:,} plate appearances in {elapsed:.1f} s "
+          f"({plate_appearances / elapsed:,.0f} PA/s)")
+
+    if args.output:
+        with pd.ExcelWriter(args.output) as writer:
+            table.to_excel(writer, sheet_name="Teams", index=False)
+            lines.to_excel(writer, sheet_name="Players", index=False)
+        print(f"Projections saved to: {args.output}")
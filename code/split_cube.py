@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import h2h
+import instrument
+import retrosheet
+
+# Multi-dimensional split cubes from parsed play arrays (see retrosheet.py).
+#
+# A cube sums the h2h count columns over a set of dimensions, such as a batter
+# by pitcher hand, home or away, month and game type. All configured cubes
+# are built from one scan of the plays: every cube's cell is encoded as one
+# int64 key (mixed radix over the dimension sizes, offset by cube), so one
+# np.unique over all the keys numbers the cells of every cube and a bincount
+# per count column sums them. Cubes are kept at their finest grain, so any
+# coarser split (a batter vs LHP/RHP, a pitcher's home and away lines,
+# league-wide platoon totals) is a rollup of the cube's cells rather than
+# another pass over the plays.
+#
+# A cube folder holds keys.npy (sorted cell keys), counts.npy (one row per
+# cell), labels_<dimension>.npy and cube.json; open_cubes memory-maps them.
+#
+#   python split_cube.py build "../data/1995 plays" "../data/1995 splits"
+#   python split_cube.py query "../data/1995 splits" batting --by batter pit_hand --where batter=bondb001
+#   python split_cube.py query "../data/1995 splits" pitching --by pitcher pitcher_home
+
+# Cube dimensions are play array fields (batter, pitcher, bat_hand, pit_hand,
+# home, month and gametype) and pitcher_home. home is the batting team's side,
+# so a pitcher is at home when it is 0; pitcher_home is that side the right
+# way round for pitcher splits.
+default_cubes = {
+    "batting": ["batter", "pit_hand", "home", "month", "gametype"],
+    "pitching": ["pitcher", "bat_hand", "pitcher_home", "month", "gametype"],
+    "matchups": ["batter", "pitcher", "gametype"],
+}
+
+
+def dimension_labels(plays, dimension):
+    """Return the label of each code of a dimension of a retrosheet.Plays"""
+    if dimension in ("batter", "pitcher"):
+        return np.asarray(plays.players)
+    if dimension in ("bat_hand", "pit_hand"):
+        return np.asarray(plays.hands)
+    if dimension in ("home", "pitcher_home"):
+        return np.array(["away", "home"])
+    if dimension == "month":
+        return np.arange(13)
+    if dimension == "gametype":
+        return np.asarray(plays.gametypes)
+    raise ValueError(f"unknown dimension {dimension}")
+
+
+def dimension_codes(plays, dimension):
+    """Return the code of a dimension of every play of a retrosheet.Plays"""
+    if dimension == "pitcher_home":
+        # The pitching team is in the field: at home when the visitors bat
+        return 1 - np.asarray(plays.home)
+    return np.asarray(getattr(plays, dimension))
+
+
+def _strides(sizes):
+    """Place value of each dimension in a mixed radix key, the last dimension varying fastest"""
+    return np.cumprod([1] + sizes[:0:-1])[::-1].astype(np.int64)
+
+
+class SplitCube:
+    def __init__(self, dims, labels, keys, counts, columns):
+        """A cube of count columns by dims; labels are each dimension's labels by code"""
+        self.dims = list(dims)
+        self.labels = dict(labels)
+        self.keys = keys
+        self.counts = counts
+        self.columns = list(columns)
+        self.sizes = [len(self.labels[dim]) for dim in self.dims]
+        self.strides = _strides(self.sizes)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def codes(self, dim):
+        """Return the code of a dimension of every cell"""
+        i = self.dims.index(dim)
+        return (np.asarray(self.keys) // self.strides[i]) % self.sizes[i]
+
+    def _code(self, dim, value):
+        labels = self.labels[dim]
+        code = np.flatnonzero(labels == np.asarray(value).astype(labels.dtype))
+        return int(code[0]) if len(code) else -1
+
+    def rollup(self, dims, **where):
+        """Sum the cells over the dimensions not in dims, keeping cells that match where
+
+        where maps dimensions to a label or a list of labels, e.g.
+        rollup(["batter", "pit_hand"], gametype="regular").
+        """
+        keep = np.ones(len(self.keys), dtype=bool)
+        for dim, values in where.items():
+            values = values if isinstance(values, (list, tuple)) else [values]
+            keep &= np.isin(self.codes(dim), [self._code(dim, value) for value in values])
+        sizes = [len(self.labels[dim]) for dim in dims]
+        keys = np.zeros(int(keep.sum()), dtype=np.int64)
+        for dim, stride in zip(dims, _strides(sizes)):
+            keys += self.codes(dim)[keep] * stride
+        keys, counts = h2h.sum_by_key(keys, np.asarray(self.counts)[keep])
+        return SplitCube(dims, {dim: self.labels[dim] for dim in dims}, keys, counts, self.columns)
+
+    def frame(self):
+        """Return the cells as a DataFrame with a label column per dimension"""
+        frame = pd.DataFrame(np.asarray(self.counts), columns=self.columns)
+        for i, dim in enumerate(self.dims):
+            frame.insert(i, dim, np.asarray(self.labels[dim])[self.codes(dim)])
+        return frame
+
+    def save(self, cube_dir):
+        """Write the cube's arrays to cube_dir"""
+        os.makedirs(cube_dir, exist_ok=True)
+        np.save(os.path.join(cube_dir, "keys.npy"), np.asarray(self.keys))
+        np.save(os.path.join(cube_dir, "counts.npy"), np.ascontiguousarray(self.counts, dtype=np.int32))
+        for dim in self.dims:
+            np.save(os.path.join(cube_dir, f"labels_{dim}.npy"), np.asarray(self.labels[dim]))
+        with open(os.path.join(cube_dir, "cube.json"), "w") as f:
+            json.dump({"dims": self.dims, "columns": self.columns, "cells": len(self.keys)}, f)
+        return cube_dir
+
+
+def build_cubes(plays, cubes=default_cubes, columns=h2h.columns_to_sum):
+    """Sum the count columns of a retrosheet.Plays into every configured cube in one pass
+
+    cubes maps cube names to their dimensions. Returns {name: SplitCube}.
+    """
+    columns = list(columns)
+    with instrument.stage("cube.keys", rows=len(plays)) as record:
+        counts = plays.counts(columns)
+        # Plays that are not plate appearances (stolen bases, wild pitches) add nothing
+        pa = np.flatnonzero(counts.any(axis=1))
+        counts = counts[pa]
+        codes = {dim: dimension_codes(plays, dim)[pa].astype(np.int64)
+                 for dim in set(dim for dims in cubes.values() for dim in dims)}
+        labels = {dim: dimension_labels(plays, dim) for dim in codes}
+
+        # Each cube's keys start where the previous cube's key space ends
+        keys = []
+        rows = []
+        offsets = [0]
+        for dims in cubes.values():
+            sizes = [len(labels[dim]) for dim in dims]
+            cube_keys = np.full(len(pa), offsets[-1], dtype=np.int64)
+            valid = np.ones(len(pa), dtype=bool)
+            for dim, stride in zip(dims, _strides(sizes)):
+                cube_keys += codes[dim] * stride
+                valid &= codes[dim] >= 0  # A play before any pitcher was listed has no pitcher
+            keys.append(cube_keys[valid])
+            rows.append(np.flatnonzero(valid))
+            offsets.append(offsets[-1] + int(np.prod(sizes, dtype=np.int64)))
+        record["rows"] = sum(len(cube_keys) for cube_keys in keys)
+
+    with instrument.stage("cube.reduce", rows=record["rows"]):
+        keys, cells = np.unique(np.concatenate(keys), return_inverse=True)
+        counts = counts[np.concatenate(rows)]
+        sums = np.empty((len(keys), len(columns)), dtype=np.int32)
+        for i in range(len(columns)):
+            sums[:, i] = np.bincount(cells, weights=counts[:, i], minlength=len(keys))
+
+    bounds = np.searchsorted(keys, offsets)
+    return {name: SplitCube(dims, {dim: labels[dim] for dim in dims}, keys[start:end] - offset, sums[start:end],
+                            columns)
+            for (name, dims), start, end, offset in zip(cubes.items(), bounds[:-1], bounds[1:], offsets)}
+
+
+def save_cubes(cubes, cubes_dir):
+    """Write each cube to its own folder in cubes_dir"""
+    for name, cube in cubes.items():
+        cube.save(os.path.join(cubes_dir, name))
+    return cubes_dir
+
+
+def open_cube(cube_dir):
+    """Open a saved cube with its arrays memory-mapped"""
+    with open(os.path.join(cube_dir, "cube.json")) as f:
+        meta = json.load(f)
+    labels = {dim: np.load(os.path.join(cube_dir, f"labels_{dim}.npy")) for dim in meta["dims"]}
+    return SplitCube(meta["dims"], labels, np.load(os.path.join(cube_dir, "keys.npy"), mmap_mode="r"),
+                     np.load(os.path.join(cube_dir, "counts.npy"), mmap_mode="r"), meta["columns"])
+
+
+def open_cubes(cubes_dir):
+    """Open every cube saved in cubes_dir, by name"""
+    return {name: open_cube(os.path.join(cubes_dir, name)) for name in sorted(os.listdir(cubes_dir))
+            if os.path.exists(os.path.join(cubes_dir, name, "cube.json"))}
+
+
+def _where(specs):
+    """Parse dimension=label[,label...] arguments"""
+    where = {}
+    for spec in specs:
+        dim, _, values = spec.partition("=")
+        where[dim] = values.split(",")
+    return where
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and query split cubes from parsed play arrays")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="build the split cubes of a folder of play arrays")
+    build.add_argument("plays_dir", help="folder written by retrosheet.py")
+    build.add_argument("cubes_dir", help="folder for the cubes")
+    build.add_argument("--profile", action="store_true", help="print the time, memory and rows of each stage")
+
+    query = commands.add_parser("query", help="roll a cube up to some of its dimensions")
+    query.add_argument("cubes_dir")
+    query.add_argument("cube", help="cube name, e.g. batting, pitching or matchups")
+    query.add_argument("--by", nargs="*", default=[], help="dimensions to keep, e.g. batter pit_hand")
+    query.add_argument("--where", nargs="*", default=[], help="filters like pit_hand=L or gametype=regular")
+    query.add_argument("-n", type=int, default=20, help="rows to show, most plate appearances first")
+    query.add_argument("--column", default="pa", help="count column to sort by")
+
+    args = parser.parse_args()
+    pd.set_option("display.width", 200)
+
+    if args.command == "build":
+        if args.profile:
+            instrument.enable()
+        start = time.perf_counter()
+        plays = retrosheet.Plays(args.plays_dir)
+        cubes = build_cubes(plays)
+        save_cubes(cubes, args.cubes_dir)
+        print(f"Built {', '.join(f'{name} ({len(cube)} cells)' for name, cube in cubes.items())} from "
+              f"{len(plays)} plays in {time.perf_counter() - start:.2f}s: {args.cubes_dir}")
+        if args.profile:
+            instrument.print_breakdown({args.plays_dir: instrument.report()})
+    else:
+        cube = open_cube(os.path.join(args.cubes_dir, args.cube))
+        frame = cube.rollup(args.by, **_where(args.where)).frame()
+        print(frame.nlargest(args.n, args.column).to_string(index=False))
@@ -0,0 +1,409 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import ratings
+import rosters
+import scrape
+
+# Synthetic seasons for benchmarks and offline runs.
+#
+# A season at scale 1 has about 1,500 players on 26 teams, like a season of
+# the 1970s-90s; scale 10 or 100 keeps the teams and multiplies the players
+# (and so the plate appearances). Stats are drawn per player from league
+# rates, so the tables have the columns, markers (* # HOF), traded players (a
+# TOT line plus one per team), league average rows and value ranges that
+# pullTable returns, and every rating stage gets realistic input:
+#   season_tables          bat, pit, fld, cat and appearances tables
+#   season_players         the merged and rated players frame
+#   write_roster_workbook  a "<year> rosters formatted.xlsx" workbook
+#   write_plays            a play-by-play CSV as h2h.aggregate_h2h reads it
+#   write_events           Retrosheet event and roster files as retrosheet.py reads them
+
+players_per_season = 1500
+teams = [team for team in rosters.team_dict if team != "TOT"][:26]
+
+# Columns of the baseball-reference tables, after Rk, Name, Age, Tm and Lg
+bat_stats = ["G", "PA", "AB", "R", "H", "2B", "3B", "HR", "RBI", "SB", "CS", "BB", "SO", "BA", "OBP", "SLG",
+             "OPS", "OPS+", "TB", "GDP", "HBP", "SH", "SF", "IBB"]
+pit_stats = ["W", "L", "W-L%", "ERA", "G", "GS", "GF", "CG", "SHO", "SV", "IP", "H", "R", "ER", "HR", "BB",
+             "IBB", "SO", "HBP", "BK", "WP", "BF", "ERA+", "FIP", "WHIP", "H9", "HR9", "BB9", "SO9", "SO/W"]
+fld_stats = ["G", "GS", "CG", "Inn", "Ch", "PO", "A", "E", "DP", "Fld%", "Rtot", "Rtot/yr", "Rdrs", "RF/9", "RF/G"]
+cat_stats = ["G", "GS", "CG", "Inn", "Ch", "PO", "A", "E", "DP", "Fld%", "PB", "WP", "SB", "CS", "CS%", "lgCS%"]
+app_stats = ["G", "GS", "Batting", "Defense", "P", "C", "1B", "2B", "3B", "SS", "LF", "CF", "RF", "OF", "DH",
+             "PH", "PR"]
+
+_first_names = ["Hank", "Willie", "Pete", "Johnny", "Reggie", "Mike", "George", "Rod", "Dave", "Jim", "Tom",
+                "Bob", "Steve", "Fred", "Ron", "Luis", "José", "Tony", "Ken", "Don", "Bill", "Joe", "Ozzie",
+                "Cal", "Andrés", "Carl", "Jerry", "Larry", "Frank", "Ángel"]
+_last_names = ["Aaron", "Stargell", "Rose", "Bench", "Jackson", "Schmidt", "Brett", "Carew", "Parker", "Rice",
+               "Seaver", "Gibson", "Garvey", "Lynn", "Guidry", "Tiant", "Peña", "Pérez", "Griffey", "Morgan",
+               "Madlock", "Foster", "Smith", "Ripken", "Galarraga", "Yastrzemski", "Koosman", "Blyleven",
+               "Niekro", "Sutton", "Concepción", "Hernández", "Murray", "Winfield", "Kingman"]
+
+# Share of position players by primary position, and putouts and assists per game there
+_position_share = {"C": 0.11, "1B": 0.12, "2B": 0.12, "3B": 0.12, "SS": 0.12, "LF": 0.14, "CF": 0.13, "RF": 0.14}
+_chances = {"P": (0.2, 1.2), "C": (6.0, 0.6), "1B": (8.5, 0.6), "2B": (2.2, 3.0), "3B": (0.8, 2.0),
+            "SS": (1.9, 3.1), "LF": (2.0, 0.1), "CF": (2.7, 0.1), "RF": (2.0, 0.1)}
+
+# Plate appearance outcomes of the play files and their league rates; the rest are outs
+_play_outcomes = {"single": 0.155, "double": 0.045, "triple": 0.005, "hr": 0.025, "walk": 0.08, "iw": 0.007,
+                  "hbp": 0.008, "k": 0.16, "sh": 0.008, "sf": 0.007, "xi": 0.001}
+_play_events = {"single": "S8/G", "double": "D7/L", "triple": "T9/F", "hr": "HR/F7", "walk": "W", "iw": "IW",
+                "hbp": "HP", "k": "K", "sh": "SH/BG1", "sf": "SF/F9", "xi": "C/E2", "out": "63/G"}
+
+
+def _normal(rng, mean, sd, size, low=0.0, high=1.0):
+    return np.clip(rng.normal(mean, sd, size), low, high)
+
+
+def _ratio(numerator, denominator, digits=3):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.round(numerator / denominator, digits)
+
+
+def _people(rng, n):
+    """Names, player IDs and ages of n players"""
+    first = rng.choice(_first_names, n)
+    last = rng.choice(_last_names, n)
+    names = np.char.add(np.char.add(first, " "), last)
+    # baseball-reference IDs: five letters of the last name, two of the first, a number
+    stems = [(l.lower()[:5] + f.lower()[:2]).encode("ascii", "ignore").decode() for f, l in zip(first, last)]
+    ids = np.array([f"{stem}{i:02d}" for i, stem in enumerate(stems)])
+    return names, ids, rng.integers(20, 41, n)
+
+
+def _positions(rng, n, pitcher):
+    """Primary position and position summary ("SS-2B", "P", or "" for pinch hitters) of each player"""
+    primary = rng.choice(list(_position_share), n, p=list(_position_share.values()))
+    second = rng.choice(list(_position_share), n)
+    summary = np.where((rng.random(n) < 0.4) & (second != primary), np.char.add(np.char.add(primary, "-"), second),
+                       primary)
+    summary = np.where(rng.random(n) < 0.03, "", summary)
+    return np.where(pitcher, "P", primary), np.where(pitcher, "P", summary)
+
+
+def _stints(rng, n, traded_share=0.08):
+    """Player index, team and share of the season of each team stint; traded players have two"""
+    first = rng.integers(0, len(teams), n)
+    second = (first + rng.integers(1, len(teams), n)) % len(teams)
+    traded = rng.random(n) < traded_share
+    share = np.where(traded, rng.uniform(0.2, 0.8, n), 1.0)
+    player = np.concatenate([np.arange(n), np.flatnonzero(traded)])
+    team = np.concatenate([first, second[traded]])
+    share = np.concatenate([share, 1 - share[traded]])
+    order = np.lexsort((team, player))
+    return player[order], np.array(teams)[team[order]], share[order], traded
+
+
+def _split(totals, player, share):
+    """Split the season counts of each player between their stints, which are adjacent rows
+
+    Counts are split in proportion, so e.g. hits never exceed at bats on either team.
+    """
+    second = np.r_[False, player[1:] == player[:-1]]
+    stints = {}
+    for stat, values in totals.items():
+        values = values[player]
+        split = np.round(values * share).astype(values.dtype)
+        # A traded player's second stint has whatever the first did not
+        split[second] = values[second] - split[np.flatnonzero(second) - 1]
+        stints[stat] = split
+    return stints
+
+
+def _with_totals(stints, totals, player, team, traded, columns):
+    """Stack team stint rows with a TOT row first for each traded player, like the season tables"""
+    tot = {column: values[traded] for column, values in totals.items()}
+    tot_player = np.flatnonzero(traded)
+    frame = pd.concat([pd.DataFrame({"player": tot_player, "Tm": "TOT", **tot}),
+                       pd.DataFrame({"player": player, "Tm": team, **stints})], ignore_index=True)
+    frame["order"] = frame["Tm"] != "TOT"
+    frame = frame.sort_values(["player", "order"], kind="stable", ignore_index=True)
+    return frame[["player", "Tm", *columns]]
+
+
+def _table(frame, people, marker, stats, summary=None, team=True):
+    """Lay out a stats frame as a baseball-reference table with Rk, Name, Age, Tm and Lg"""
+    names, ids, ages = people
+    table = pd.DataFrame({"Rk": np.arange(1, len(frame) + 1),
+                          "Name": np.char.add(names[frame["player"]], marker[frame["player"]]),
+                          "Age": ages[frame["player"]], "Tm": frame["Tm"].to_numpy(),
+                          "Lg": np.where(frame["Tm"] == "TOT", "MLB", "ML")})
+    for stat in stats:
+        table[stat] = frame[stat].to_numpy()
+    if summary is not None:
+        table["Pos\xa0Summary"] = summary[frame["player"]]
+    table["player_id"] = ids[frame["player"]]
+    return table if team else table.drop(columns=["Tm"])
+
+
+def _batting(rng, n, pitcher, player, team, share, traded):
+    games = np.where(pitcher, rng.integers(5, 70, n), rng.integers(5, 163, n))
+    pa = np.round(games * np.where(pitcher, rng.uniform(0.1, 2.2, n), rng.uniform(1.0, 4.4, n))).astype(np.int64)
+    bb = rng.binomial(pa, _normal(rng, np.where(pitcher, 0.04, 0.085), 0.025, n))
+    hbp = rng.binomial(pa, 0.008)
+    sh = rng.binomial(pa, np.where(pitcher, 0.08, 0.006))
+    sf = rng.binomial(pa, 0.007)
+    ab = np.maximum(pa - bb - hbp - sh - sf, 0)
+    h = rng.binomial(ab, _normal(rng, np.where(pitcher, 0.13, 0.26), 0.03, n))
+    hr = rng.binomial(h, _normal(rng, 0.09, 0.05, n, high=0.35))
+    triple = rng.binomial(h - hr, _normal(rng, 0.02, 0.015, n, high=0.1))
+    double = rng.binomial(h - hr - triple, _normal(rng, 0.19, 0.04, n))
+    on_base = h + bb + hbp
+    sb = rng.binomial(on_base, rng.exponential(0.05, n).clip(0, 0.6))
+    totals = {
+        "G": games, "PA": pa, "AB": ab, "R": rng.binomial(on_base, 0.4), "H": h, "2B": double, "3B": triple,
+        "HR": hr, "RBI": rng.binomial(h + sf, 0.42) + hr, "SB": sb, "CS": rng.binomial(sb + 1, 0.3),
+        "BB": bb, "SO": rng.binomial(pa, _normal(rng, np.where(pitcher, 0.3, 0.15), 0.05, n)),
+        "GDP": rng.binomial(ab, 0.02), "HBP": hbp, "SH": sh, "SF": sf, "IBB": rng.binomial(bb, 0.08),
+    }
+    frame = _with_totals(_split(totals, player, share), totals, player, team, traded, list(totals))
+    frame["TB"] = frame["H"] + frame["2B"] + 2 * frame["3B"] + 3 * frame["HR"]
+    frame["BA"] = _ratio(frame["H"], frame["AB"])
+    frame["OBP"] = _ratio(frame["H"] + frame["BB"] + frame["HBP"],
+                          frame["AB"] + frame["BB"] + frame["HBP"] + frame["SF"])
+    frame["SLG"] = _ratio(frame["TB"], frame["AB"])
+    frame["OPS"] = frame["OBP"] + frame["SLG"]
+    frame["OPS+"] = np.round(100 * (frame["OBP"] / 0.32 + frame["SLG"] / 0.39 - 1))
+    return frame
+
+
+def _pitching(rng, n, starter, player, team, share, traded):
+    games = np.where(starter, rng.integers(5, 37, n), rng.integers(5, 76, n))
+    gs = np.where(starter, games - rng.binomial(games, 0.05), rng.binomial(games, 0.03))
+    outs = np.round(gs * rng.uniform(15, 22, n) + (games - gs) * rng.uniform(2, 5, n)).astype(np.int64)
+    h = rng.poisson(outs * _normal(rng, 0.33, 0.05, n))
+    bb = rng.poisson(outs * _normal(rng, 0.12, 0.03, n))
+    hbp = rng.poisson(outs * 0.01)
+    r = rng.binomial(h + bb + hbp, 0.3)
+    totals = {
+        "W": rng.binomial(gs, 0.4) + rng.binomial(games - gs, 0.05), "L": rng.binomial(gs, 0.38),
+        "G": games, "GS": gs, "GF": rng.binomial(games - gs, 0.4), "CG": rng.binomial(gs, 0.12),
+        "SHO": rng.binomial(gs, 0.03), "SV": rng.binomial(games - gs, np.where(starter, 0, 0.12)),
+        "outs": outs, "H": h, "R": r, "ER": rng.binomial(r, 0.9), "HR": rng.binomial(h, _normal(rng, 0.09, 0.03, n)),
+        "BB": bb, "IBB": rng.binomial(bb, 0.08), "SO": rng.binomial(outs, _normal(rng, 0.2, 0.06, n)),
+        "HBP": hbp, "BK": rng.poisson(np.full(n, 0.5)), "WP": rng.poisson(outs * 0.012),
+    }
+    totals["BF"] = outs + h + bb + hbp + rng.poisson(outs * 0.02)
+    frame = _with_totals(_split(totals, player, share), totals, player, team, traded, list(totals))
+    # IP is written as whole innings and thirds: 200.1, 200.2
+    frame["IP"] = frame["outs"] // 3 + (frame["outs"] % 3) / 10
+    innings = frame["outs"] / 3
+    frame["W-L%"] = _ratio(frame["W"], frame["W"] + frame["L"])
+    frame["ERA"] = _ratio(9 * frame["ER"], innings, 2)
+    frame["ERA+"] = np.round(_ratio(100 * 3.8, frame["ERA"], 0))
+    frame["FIP"] = _ratio(13 * frame["HR"] + 3 * (frame["BB"] + frame["HBP"]) - 2 * frame["SO"], innings, 2) + 3.1
+    frame["WHIP"] = _ratio(frame["BB"] + frame["H"], innings)
+    for stat, count in (("H9", "H"), ("HR9", "HR"), ("BB9", "BB"), ("SO9", "SO")):
+        frame[stat] = _ratio(9 * frame[count], innings, 1)
+    frame["SO/W"] = _ratio(frame["SO"], frame["BB"], 2)
+    return frame
+
+
+def _fielding(rng, games, primary):
+    """Season fielding totals of players, with the columns of both the fielding and catching tables"""
+    n = len(games)
+    po_rate = np.array([_chances[position][0] for position in primary])
+    a_rate = np.array([_chances[position][1] for position in primary])
+    po = rng.poisson(games * po_rate * rng.uniform(0.7, 1.3, n))
+    a = rng.poisson(games * a_rate * rng.uniform(0.7, 1.3, n))
+    e = rng.poisson((po + a) * _normal(rng, 0.022, 0.012, n))
+    gs = rng.binomial(games, 0.8)
+    outs = gs * rng.integers(24, 28, n)
+    frame = pd.DataFrame({
+        "G": games, "GS": gs, "CG": rng.binomial(gs, 0.7), "Inn": outs // 3 + outs % 3 / 10, "Ch": po + a + e,
+        "PO": po, "A": a, "E": e, "DP": rng.binomial(po + a, 0.05), "Fld%": _ratio(po + a, po + a + e),
+        "Rtot": rng.integers(-15, 16, n), "Rtot/yr": rng.integers(-20, 21, n), "Rdrs": rng.integers(-15, 16, n),
+        "RF/9": _ratio(27 * (po + a), outs, 2), "RF/G": _ratio(po + a, games, 2),
+    })
+    attempts = rng.poisson(games * 0.9)
+    caught = rng.binomial(attempts, _normal(rng, 0.35, 0.08, n))
+    frame["PB"] = rng.poisson(games * 0.06)
+    frame["WP"] = rng.poisson(games * 0.25)
+    frame["SB"] = attempts - caught
+    frame["CS"] = caught
+    frame["CS%"] = np.round(100 * _ratio(caught, attempts), 0)
+    frame["lgCS%"] = 35
+    return frame
+
+
+def season_tables(scale=1, seed=1977):
+    """Return synthetic bat, pit, fld, cat and appearances tables of a season as pullTable gives them
+
+    The tables carry the player_id column of pullTable(..., player_ids=True),
+    ready for scrape.merge_players.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(round(players_per_season * scale))
+    people = names, ids, ages = _people(rng, n)
+    bats = rng.choice(["R", "L", "S"], n, p=[0.62, 0.3, 0.08])
+    throws = rng.choice(["R", "L"], n, p=[0.72, 0.28])
+    pitcher = rng.random(n) < 0.45
+    starter = pitcher & (rng.random(n) < 0.4)
+    primary, summary = _positions(rng, n, pitcher)
+    player, team, share, traded = _stints(rng, n)
+
+    bat_marker = np.where(bats == "L", "*", np.where(bats == "S", "#", ""))
+    batting = _batting(rng, n, pitcher, player, team, share, traded)
+    bat = _table(batting, people, bat_marker, bat_stats, summary)
+    bat.loc[len(bat)] = [None, "LgAvg per 600 PA", None, "", "", *[np.nan] * len(bat_stats), "", None]
+
+    hurlers = np.flatnonzero(pitcher)
+    stint = pitcher[player]
+    pitching = _pitching(rng, len(hurlers), starter[hurlers], np.searchsorted(hurlers, player[stint]),
+                         team[stint], share[stint], traded[hurlers])
+    pitching["player"] = hurlers[pitching["player"]]
+    pit = _table(pitching, people, np.where(throws == "L", "*", ""), pit_stats)
+    pit.loc[len(pit)] = [None, "LgAvg per 180 IP", None, "", "", *[np.nan] * len(pit_stats), None]
+
+    # One fielding line per player over the whole season; pinch hitters have none
+    season_games = batting[batting["Tm"] != "TOT"].groupby("player")["G"].sum().to_numpy().copy()
+    pitcher_games = pitching[pitching["Tm"] != "TOT"].groupby("player")["G"].sum()
+    season_games[pitcher_games.index] = pitcher_games.to_numpy()
+    fields = np.flatnonzero(summary != "")
+    fielding = _fielding(rng, season_games[fields], primary[fields])
+    fielding.insert(0, "player", fields)
+    fielding.insert(1, "Tm", "")
+    fld = _table(fielding, people, np.full(n, ""), fld_stats, summary, team=False)
+    fld.loc[len(fld)] = [None, "LgAvg", None, "", *[np.nan] * len(fld_stats), "", None]
+
+    catchers = np.flatnonzero(["C" in positions.split("-") for positions in summary])
+    catching = _fielding(rng, season_games[catchers], np.full(len(catchers), "C"))
+    catching.insert(0, "player", catchers)
+    catching.insert(1, "Tm", "")
+    cat = _table(catching, people, np.full(n, ""), cat_stats, team=False)
+    cat.loc[len(cat)] = [None, "LgAvg", None, "", *[np.nan] * len(cat_stats), None]
+
+    # Appearances by team, with games split between the primary and second position
+    games = np.where(pitcher[player], 0, batting.loc[batting["Tm"] != "TOT", "G"].to_numpy())
+    games[stint] = pitching.loc[pitching["Tm"] != "TOT", "G"].to_numpy()
+    appearances = pd.DataFrame({"Name": names[player], "Age": ages[player], "Tm": team, "player_id": ids[player]})
+    hof = rng.random(n) < 0.01
+    appearances["Name"] = np.where(hof[player], np.char.add(names[player], " HOF"), names[player])
+    appearances["G"] = games
+    appearances["GS"] = rng.binomial(games, 0.75)
+    appearances["Batting"] = rng.binomial(games, np.where(pitcher[player], 0.3, 0.95))
+    appearances["Defense"] = np.where(summary[player] == "", 0, rng.binomial(games, 0.92))
+    second = np.array([s.split("-")[1] if "-" in s else "" for s in summary])[player]
+    at_primary = rng.binomial(appearances["Defense"], np.where(second == "", 1.0, 0.8))
+    for position in ["P", *_position_share]:
+        appearances[position] = (np.where(primary[player] == position, at_primary, 0) +
+                                 np.where(second == position, appearances["Defense"] - at_primary, 0))
+    appearances["OF"] = appearances["LF"] + appearances["CF"] + appearances["RF"]
+    appearances["DH"] = 0
+    appearances["PH"] = rng.binomial(games - appearances["GS"], 0.5)
+    appearances["PR"] = rng.binomial(games - appearances["GS"], 0.1)
+    return bat, pit, fld, cat, appearances[["Name", "Age", "Tm", "player_id", *app_stats]]
+
+
+def season_players(scale=1, seed=1977):
+    """Return the merged and rated players frame of a synthetic season"""
+    return ratings.rate_players(scrape.merge_players(*season_tables(scale, seed)))
+
+
+def write_roster_workbook(output_file, scale=1, year=1977, seed=1977, players=None):
+    """Write the formatted roster workbook of a synthetic season (of players, if given)"""
+    players = season_players(scale, seed) if players is None else players
+    return rosters.write_rosters(rosters.roster_frame(players.copy()), str(year), output_file)
+
+
+def write_plays(output_file, players, year=1977, seed=1977, chunksize=1_000_000):
+    """Write a play-by-play CSV of a season's plate appearances between its players
+
+    Batters are drawn by their plate appearances and pitchers by batters
+    faced, one play per plate appearance of the season, with outcomes at league
+    rates. A few plays at the end are postseason games. Returns the plays written.
+    """
+    rng = np.random.default_rng(seed)
+    lines = players[players["Tm"] != "TOT"]
+    batters = lines.loc[lines["PA"].fillna(0) > 0, ["player_id", "PA"]]
+    pitchers = lines.loc[lines["BF"].fillna(0) > 0, ["player_id", "BF"]]
+    plays = int(batters["PA"].sum())
+    outcomes = list(_play_outcomes) + ["out"]
+    rates = list(_play_outcomes.values())
+    rates.append(1 - sum(rates))
+    events = np.array([_play_events[outcome] for outcome in outcomes])
+
+    written = 0
+    while written < plays:
+        size = min(chunksize, plays - written)
+        outcome = rng.choice(len(outcomes), size, p=rates)
+        play = np.arange(written, written + size)
+        # About 80 plate appearances a game
+        game = play // 80
+        chunk = pd.DataFrame({
+            "gid": np.char.add(np.array(teams)[game % len(teams)], np.char.add(str(year), np.char.zfill(
+                (game % 10000).astype(str), 4))),
+            "inning": play % 80 // 9 + 1, "top_bot": play % 2,
+            "batter": rng.choice(batters["player_id"].to_numpy(), size, p=batters["PA"] / batters["PA"].sum()),
+            "pitcher": rng.choice(pitchers["player_id"].to_numpy(), size, p=pitchers["BF"] / pitchers["BF"].sum()),
+            "event": events[outcome],
+            "gametype": np.where(play >= plays - plays // 300, "worldseries", "regular"),
+        })
+        chunk["pa"] = 1
+        for i, column in enumerate(outcomes[:-1]):
+            chunk[column] = (outcome == i).astype(np.int8)
+        chunk["walk"] |= chunk["iw"]
+        chunk["ab"] = 1 - (chunk["walk"] | chunk["hbp"] | chunk["sh"] | chunk["sf"] | chunk["xi"])
+        chunk.to_csv(output_file, mode="w" if written == 0 else "a", header=written == 0, index=False)
+        written += size
+    return plays
+
+
+def write_events(event_dir, players, year=1977, seed=1977):
+    """Write a season's plate appearances as Retrosheet event files and .ROS rosters
+
+    Plays are drawn as in write_plays, 80 to a game: each team's home games
+    go to <year><team>.EVN and the postseason plays to <year>WS.EVE. The
+    pitcher is changed with a sub record whenever the next play's pitcher
+    differs. Returns the plays written.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(event_dir, exist_ok=True)
+    lines = players[players["Tm"] != "TOT"]
+    for team, roster in lines.groupby("Tm"):
+        with open(os.path.join(event_dir, f"{team}{year}.ROS"), "w", encoding="latin-1", errors="replace") as f:
+            for player, name, bats, throws in roster[["player_id", "Name", "Bats", "Throws"]].itertuples(index=False):
+                first, _, last = name.partition(" ")
+                f.write(f"{player},{last},{first},{'B' if bats == 'S' else bats},{throws if throws in ('L', 'R') else 'R'},"
+                        f"{team},X\n")
+
+    batters = lines.loc[lines["PA"].fillna(0) > 0, ["player_id", "PA"]]
+    pitchers = lines.loc[lines["BF"].fillna(0) > 0, ["player_id", "BF"]]
+    plays = int(batters["PA"].sum())
+    outcomes = list(_play_outcomes) + ["out"]
+    rates = list(_play_outcomes.values())
+    rates.append(1 - sum(rates))
+    events = [_play_events[outcome] for outcome in outcomes]
+    batter = rng.choice(batters["player_id"].to_numpy(), plays, p=batters["PA"] / batters["PA"].sum())
+    pitcher = rng.choice(pitchers["player_id"].to_numpy(), plays, p=pitchers["BF"] / pitchers["BF"].sum())
+    outcome = rng.choice(len(outcomes), plays, p=rates)
+    balls = rng.integers(0, 4, plays)
+    strikes = rng.integers(0, 3, plays)
+
+    files = {}
+    postseason = plays - plays // 300
+    for start in range(0, plays, 80):
+        game = start // 80
+        home = teams[game % len(teams)]
+        home_game = game // len(teams)
+        name = f"{year}WS.EVE" if start >= postseason else f"{year}{home}.EVN"
+        if name not in files:
+            files[name] = open(os.path.join(event_dir, name), "w")
+        f = files[name]
+        # Home games are played on 28 days of each month from April to September
+        f.write(f"id,{home}{year}{4 + home_game // 28 % 6:02d}{home_game % 28 + 1:02d}{home_game // 168}\nversion,2\n"
+                f"info,visteam,{teams[(game + 1) % len(teams)]}\ninfo,hometeam,{home}\n")
+        current = [None, None]
+        for play in range(start, min(start + 80, plays)):
+            team = play % 2
+            if pitcher[play] != current[1 - team]:
+                current[1 - team] = pitcher[play]
+                f.write(f'sub,{pitcher[play]},"Pitcher",{1 - team},0,1\n')
+            f.write(f"play,{play % 80 // 9 + 1},{team},{batter[play]},{balls[play]}{strikes[play]},,"
+                    f"{events[outcome[play]]}\n")
+    for f in files.values():
+        f.close()
+    return plays
@@ -0,0 +1,88 @@
+import re
+
+import numpy as np
+import pandas as pd
+from lxml import html
+
+# Fast extraction of baseball-reference tables.
+#
+# Most tables on baseball-reference.com pages sit inside HTML comments, which is
+# why pullTable used to strip every comment marker and build a BeautifulSoup
+# tree over the whole page. Here only the requested <table> elements are cut out
+# of the raw page, parsed together in one lxml pass, and read row by row into
+# columns. Numeric columns are parsed while the columns are built, so no
+# later object to float conversion is needed.
+
+_table_start = '<table\\b[^>]*\\bid=["\']{}["\']'
+_integer = re.compile(r'-?\d+', re.ASCII)
+
+
+def find_table_ids(text):
+    """Return the ids of every table on a page, including commented-out ones"""
+    return re.findall(r'<table\b[^>]*\bid=["\']([^"\']+)["\']', text)
+
+
+def _table_html(text, tableID):
+    """Cut the markup of one table out of the raw page"""
+    match = re.search(_table_start.format(re.escape(tableID)), text)
+    if match is None:
+        raise ValueError(f"Table {tableID} not found")
+    end = text.find('</table>', match.start())
+    return text[match.start():end + len('</table>')]
+
+
+def _cell_text(cell):
+    return cell.text_content()
+
+
+def _typed_column(values):
+    """Parse a column of cell text as int, then float, falling back to text"""
+    # isdigit alone also takes superscripts and other non-ASCII digits, which np.int64 rejects
+    if all(value is not None and _integer.fullmatch(value) for value in values):
+        return np.array(values, dtype=np.int64)
+    try:
+        return np.array([float(value) if value else np.nan for value in values], dtype=float)
+    except (ValueError, TypeError):
+        return np.array(values, dtype=object)
+
+
+def _player_id(tr):
+    """The baseball-reference player ID a row links to (its data-append-csv), or None"""
+    for cell in tr.iter('th', 'td'):
+        player_id = cell.get('data-append-csv')
+        if player_id:
+            return player_id
+    return None
+
+
+def _table_frame(table, typed, player_ids=False):
+    """Read a parsed table into a DataFrame, the same rows and columns as pullTable
+
+    With player_ids, a player_id column holds each row's player ID.
+    """
+    header = [_cell_text(th) for th in table.find('.//thead').find('.//tr').iter('th')]
+    trs = list(table.iter('tr'))
+    rows = [[_cell_text(cell) for cell in tr.iter('th', 'td')] for tr in trs]
+
+    # Skip repeated header rows
+    keep = [not row or row[0] != header[0] for row in rows]
+    rows = [row for row, kept in zip(rows, keep) if kept]
+    width = max((len(row) for row in rows), default=len(header))
+
+    columns = {}
+    for i in range(width):
+        values = [row[i] if i < len(row) else None for row in rows]
+        columns[i] = _typed_column(values) if typed else values
+    data = pd.DataFrame(columns)
+    data.columns = header[:width]
+    if player_ids:
+        data['player_id'] = [_player_id(tr) for tr, kept in zip(trs, keep) if kept]
+    return data
+
+
+def extract_tables(text, tableIDs, typed=True, player_ids=False):
+    """Return a dict of DataFrames for the requested tables of a page"""
+    snippets = [_table_html(text, tableID) for tableID in tableIDs]
+    root = html.fromstring('<div>' + ''.join(snippets) + '</div>')
+    tables = root.findall('table')
+    return {tableID: _table_frame(table, typed, player_ids) for tableID, table in zip(tableIDs, tables)}